@@ -40,9 +40,199 @@ class Settings:
     CEREBRAS_MODEL: str = "llama-3.3-70b"
     GEMINI_MODEL: str = "gemini-2.0-flash"
     
-    # Rate Limiting
-    RATE_LIMIT_REQUESTS: int = 100
-    RATE_LIMIT_PERIOD: int = 3600  # 1 hour
+    # Startup - load SDKs and worker processes in the background once serving
+    STARTUP_WARM_UP: bool = os.getenv("STARTUP_WARM_UP", "true").lower() == "true"
+    
+    # Gemini Concurrency - the SDK is blocking, so calls run on a dedicated pool
+    GEMINI_MAX_CONCURRENCY: int = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+    GEMINI_EXECUTOR_WORKERS: int = int(os.getenv("GEMINI_EXECUTOR_WORKERS", "4"))
+    
+    # Upstream HTTP Clients - one pooled client per upstream
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+    HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+    HTTP_CONNECT_TIMEOUT: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    CEREBRAS_TIMEOUT: float = float(os.getenv("CEREBRAS_TIMEOUT", "30"))
+    OPENWEATHER_TIMEOUT: float = float(os.getenv("OPENWEATHER_TIMEOUT", "10"))
+    
+    # Resilience - per-upstream circuit breakers, retry budgets and adaptive timeouts
+    # Timeouts above are ceilings; once enough calls are seen each operation uses
+    # p99 * ADAPTIVE_TIMEOUT_MULTIPLIER, never below ADAPTIVE_TIMEOUT_FLOOR
+    GEMINI_TIMEOUT: float = float(os.getenv("GEMINI_TIMEOUT", "60"))
+    GEMINI_SLOW_CALL_SECONDS: float = float(os.getenv("GEMINI_SLOW_CALL_SECONDS", "30"))
+    CEREBRAS_SLOW_CALL_SECONDS: float = float(os.getenv("CEREBRAS_SLOW_CALL_SECONDS", "10"))
+    OPENWEATHER_SLOW_CALL_SECONDS: float = float(os.getenv("OPENWEATHER_SLOW_CALL_SECONDS", "5"))
+    BREAKER_FAILURE_RATE: float = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+    BREAKER_SLOW_CALL_RATE: float = float(os.getenv("BREAKER_SLOW_CALL_RATE", "0.8"))
+    BREAKER_WINDOW: int = int(os.getenv("BREAKER_WINDOW", "50"))  # most recent calls
+    BREAKER_MIN_CALLS: int = int(os.getenv("BREAKER_MIN_CALLS", "10"))
+    BREAKER_OPEN_SECONDS: float = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+    BREAKER_HALF_OPEN_CALLS: int = int(os.getenv("BREAKER_HALF_OPEN_CALLS", "2"))
+    RETRY_MAX_ATTEMPTS: int = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
+    RETRY_BACKOFF_BASE: float = float(os.getenv("RETRY_BACKOFF_BASE", "0.2"))
+    RETRY_BACKOFF_MAX: float = float(os.getenv("RETRY_BACKOFF_MAX", "2"))
+    RETRY_BUDGET_RATIO: float = float(os.getenv("RETRY_BUDGET_RATIO", "0.1"))  # retries per call
+    RETRY_BUDGET_CAP: float = float(os.getenv("RETRY_BUDGET_CAP", "10"))
+    ADAPTIVE_TIMEOUT_MULTIPLIER: float = float(os.getenv("ADAPTIVE_TIMEOUT_MULTIPLIER", "2"))
+    ADAPTIVE_TIMEOUT_FLOOR: float = float(os.getenv("ADAPTIVE_TIMEOUT_FLOOR", "2"))
+    ADAPTIVE_TIMEOUT_MIN_SAMPLES: int = int(os.getenv("ADAPTIVE_TIMEOUT_MIN_SAMPLES", "20"))
+    
+    # Plant Chat Routing - providers in preference order (until latencies are known)
+    LLM_PROVIDERS: list = [p.strip() for p in os.getenv("LLM_PROVIDERS", "cerebras,gemini").split(",") if p.strip()]
+    LLM_EWMA_ALPHA: float = float(os.getenv("LLM_EWMA_ALPHA", "0.2"))
+    LLM_MAX_ERROR_RATE: float = float(os.getenv("LLM_MAX_ERROR_RATE", "0.5"))
+    LLM_HEDGE_ENABLED: bool = os.getenv("LLM_HEDGE_ENABLED", "true").lower() == "true"
+    LLM_HEDGE_MIN_DELAY: float = float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.2"))
+    LLM_HEDGE_MAX_DELAY: float = float(os.getenv("LLM_HEDGE_MAX_DELAY", "5"))
+    LLM_HEDGE_DEFAULT_DELAY: float = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", "2"))  # before p95 is known
+    
+    # Per-branch deadlines (seconds) for endpoints that fan out to several upstreams
+    SOIL_ANALYSIS_DEADLINE: float = float(os.getenv("SOIL_ANALYSIS_DEADLINE", "25"))
+    WEATHER_DEADLINE: float = float(os.getenv("WEATHER_DEADLINE", "8"))
+    
+    # Weather Cache - coordinates are snapped to a grid cell before lookup
+    # WEATHER_GRID_MODE: "decimal" (round to N places) or "geohash" (N characters)
+    WEATHER_GRID_MODE: str = os.getenv("WEATHER_GRID_MODE", "decimal")
+    WEATHER_GRID_PRECISION: int = int(os.getenv("WEATHER_GRID_PRECISION", "2"))
+    WEATHER_CACHE_SIZE: int = int(os.getenv("WEATHER_CACHE_SIZE", "2048"))
+    WEATHER_CURRENT_TTL: int = int(os.getenv("WEATHER_CURRENT_TTL", "600"))  # 10 minutes
+    WEATHER_FORECAST_TTL: int = int(os.getenv("WEATHER_FORECAST_TTL", "3600"))  # 1 hour
+    
+    # Health Analysis Result Cache - keyed by image content + plant_type + language
+    # HEALTH_CACHE_BACKEND: "memory" or "disk"; HEALTH_CACHE_PERCEPTUAL treats re-encodes as hits
+    HEALTH_CACHE_ENABLED: bool = os.getenv("HEALTH_CACHE_ENABLED", "true").lower() == "true"
+    HEALTH_CACHE_BACKEND: str = os.getenv("HEALTH_CACHE_BACKEND", "memory")
+    HEALTH_CACHE_DIR: str = os.getenv("HEALTH_CACHE_DIR", str(Path(__file__).parent.parent / ".cache" / "health"))
+    HEALTH_CACHE_SIZE: int = int(os.getenv("HEALTH_CACHE_SIZE", "512"))
+    HEALTH_CACHE_TTL: int = int(os.getenv("HEALTH_CACHE_TTL", "86400"))  # 24 hours
+    HEALTH_CACHE_PERCEPTUAL: bool = os.getenv("HEALTH_CACHE_PERCEPTUAL", "false").lower() == "true"
+    
+    # Image Normalization - applied to photos before Gemini vision calls
+    IMAGE_MAX_EDGE: int = int(os.getenv("IMAGE_MAX_EDGE", "1024"))
+    IMAGE_JPEG_QUALITY: int = int(os.getenv("IMAGE_JPEG_QUALITY", "85"))
+    IMAGE_PROCESS_WORKERS: int = int(os.getenv("IMAGE_PROCESS_WORKERS", "2"))  # 0 = thread instead
+    
+    # Batch Health Analysis
+    # Each image costs one /api/analyze-health call against the rate limit, so a
+    # full batch of 20 fits the default 100-token bucket
+    BATCH_MAX_IMAGES: int = int(os.getenv("BATCH_MAX_IMAGES", "20"))
+    BATCH_MAX_CONCURRENCY: int = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+    
+    # Bulk Weather - plots per request and concurrent grid-cell fetches
+    BULK_WEATHER_MAX_PLOTS: int = int(os.getenv("BULK_WEATHER_MAX_PLOTS", "1000"))
+    BULK_WEATHER_MAX_CONCURRENCY: int = int(os.getenv("BULK_WEATHER_MAX_CONCURRENCY", "8"))
+    
+    # Multipart Uploads - cap on the image file size for */upload endpoints
+    MAX_UPLOAD_BYTES: int = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))  # 10 MB
+    
+    # Plant Persona - memoized system prompts per (plant, health, diseases, language)
+    PERSONA_CACHE_SIZE: int = int(os.getenv("PERSONA_CACHE_SIZE", "1024"))
+    
+    # Chat Sessions - server-side conversation state for /api/chat-sessions
+    CHAT_SESSION_MAX_SESSIONS: int = int(os.getenv("CHAT_SESSION_MAX_SESSIONS", "10000"))
+    CHAT_SESSION_MAX_BYTES: int = int(os.getenv("CHAT_SESSION_MAX_BYTES", str(64 * 1024 * 1024)))  # 64 MB
+    CHAT_SESSION_IDLE_TTL: int = int(os.getenv("CHAT_SESSION_IDLE_TTL", "1800"))  # 30 minutes
+    CHAT_SESSION_MAX_TURNS: int = int(os.getenv("CHAT_SESSION_MAX_TURNS", "20"))  # Messages kept per session
+    CHAT_SESSION_MAX_MESSAGE_CHARS: int = int(os.getenv("CHAT_SESSION_MAX_MESSAGE_CHARS", "4000"))  # Per stored message
+    
+    # Chat Context - history is fit to a token budget; older turns are folded
+    # into a rolling summary cached per conversation
+    CHAT_CONTEXT_TOKENS: int = int(os.getenv("CHAT_CONTEXT_TOKENS", "600"))
+    CHAT_SUMMARY_TOKENS: int = int(os.getenv("CHAT_SUMMARY_TOKENS", "150"))
+    CHAT_SUMMARY_CACHE_SIZE: int = int(os.getenv("CHAT_SUMMARY_CACHE_SIZE", "5000"))
+    CHAT_SUMMARY_TTL: int = int(os.getenv("CHAT_SUMMARY_TTL", "3600"))  # 1 hour
+    CHAT_SUMMARY_MAX_PENDING: int = int(os.getenv("CHAT_SUMMARY_MAX_PENDING", "50"))  # Queued folds; more are skipped
+    
+    # Chat Answer Cache - first-turn answers reused per persona, matched on the
+    # normalized question or by MinHash similarity
+    CHAT_ANSWER_CACHE_ENABLED: bool = os.getenv("CHAT_ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    CHAT_ANSWER_CACHE_SIZE: int = int(os.getenv("CHAT_ANSWER_CACHE_SIZE", "5000"))
+    CHAT_ANSWER_CACHE_TTL: int = int(os.getenv("CHAT_ANSWER_CACHE_TTL", "21600"))  # 6 hours
+    CHAT_ANSWER_CACHE_SIMILARITY: float = float(os.getenv("CHAT_ANSWER_CACHE_SIMILARITY", "0.8"))
+    
+    # Future Descriptions - cached per (disease, scenario, days bucket, language);
+    # stale entries are served while they refresh in the background
+    FUTURE_DAYS_BUCKETS: list = [int(d) for d in os.getenv("FUTURE_DAYS_BUCKETS", "3,7,14,30,60,90").split(",")]
+    FUTURE_CACHE_SIZE: int = int(os.getenv("FUTURE_CACHE_SIZE", "2048"))
+    FUTURE_CACHE_FRESH_SECONDS: int = int(os.getenv("FUTURE_CACHE_FRESH_SECONDS", "86400"))  # 24 hours
+    FUTURE_CACHE_TTL: int = int(os.getenv("FUTURE_CACHE_TTL", "604800"))  # 7 days, stale entries included
+    FUTURE_CACHE_WARM_UP: bool = os.getenv("FUTURE_CACHE_WARM_UP", "true").lower() == "true"
+    FUTURE_WARM_UP_DAYS: list = [int(d) for d in os.getenv("FUTURE_WARM_UP_DAYS", "14").split(",")]
+    FUTURE_WARM_UP_CONCURRENCY: int = int(os.getenv("FUTURE_WARM_UP_CONCURRENCY", "4"))
+    
+    # Translation - advice/alert catalogs in app/locales, gaps filled by the LLM
+    # and kept in a translation memory file across restarts
+    TRANSLATION_MEMORY_PATH: str = os.getenv("TRANSLATION_MEMORY_PATH", str(Path(__file__).parent.parent / ".cache" / "translations.json"))
+    TRANSLATION_BATCH_SIZE: int = int(os.getenv("TRANSLATION_BATCH_SIZE", "50"))
+    TRANSLATION_RETRY_SECONDS: float = float(os.getenv("TRANSLATION_RETRY_SECONDS", "300"))
+    TRANSLATION_WARM_UP: bool = os.getenv("TRANSLATION_WARM_UP", "true").lower() == "true"
+    
+    # Background Jobs - future image generation runs on a bounded worker pool
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_QUEUE_SIZE: int = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+    JOB_STORE_SIZE: int = int(os.getenv("JOB_STORE_SIZE", "1000"))
+    JOB_RESULT_TTL: int = int(os.getenv("JOB_RESULT_TTL", "3600"))  # 1 hour
+    JOB_TIMEOUT: float = float(os.getenv("JOB_TIMEOUT", "180"))
+    
+    # Future Image Generation - "auto" (Hugging Face if keyed, else stub), "stub" or "huggingface"
+    FUTURE_IMAGE_GENERATOR: str = os.getenv("FUTURE_IMAGE_GENERATOR", "auto")
+    FUTURE_IMAGE_STUB_DELAY: float = float(os.getenv("FUTURE_IMAGE_STUB_DELAY", "0"))
+    HUGGINGFACE_IMAGE_MODEL: str = os.getenv("HUGGINGFACE_IMAGE_MODEL", "timbrooks/instruct-pix2pix")
+    HUGGINGFACE_TIMEOUT: float = float(os.getenv("HUGGINGFACE_TIMEOUT", "120"))
+    
+    # Image Store - generated and uploaded images are served by content ID from
+    # /api/images/{id} instead of being echoed back as base64
+    IMAGE_STORE_MAX_BYTES: int = int(os.getenv("IMAGE_STORE_MAX_BYTES", str(256 * 1024 * 1024)))  # 256 MB
+    IMAGE_STORE_TTL: int = int(os.getenv("IMAGE_STORE_TTL", "3600"))  # 1 hour
+    IMAGE_CACHE_MAX_AGE: int = int(os.getenv("IMAGE_CACHE_MAX_AGE", "86400"))  # Content never changes for an ID
+    
+    # Rate Limiting - token bucket of RATE_LIMIT_REQUESTS tokens per client,
+    # refilled over RATE_LIMIT_PERIOD; each route costs RATE_LIMIT_ROUTE_COSTS tokens
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_REQUESTS: int = int(os.getenv("RATE_LIMIT_REQUESTS", "100"))
+    RATE_LIMIT_PERIOD: int = int(os.getenv("RATE_LIMIT_PERIOD", "3600"))  # 1 hour
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")  # memory or redis
+    RATE_LIMIT_REDIS_URL: str = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+    # Clients sending one of these X-API-Key values get their own bucket; any other key is ignored
+    RATE_LIMIT_API_KEYS: set = {k.strip() for k in os.getenv("RATE_LIMIT_API_KEYS", "").split(",") if k.strip()}
+    # Proxies in front of the app that append to X-Forwarded-For (Render's load balancer is one);
+    # 0 ignores the header and uses the socket address
+    RATE_LIMIT_TRUSTED_PROXIES: int = int(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "1"))
+    RATE_LIMIT_DEFAULT_COST: float = 1
+    RATE_LIMIT_ROUTE_COSTS: dict = {
+        # Free: health checks and docs
+        "/": 0,
+        "/health": 0,
+        "/docs": 0,
+        "/redoc": 0,
+        "/openapi.json": 0,
+        "/api/health-check": 0,
+        "/metrics": 0,
+        # Gemini vision
+        "/api/analyze-health": 5,
+        "/api/analyze-health/upload": 5,
+        # Batch: the base cost up front, then the per-image cost for each image beyond it
+        "/api/analyze-health/batch": 5,
+        "/api/soil-weather": 5,
+        "/api/soil-weather/upload": 5,
+        # Gemini text
+        "/api/generate-future": 3,
+        "/api/generate-future/upload": 3,
+        "/api/generate-future-image": 3,
+        # Job polling is cheap; prefer the /events stream
+        "/api/jobs/": 0.1,
+        # Stored images; clients revalidate with If-None-Match
+        "/api/images/": 0.1,
+        # Cerebras
+        "/api/chat-with-plant": 2,
+        "/api/chat-sessions": 1,
+        "/api/chat-sessions/": 2,
+        "/api/chat-with-plant/stream": 2,
+        # OpenWeather (cached)
+        "/api/weather": 1,
+        "/api/weather/bulk": 10,
+    }
     
     # Supported Languages
     SUPPORTED_LANGUAGES: list = ["en", "hi", "te"]
@@ -3,13 +3,64 @@ CropMagix Backend - Main Application
 Production-ready FastAPI server
 """
 
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import time
 
 from .config import settings
-from .routers import health_router, chat_router, future_router, soil_weather_router
+from .middleware import UploadSizeLimitMiddleware, RateLimitMiddleware, create_bucket_backend
+from .routers import health_router, chat_router, future_router, soil_weather_router, metrics_router, jobs_router, images_router
+from .services.cerebras_service import cerebras_service
+from .services.gemini_service import gemini_service
+from .services.weather_service import weather_service
+from .services.http_client import create_http_client
+from .services.image_pipeline import image_pipeline
+from .services.image_generation import image_generator
+from .services.jobs import job_queue
+from .services.translation import translator
+from .services.metrics import http_requests, http_request_duration, http_in_flight
+
+async def warm_up():
+    """
+    Load the heavy SDKs and worker processes after the server is already up
+    Runs in the background so /health answers during a cold start
+    """
+    
+    steps = [gemini_service.warm_up(), image_pipeline.warm_up()]
+    # Fill catalog gaps; until then untranslated advice stays English
+    if settings.TRANSLATION_WARM_UP:
+        steps.append(translator.warm_up())
+    # Future descriptions for the known diseases, so /generate-future rarely waits on Gemini
+    if settings.FUTURE_CACHE_WARM_UP:
+        steps.append(gemini_service.warm_up_future_descriptions())
+    
+    for result in await asyncio.gather(*steps, return_exceptions=True):
+        if isinstance(result, Exception):
+            print(f"Warning: warm-up step failed: {result}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create pooled upstream clients on startup and release them on shutdown"""
+    
+    cerebras_service.client = create_http_client(cerebras_service.base_url, settings.CEREBRAS_TIMEOUT)
+    weather_service.client = create_http_client(weather_service.base_url, settings.OPENWEATHER_TIMEOUT)
+    
+    warm_up_task = asyncio.create_task(warm_up()) if settings.STARTUP_WARM_UP else None
+    job_queue.start()
+    
+    yield
+    
+    if warm_up_task is not None:
+        warm_up_task.cancel()
+    await job_queue.stop()
+    await image_generator.aclose()
+    await cerebras_service.aclose()
+    await weather_service.aclose()
+    gemini_service.close()
+    image_pipeline.close()
 
 # Create FastAPI application
 app = FastAPI(
@@ -17,10 +68,28 @@ app = FastAPI(
     description="AI-powered agricultural assistant with plant disease detection, smart chat, and weather analysis",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
+# Cap multipart upload bodies while they stream in
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=settings.MAX_UPLOAD_BYTES)
+
+# Per-client token bucket rate limiting
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        capacity=settings.RATE_LIMIT_REQUESTS,
+        period=settings.RATE_LIMIT_PERIOD,
+        route_costs=settings.RATE_LIMIT_ROUTE_COSTS,
+        default_cost=settings.RATE_LIMIT_DEFAULT_COST,
+        api_keys=settings.RATE_LIMIT_API_KEYS,
+        trusted_proxies=settings.RATE_LIMIT_TRUSTED_PROXIES,
+        backend=create_bucket_backend(settings.RATE_LIMIT_BACKEND, settings.RATE_LIMIT_REDIS_URL)
+    )
+
 # CORS Configuration for Vercel frontend
+# Added last so it wraps everything and 413/429 responses carry CORS headers too
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Configure specific origins in production
@@ -32,9 +101,21 @@ app.add_middleware(
 # Request timing middleware
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
+    http_in_flight.inc()
+    start_time = time.perf_counter()
+    status = "500"
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+    finally:
+        process_time = time.perf_counter() - start_time
+        http_in_flight.dec()
+        # Label by route template so path parameters don't explode cardinality
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        http_requests.inc(path, request.method, status)
+        http_request_duration.observe(process_time, path, request.method, status)
+    
     response.headers["X-Process-Time"] = str(process_time)
     return response
 
@@ -55,6 +136,9 @@ app.include_router(health_router)
 app.include_router(chat_router)
 app.include_router(future_router)
 app.include_router(soil_weather_router)
+app.include_router(jobs_router)
+app.include_router(images_router)
+app.include_router(metrics_router)
 
 # Root endpoint
 @app.get("/")
@@ -67,9 +151,14 @@ async def root():
         "endpoints": {
             "health_analysis": "/api/analyze-health",
             "plant_chat": "/api/chat-with-plant",
+            "plant_chat_sessions": "/api/chat-sessions",
             "future_generation": "/api/generate-future",
+            "future_image_jobs": "/api/generate-future-image",
+            "images": "/api/images/{image_id}",
             "soil_weather": "/api/soil-weather",
-            "weather_only": "/api/weather"
+            "weather_only": "/api/weather",
+            "weather_bulk": "/api/weather/bulk",
+            "metrics": "/metrics"
         }
     }
 
@@ -0,0 +1,3 @@
+"""Middleware package"""
+from .upload_limit import UploadSizeLimitMiddleware
+from .rate_limit import RateLimitMiddleware, create_bucket_backend, charge_extra
@@ -0,0 +1,251 @@
+"""
+Rate Limit Middleware
+Token bucket per client (API key or IP) with per-route costs
+"""
+
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class MemoryBucketBackend:
+    """
+    Buckets held in this process - fine for a single worker
+    Bounded LRU so a flood of distinct clients cannot grow memory without limit
+    """
+    
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+    
+    async def consume(self, key: str, cost: float, capacity: float, refill_rate: float) -> Tuple[bool, float, float]:
+        """
+        Take cost tokens from the key's bucket; a negative cost refunds them
+        Returns (allowed, tokens remaining, seconds until cost would be available)
+        """
+        
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [capacity, now]
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * refill_rate)
+            bucket[1] = now
+        
+        if bucket[0] >= cost:
+            bucket[0] = min(capacity, bucket[0] - cost)
+            return True, bucket[0], 0.0
+        
+        return False, bucket[0], (cost - bucket[0]) / refill_rate
+
+
+class RedisBucketBackend:
+    """
+    Buckets shared by every worker through Redis (pip install redis)
+    The refill-and-take step runs as one Lua script, so it stays atomic
+    """
+    
+    _SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local now = tonumber(ARGV[4])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    if tokens >= cost then
+        tokens = math.min(capacity, tokens - cost)
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return {allowed, tostring(tokens)}
+    """
+    
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the redis package (pip install redis)")
+        
+        self._redis = redis.from_url(url)
+        self._script = self._redis.register_script(self._SCRIPT)
+        self.prefix = prefix
+    
+    async def consume(self, key: str, cost: float, capacity: float, refill_rate: float) -> Tuple[bool, float, float]:
+        allowed, tokens = await self._script(
+            keys=[self.prefix + key],
+            args=[capacity, refill_rate, cost, time.time()]
+        )
+        tokens = float(tokens)
+        if allowed:
+            return True, tokens, 0.0
+        return False, tokens, (cost - tokens) / refill_rate
+
+
+def _too_many_requests(remaining: float, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        content={
+            "error": "Too many requests",
+            "detail": f"Rate limit exceeded. Try again in {math.ceil(retry_after)} seconds.",
+            "code": "RATE_LIMITED"
+        },
+        headers={
+            "Retry-After": str(math.ceil(retry_after)),
+            "X-RateLimit-Remaining": str(int(remaining))
+        }
+    )
+
+
+async def charge_extra(request: Request, cost: float) -> Optional[JSONResponse]:
+    """
+    Take more tokens from the caller's bucket for work the route's flat cost does not cover
+    Returns the error response if the bucket cannot pay (the route's own cost is refunded),
+    None otherwise (or if rate limiting is off)
+    """
+    
+    charge = request.scope.get("state", {}).get("rate_limit_charge")
+    if charge is None or cost <= 0:
+        return None
+    return await charge(cost)
+
+
+def create_bucket_backend(backend: str, redis_url: str = ""):
+    """Build the configured backend ("memory" or "redis")"""
+    
+    if backend == "redis":
+        return RedisBucketBackend(redis_url)
+    return MemoryBucketBackend()
+
+
+class RateLimitMiddleware:
+    """
+    Enforce RATE_LIMIT_REQUESTS per RATE_LIMIT_PERIOD per client
+    
+    Each client gets a bucket of `capacity` tokens that refills continuously.
+    A request takes its route's cost (vision calls cost more than weather);
+    routes with cost 0 are never limited. Keys ending in "/" are prefixes. Over-limit requests get 429 with
+    Retry-After. One dict lookup and one bucket update per request. Routes whose
+    work scales with the request body charge the rest through charge_extra().
+    
+    Clients are keyed by X-API-Key only if it is one of api_keys. Otherwise by
+    IP: the X-Forwarded-For entry added by the outermost of trusted_proxies,
+    since anything left of it is client-supplied, or the socket address.
+    """
+    
+    def __init__(
+        self,
+        app: ASGIApp,
+        capacity: int,
+        period: int,
+        route_costs: Dict[str, float],
+        default_cost: float = 1,
+        api_keys: Iterable[str] = (),
+        trusted_proxies: int = 1,
+        backend=None
+    ):
+        self.app = app
+        self.capacity = float(capacity)
+        self.refill_rate = capacity / float(period)
+        self.route_costs = route_costs
+        # Keys ending in "/" price every path under that prefix (e.g. /api/jobs/{id})
+        self.prefix_costs = [(path, cost) for path, cost in route_costs.items() if path.endswith("/") and path != "/"]
+        self.default_cost = default_cost
+        self.api_keys = frozenset(api_keys)
+        self.trusted_proxies = max(0, trusted_proxies)
+        self.backend = backend or MemoryBucketBackend()
+    
+    def _cost(self, path: str) -> float:
+        cost = self.route_costs.get(path)
+        if cost is not None:
+            return cost
+        for prefix, prefix_cost in self.prefix_costs:
+            if path.startswith(prefix):
+                return prefix_cost
+        return self.default_cost
+    
+    def _client_key(self, scope: Scope) -> str:
+        headers = dict(scope.get("headers") or [])
+        
+        api_key = headers.get(b"x-api-key")
+        if api_key:
+            api_key = api_key.decode("latin-1")
+            if api_key in self.api_keys:
+                return "key:" + api_key
+        
+        # Each trusted proxy appends the address it saw; earlier entries are spoofable
+        forwarded = headers.get(b"x-forwarded-for")
+        if forwarded and self.trusted_proxies:
+            hops = [hop.strip() for hop in forwarded.decode("latin-1").split(",") if hop.strip()]
+            if len(hops) >= self.trusted_proxies:
+                return "ip:" + hops[-self.trusted_proxies]
+        
+        client = scope.get("client")
+        return "ip:" + (client[0] if client else "unknown")
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        
+        cost = self._cost(scope["path"])
+        if cost <= 0:
+            await self.app(scope, receive, send)
+            return
+        
+        key = self._client_key(scope)
+        allowed, remaining, retry_after = await self.backend.consume(
+            key, cost, self.capacity, self.refill_rate
+        )
+        
+        if not allowed:
+            await _too_many_requests(remaining, retry_after)(scope, receive, send)
+            return
+        
+        # Tokens left, as reported on the response; charge_extra() updates it
+        left = [remaining]
+        
+        async def charge(extra: float) -> Optional[JSONResponse]:
+            if cost + extra > self.capacity:
+                # Waiting would never help, so this is not a 429
+                await self.backend.consume(key, -cost, self.capacity, self.refill_rate)
+                return JSONResponse(
+                    status_code=413,
+                    content={
+                        "error": "Request too large",
+                        "detail": f"This request costs {math.ceil(cost + extra)} rate limit tokens; "
+                                  f"a client may spend at most {int(self.capacity)} per {int(self.capacity / self.refill_rate)} seconds.",
+                        "code": "REQUEST_TOO_COSTLY"
+                    }
+                )
+            
+            allowed, remaining, retry_after = await self.backend.consume(key, extra, self.capacity, self.refill_rate)
+            if not allowed:
+                # Nothing was done, so the route's own cost is not kept either
+                _, left[0], _ = await self.backend.consume(key, -cost, self.capacity, self.refill_rate)
+                return _too_many_requests(left[0], retry_after)
+            left[0] = remaining
+            return None
+        
+        scope.setdefault("state", {})["rate_limit_charge"] = charge
+        
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                if not any(name.lower() == b"x-ratelimit-remaining" for name, _ in headers):
+                    headers.append((b"x-ratelimit-remaining", str(int(left[0])).encode()))
+                message["headers"] = headers
+            await send(message)
+        
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,58 @@
+"""
+Upload Size Limit Middleware
+Caps request bodies for multipart upload routes while they stream in
+"""
+
+from fastapi import HTTPException
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from starlette.responses import JSONResponse
+
+# Room for multipart boundaries and the small form fields next to the file
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject oversized uploads with 413 before they are fully buffered
+    
+    A declared Content-Length over the cap is refused up front. Chunked or
+    undeclared bodies are counted as the multipart parser pulls them, and
+    parsing stops as soon as the cap is crossed.
+    """
+    
+    def __init__(self, app: ASGIApp, max_bytes: int, path_suffix: str = "/upload"):
+        self.app = app
+        self.max_body = max_bytes + FORM_OVERHEAD_BYTES
+        self.path_suffix = path_suffix
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not scope["path"].endswith(self.path_suffix):
+            await self.app(scope, receive, send)
+            return
+        
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_body:
+            response = JSONResponse(
+                status_code=413,
+                content={
+                    "error": "Upload too large",
+                    "detail": f"Maximum upload size is {self.max_body - FORM_OVERHEAD_BYTES} bytes",
+                    "code": "PAYLOAD_TOO_LARGE"
+                }
+            )
+            await response(scope, receive, send)
+            return
+        
+        received = 0
+        
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body:
+                    # Raised inside request.form(), so FastAPI turns it into a 413
+                    raise HTTPException(status_code=413, detail="Upload too large")
+            return message
+        
+        await self.app(scope, limited_receive, send)
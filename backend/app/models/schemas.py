@@ -5,6 +5,7 @@ Pydantic models for API request/response validation
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from enum import Enum
+from ..config import settings
 
 class Language(str, Enum):
     ENGLISH = "en"
@@ -32,6 +33,15 @@ class HealthAnalysisResponse(BaseModel):
     confidence: float
     summary: str
 
+class BatchImage(BaseModel):
+    id: Optional[str] = Field(None, description="Client reference echoed back with the result")
+    image_base64: str = Field(..., description="Base64 encoded plant image")
+
+class BatchHealthAnalysisRequest(BaseModel):
+    images: List[BatchImage] = Field(..., min_length=1, description="Leaf photos from one field")
+    plant_type: Optional[str] = Field(None, description="Type of plant if known")
+    language: Language = Field(Language.ENGLISH, description="Response language")
+
 # ============ Plant Chat ============
 
 class ChatMessage(BaseModel):
@@ -51,6 +61,27 @@ class PlantChatResponse(BaseModel):
     emotion: str = Field(..., description="happy, sad, worried, grateful, grumpy")
     tip: Optional[str] = None
 
+class ChatSessionSeedMessage(ChatMessage):
+    content: str = Field(..., max_length=settings.CHAT_SESSION_MAX_MESSAGE_CHARS)
+
+class ChatSessionCreateRequest(BaseModel):
+    plant_type: str = Field(..., description="Type of plant")
+    health_status: str = Field(..., description="Current health status")
+    diseases: List[str] = Field(default=[], description="List of detected diseases")
+    conversation_history: List[ChatSessionSeedMessage] = Field(
+        default=[],
+        max_length=settings.CHAT_SESSION_MAX_TURNS,
+        description="Earlier messages to seed the session with"
+    )
+    language: Language = Field(Language.ENGLISH, description="Response language")
+
+class ChatSessionResponse(BaseModel):
+    session_id: str
+    idle_ttl: int = Field(..., description="Seconds of inactivity before the session expires")
+
+class ChatSessionMessageRequest(BaseModel):
+    message: str = Field(..., max_length=settings.CHAT_SESSION_MAX_MESSAGE_CHARS, description="User message to the plant")
+
 # ============ Future Generation ============
 
 class FutureGenerationRequest(BaseModel):
@@ -61,11 +92,30 @@ class FutureGenerationRequest(BaseModel):
     language: Language = Field(Language.ENGLISH, description="Response language")
 
 class FutureGenerationResponse(BaseModel):
-    original_image: str
-    future_image: str
+    original_image_id: str = Field(..., description="Content hash of the uploaded image")
+    original_image_url: str = Field(..., description="GET to download; skip if you already hold the upload")
+    future_image_id: str
+    future_image_url: str
     description: str
+    description_days: int = Field(..., description="Days the description looks ahead: days_ahead snapped to the nearest FUTURE_DAYS_BUCKETS value")
     probability: float
 
+class JobSubmittedResponse(BaseModel):
+    job_id: str
+    status: str
+    status_url: str = Field(..., description="Poll for the job's status and result")
+    events_url: str = Field(..., description="Server-Sent Events stream of status changes")
+
+class JobStatusResponse(BaseModel):
+    id: str
+    kind: str
+    status: str = Field(..., description="queued, running, succeeded or failed")
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+
 # ============ Soil & Weather ============
 
 class SoilWeatherRequest(BaseModel):
@@ -96,6 +146,32 @@ class SoilWeatherResponse(BaseModel):
     farming_advice: List[str]
     alerts: List[str]
 
+class PlotLocation(BaseModel):
+    id: Optional[str] = Field(None, description="Client plot reference echoed back")
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+
+class BulkWeatherRequest(BaseModel):
+    plots: List[PlotLocation] = Field(..., min_length=1, description="Registered plots")
+    days: int = Field(5, ge=1, le=5, description="Forecast days")
+    language: Language = Field(Language.ENGLISH, description="Response language")
+
+class PlotWeather(BaseModel):
+    id: Optional[str]
+    latitude: float
+    longitude: float
+    cell: str
+    current: dict
+    forecast: List[dict]
+    advice: List[str]
+    alerts: List[str]
+    farming_score: int
+    daily: List[dict] = Field(default=[], description="Advice and score per forecast day")
+
+class BulkWeatherResponse(BaseModel):
+    plots: List[PlotWeather]
+    cells: int
+
 # ============ Generic ============
 
 class ErrorResponse(BaseModel):
@@ -3,3 +3,6 @@ from .health import router as health_router
 from .chat import router as chat_router
 from .future import router as future_router
 from .soil_weather import router as soil_weather_router
+from .metrics import router as metrics_router
+from .jobs import router as jobs_router
+from .images import router as images_router
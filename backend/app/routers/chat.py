@@ -4,11 +4,29 @@ Endpoint for conversational AI with plant persona using Cerebras
 """
 
 from fastapi import APIRouter, HTTPException
-from ..models.schemas import PlantChatRequest, PlantChatResponse
+from ..models.schemas import (
+    PlantChatRequest, PlantChatResponse,
+    ChatSessionCreateRequest, ChatSessionResponse, ChatSessionMessageRequest
+)
 from ..services.cerebras_service import cerebras_service
+from ..services.chat_sessions import chat_sessions, ChatSession
+from .streaming import sse_event, sse_response
 
 router = APIRouter(prefix="/api", tags=["Plant Chat"])
 
+ERROR_MESSAGES = {
+    "en": "I'm having trouble thinking right now. Please try again!",
+    "hi": "मुझे अभी सोचने में परेशानी हो रही है। कृपया फिर से कोशिश करें!",
+    "te": "నాకు ఇప్పుడు ఆలోచించడంలో సమస్య ఉంది. దయచేసి మళ్ళీ ప్రయత్నించండి!"
+}
+
+def _error_response(language: str) -> PlantChatResponse:
+    return PlantChatResponse(
+        response=ERROR_MESSAGES.get(language, ERROR_MESSAGES["en"]),
+        emotion="worried",
+        tip=None
+    )
+
 @router.post("/chat-with-plant", response_model=PlantChatResponse)
 async def chat_with_plant(request: PlantChatRequest):
     """
@@ -44,14 +62,128 @@ async def chat_with_plant(request: PlantChatRequest):
         
     except Exception as e:
         # Return a friendly error response
-        error_messages = {
-            "en": "I'm having trouble thinking right now. Please try again!",
-            "hi": "मुझे अभी सोचने में परेशानी हो रही है। कृपया फिर से कोशिश करें!",
-            "te": "నాకు ఇప్పుడు ఆలోచించడంలో సమస్య ఉంది. దయచేసి మళ్ళీ ప్రయత్నించండి!"
-        }
-        
-        return PlantChatResponse(
-            response=error_messages.get(request.language.value, error_messages["en"]),
-            emotion="worried",
-            tip=None
+        return _error_response(request.language.value)
+
+@router.post("/chat-with-plant/stream")
+async def chat_with_plant_stream(request: PlantChatRequest):
+    """
+    Streaming variant of /chat-with-plant over Server-Sent Events
+    
+    - "delta" events carry text as Cerebras generates it
+    - A final "done" event carries the full response, emotion and tip
+    - Same persona and fallbacks as /chat-with-plant
+    """
+    
+    history = [
+        {"role": msg.role, "content": msg.content}
+        for msg in request.conversation_history
+    ]
+    
+    async def event_stream():
+        async for event, data in cerebras_service.generate_plant_response_stream(
+            user_message=request.message,
+            plant_type=request.plant_type,
+            health_status=request.health_status,
+            diseases=request.diseases,
+            conversation_history=history,
+            language=request.language.value
+        ):
+            yield sse_event(event, data)
+    
+    return sse_response(event_stream())
+
+@router.post("/chat-sessions", response_model=ChatSessionResponse, status_code=201)
+async def create_chat_session(request: ChatSessionCreateRequest):
+    """
+    Start a server-side chat session
+    
+    - The plant persona is compiled once and kept with the session
+    - Send turns to /chat-sessions/{session_id}/messages with just the new message
+    - Sessions expire after CHAT_SESSION_IDLE_TTL seconds without a message
+    """
+    
+    session = chat_sessions.create(
+        plant_type=request.plant_type,
+        health_status=request.health_status,
+        diseases=request.diseases,
+        language=request.language.value,
+        history=[{"role": msg.role, "content": msg.content} for msg in request.conversation_history]
+    )
+    return ChatSessionResponse(session_id=session.id, idle_ttl=chat_sessions.idle_ttl)
+
+@router.delete("/chat-sessions/{session_id}", status_code=204)
+async def delete_chat_session(session_id: str):
+    """End a chat session and free its memory"""
+    
+    if not chat_sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail="Chat session not found or expired")
+
+def _get_session(session_id: str) -> ChatSession:
+    session = chat_sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Chat session not found or expired")
+    return session
+
+@router.post("/chat-sessions/{session_id}/messages", response_model=PlantChatResponse)
+async def send_session_message(session_id: str, request: ChatSessionMessageRequest):
+    """
+    Chat with your plant within a session
+    
+    - Same response as /chat-with-plant; history and persona come from the session
+    - 404 once the session has expired; start a new one
+    """
+    
+    session = _get_session(session_id)
+    
+    try:
+        result = await cerebras_service.generate_plant_response(
+            user_message=request.message,
+            plant_type=session.plant_type,
+            health_status=session.health_status,
+            diseases=session.diseases,
+            conversation_history=session.history(),
+            language=session.language,
+            system_prompt=session.system_prompt,
+            conversation=session.id,
+            offset=session.dropped
         )
+    except Exception as e:
+        return _error_response(session.language)
+    
+    # Fallback replies are not part of the conversation
+    if "error" not in result:
+        chat_sessions.add_turns(session, [("user", request.message), ("assistant", result["response"])])
+    
+    return PlantChatResponse(
+        response=result.get("response", "..."),
+        emotion=result.get("emotion", "neutral"),
+        tip=result.get("tip")
+    )
+
+@router.post("/chat-sessions/{session_id}/messages/stream")
+async def send_session_message_stream(session_id: str, request: ChatSessionMessageRequest):
+    """
+    Streaming variant of /chat-sessions/{session_id}/messages over Server-Sent Events
+    
+    - Same events as /chat-with-plant/stream
+    """
+    
+    session = _get_session(session_id)
+    
+    async def event_stream():
+        async for event, data in cerebras_service.generate_plant_response_stream(
+            user_message=request.message,
+            plant_type=session.plant_type,
+            health_status=session.health_status,
+            diseases=session.diseases,
+            conversation_history=session.history(),
+            language=session.language,
+            system_prompt=session.system_prompt,
+            conversation=session.id,
+            offset=session.dropped
+        ):
+            if event == "done" and "error" not in data:
+                chat_sessions.add_turns(session, [("user", request.message), ("assistant", data["response"])])
+            yield sse_event(event, data)
+    
+    return sse_response(event_stream())
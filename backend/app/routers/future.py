@@ -3,53 +3,77 @@ Future Generation Router
 Endpoint for generating future plant visualizations
 """
 
-from fastapi import APIRouter, HTTPException
-from ..models.schemas import FutureGenerationRequest, FutureGenerationResponse
-from ..services.gemini_service import gemini_service
+import asyncio
+from fastapi import APIRouter, HTTPException, File, Form, UploadFile
+from ..models.schemas import FutureGenerationRequest, FutureGenerationResponse, JobSubmittedResponse, Language
+from ..services.blob_store import image_store, sniff_image_type
+from ..services.gemini_service import gemini_service, bucket_days
+from ..services.image_generation import image_generator
+from ..services.jobs import job_queue, QueueFullError
+from .uploads import read_upload
 import base64
+import binascii
 
 router = APIRouter(prefix="/api", tags=["Future Generation"])
 
-@router.post("/generate-future", response_model=FutureGenerationResponse)
-async def generate_future(request: FutureGenerationRequest):
-    """
-    Generate future visualization of plant based on treatment scenario
+def _image_url(image_id: str) -> str:
+    return f"/api/images/{image_id}"
+
+def _decode_image(image_base64: str) -> bytes:
+    """Decode a base64 image or data URL; 400 if it is not valid base64"""
     
-    For now, this uses Gemini to generate a description of the future state.
-    In production, integrate with Hugging Face Instruct-Pix2Pix or similar
-    for actual image generation.
+    if "," in image_base64:
+        image_base64 = image_base64.split(",")[1]
+    try:
+        return base64.b64decode(image_base64, validate=True)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="image_base64 is not valid base64")
+
+def _image_type(image_bytes: bytes) -> str:
+    """Sniffed content type of an upload; 400 unless it is JPEG, PNG, WebP or GIF"""
     
-    - scenario: "treated" or "untreated"
-    - Returns description and probability
-    """
+    content_type = sniff_image_type(image_bytes)
+    if content_type is None:
+        raise HTTPException(status_code=400, detail="Image must be JPEG, PNG, WebP or GIF")
+    return content_type
+
+def _scenario_probability(scenario: str) -> float:
+    """Calculate probability based on scenario"""
+    if scenario == "treated":
+        return 0.85  # 85% chance of recovery with treatment
+    return 0.70  # 70% chance of worsening without treatment
+
+async def _run_future_generation(
+    scenario: str,
+    disease: str,
+    days_ahead: int,
+    language: str,
+    image_bytes: bytes
+) -> FutureGenerationResponse:
+    """Shared by the JSON and multipart endpoints"""
+    
+    # The response references the upload by ID instead of echoing it back
+    original_id = image_store.put(image_bytes, _image_type(image_bytes))
     
     try:
-        # Clean base64 string
-        image_data = request.image_base64
-        if "," in image_data:
-            image_data = image_data.split(",")[1]
-        
         # Generate future description using Gemini
         description = await gemini_service.generate_future_description(
-            disease=request.disease,
-            scenario=request.scenario,
-            days_ahead=request.days_ahead,
-            language=request.language.value
+            disease=disease,
+            scenario=scenario,
+            days_ahead=days_ahead,
+            language=language
         )
         
-        # Calculate probability based on scenario
-        if request.scenario == "treated":
-            probability = 0.85  # 85% chance of recovery with treatment
-        else:
-            probability = 0.70  # 70% chance of worsening without treatment
-        
         # For now, return original image as placeholder
         # In production, this would be the generated future image
         return FutureGenerationResponse(
-            original_image=request.image_base64,
-            future_image=request.image_base64,  # Placeholder
+            original_image_id=original_id,
+            original_image_url=_image_url(original_id),
+            future_image_id=original_id,  # Placeholder
+            future_image_url=_image_url(original_id),
             description=description,
-            probability=probability
+            description_days=bucket_days(days_ahead),
+            probability=_scenario_probability(scenario)
         )
         
     except Exception as e:
@@ -58,54 +82,112 @@ async def generate_future(request: FutureGenerationRequest):
             detail=f"Future generation failed: {str(e)}"
         )
 
-@router.post("/generate-future-image")
-async def generate_future_image(request: FutureGenerationRequest):
+@router.post("/generate-future", response_model=FutureGenerationResponse)
+async def generate_future(request: FutureGenerationRequest):
     """
-    Advanced endpoint for actual image generation using Hugging Face
+    Generate future visualization of plant based on treatment scenario
     
-    This is a placeholder for Hugging Face Instruct-Pix2Pix integration.
-    The actual implementation would:
-    1. Send original image to HuggingFace API
-    2. Use prompts like "make leaves look diseased and brown" or "make plant healthy and green"
-    3. Return the modified image
-    """
+    For now, this uses Gemini to generate a description of the future state.
+    In production, integrate with Hugging Face Instruct-Pix2Pix or similar
+    for actual image generation.
     
-    # Hugging Face integration placeholder
-    # In production, uncomment and configure:
+    - scenario: "treated" or "untreated"
+    - Returns description, probability and image IDs/URLs (see /api/images/{id})
+    """
     
+    return await _run_future_generation(
+        scenario=request.scenario,
+        disease=request.disease,
+        days_ahead=request.days_ahead,
+        language=request.language.value,
+        image_bytes=_decode_image(request.image_base64)
+    )
+
+@router.post("/generate-future/upload", response_model=FutureGenerationResponse)
+async def generate_future_upload(
+    image: UploadFile = File(..., description="Plant photo"),
+    scenario: str = Form(..., description="treated or untreated"),
+    disease: str = Form(..., description="The disease to show progression for"),
+    days_ahead: int = Form(14, description="Days into future"),
+    language: Language = Form(Language.ENGLISH, description="Response language")
+):
     """
-    import httpx
+    Multipart variant of /generate-future
     
-    HF_API_URL = "https://api-inference.huggingface.co/models/timbrooks/instruct-pix2pix"
-    HF_TOKEN = settings.HUGGINGFACE_API_KEY
+    - Sends the photo as binary form data instead of base64 JSON
+    - Same response as /generate-future
+    """
     
-    if request.scenario == "untreated":
-        prompt = f"make the leaves look diseased, brown spots, wilting, {request.disease} progression"
-    else:
-        prompt = "make the plant look healthy, vibrant green leaves, recovered"
+    image_bytes = await read_upload(image)
+    return await _run_future_generation(
+        scenario=scenario,
+        disease=disease,
+        days_ahead=days_ahead,
+        language=language.value,
+        image_bytes=image_bytes
+    )
+
+async def _future_image_job(payload: dict) -> dict:
+    """Job handler: generate the future image and its description together"""
     
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.post(
-            HF_API_URL,
-            headers={"Authorization": f"Bearer {HF_TOKEN}"},
-            json={
-                "inputs": {
-                    "image": request.image_base64,
-                    "prompt": prompt
-                }
-            }
+    image_data = payload["image"]
+    future_image, description = await asyncio.gather(
+        image_generator.generate(
+            image_data,
+            scenario=payload["scenario"],
+            disease=payload["disease"],
+            days_ahead=payload["days_ahead"]
+        ),
+        gemini_service.generate_future_description(
+            disease=payload["disease"],
+            scenario=payload["scenario"],
+            days_ahead=payload["days_ahead"],
+            language=payload["language"]
         )
-        
-        if response.status_code == 200:
-            return {"future_image": base64.b64encode(response.content).decode()}
-    """
+    )
     
+    content_type = sniff_image_type(future_image)
+    if content_type is None:
+        raise Exception(f"{image_generator.name} generator returned an unsupported image format")
+    future_id = image_store.put(future_image, content_type)
     return {
-        "message": "Image generation feature coming soon!",
-        "description": await gemini_service.generate_future_description(
-            disease=request.disease,
-            scenario=request.scenario,
-            days_ahead=request.days_ahead,
-            language=request.language.value
-        )
+        "future_image_id": future_id,
+        "future_image_url": _image_url(future_id),
+        "description": description,
+        "description_days": bucket_days(payload["days_ahead"]),
+        "probability": _scenario_probability(payload["scenario"]),
+        "generator": image_generator.name
     }
+
+job_queue.register("future_image", _future_image_job)
+
+@router.post("/generate-future-image", response_model=JobSubmittedResponse, status_code=202)
+async def generate_future_image(request: FutureGenerationRequest):
+    """
+    Queue generation of an actual future image
+    
+    - Returns a job ID immediately; generation runs on the background worker pool
+    - Poll /api/jobs/{job_id} or subscribe to /api/jobs/{job_id}/events (SSE)
+    - Uses Hugging Face Instruct-Pix2Pix when configured, otherwise a local stub
+    """
+    
+    image_data = _decode_image(request.image_base64)
+    _image_type(image_data)
+    
+    try:
+        job = job_queue.submit("future_image", {
+            "image": image_data,
+            "scenario": request.scenario,
+            "disease": request.disease,
+            "days_ahead": request.days_ahead,
+            "language": request.language.value
+        })
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    return JobSubmittedResponse(
+        job_id=job.id,
+        status=job.status,
+        status_url=f"/api/jobs/{job.id}",
+        events_url=f"/api/jobs/{job.id}/events"
+    )
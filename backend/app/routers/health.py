@@ -3,33 +3,51 @@ Health Analysis Router
 Endpoint for plant disease detection using Gemini Vision
 """
 
-from fastapi import APIRouter, HTTPException
-from ..models.schemas import HealthAnalysisRequest, HealthAnalysisResponse, Disease
+import asyncio
+import json
+from collections import Counter
+from fastapi import APIRouter, HTTPException, File, Form, Request, UploadFile
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from ..config import settings
+from ..middleware import charge_extra
+from ..models.schemas import (
+    HealthAnalysisRequest,
+    HealthAnalysisResponse,
+    Disease,
+    Language,
+    BatchHealthAnalysisRequest
+)
 from ..services.gemini_service import gemini_service
+from ..services.weather_service import weather_service
+from ..services.image_pipeline import image_pipeline
+from ..services.resilience import breaker_stats
+from ..services.llm_router import llm_router
+from ..services.translation import translator
+from ..services.jobs import job_queue
+from ..services.blob_store import image_store
+from ..services.chat_sessions import chat_sessions
+from ..services.chat_context import chat_context
+from ..services.answer_cache import answer_cache
+from .uploads import read_upload
 
 router = APIRouter(prefix="/api", tags=["Health Analysis"])
 
-@router.post("/analyze-health", response_model=HealthAnalysisResponse)
-async def analyze_plant_health(request: HealthAnalysisRequest):
-    """
-    Analyze plant health from an uploaded image
-    
-    - Uses Gemini 2.0 Flash Vision for accurate disease detection
-    - Supports multiple languages (en, hi, te)
-    - Returns disease list, confidence scores, and recommendations
-    """
+async def _run_health_analysis(
+    plant_type: Optional[str],
+    language: str,
+    image_base64: Optional[str] = None,
+    image_bytes: Optional[bytes] = None
+) -> HealthAnalysisResponse:
+    """Shared by the JSON and multipart endpoints"""
     
     try:
-        # Clean base64 string if it has data URL prefix
-        image_data = request.image_base64
-        if "," in image_data:
-            image_data = image_data.split(",")[1]
-        
         # Call Gemini service
         result = await gemini_service.analyze_plant_health(
-            image_base64=image_data,
-            plant_type=request.plant_type,
-            language=request.language.value
+            image_base64=image_base64,
+            plant_type=plant_type,
+            language=language,
+            image_bytes=image_bytes
         )
         
         # Parse diseases into proper format
@@ -43,7 +61,7 @@ async def analyze_plant_health(request: HealthAnalysisRequest):
             ))
         
         return HealthAnalysisResponse(
-            plant_type=result.get("plant_type", request.plant_type or "Unknown"),
+            plant_type=result.get("plant_type", plant_type or "Unknown"),
             health_status=result.get("health_status", "unknown"),
             diseases=diseases,
             recommendations=result.get("recommendations", []),
@@ -57,7 +75,163 @@ async def analyze_plant_health(request: HealthAnalysisRequest):
             detail=f"Health analysis failed: {str(e)}"
         )
 
+@router.post("/analyze-health", response_model=HealthAnalysisResponse)
+async def analyze_plant_health(request: HealthAnalysisRequest):
+    """
+    Analyze plant health from an uploaded image
+    
+    - Uses Gemini 2.0 Flash Vision for accurate disease detection
+    - Supports multiple languages (en, hi, te)
+    - Returns disease list, confidence scores, and recommendations
+    """
+    
+    # Clean base64 string if it has data URL prefix
+    image_data = request.image_base64
+    if "," in image_data:
+        image_data = image_data.split(",")[1]
+    
+    return await _run_health_analysis(
+        plant_type=request.plant_type,
+        language=request.language.value,
+        image_base64=image_data
+    )
+
+@router.post("/analyze-health/upload", response_model=HealthAnalysisResponse)
+async def analyze_plant_health_upload(
+    image: UploadFile = File(..., description="Plant photo"),
+    plant_type: Optional[str] = Form(None, description="Type of plant if known"),
+    language: Language = Form(Language.ENGLISH, description="Response language")
+):
+    """
+    Multipart variant of /analyze-health
+    
+    - Sends the photo as binary form data instead of base64 JSON (~33% smaller)
+    - Same analysis and response as /analyze-health
+    """
+    
+    image_bytes = await read_upload(image)
+    return await _run_health_analysis(
+        plant_type=plant_type,
+        language=language.value,
+        image_bytes=image_bytes
+    )
+
+@router.post("/analyze-health/batch")
+async def analyze_plant_health_batch(request: BatchHealthAnalysisRequest, http_request: Request):
+    """
+    Analyze many leaf photos from one field in a single request
+    
+    - Images are analyzed concurrently, up to BATCH_MAX_CONCURRENCY at a time
+    - Streams NDJSON: one "result" line per image as it finishes (in completion order),
+      then one "summary" line with disease frequencies across the field
+    - A failed image yields an "error" line; the rest of the batch continues
+    - Rate limited like one /api/analyze-health call per image, charged before any analysis;
+      a batch costing more than a whole rate limit bucket gets 413
+    """
+    
+    if len(request.images) > settings.BATCH_MAX_IMAGES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many images: {len(request.images)} (max {settings.BATCH_MAX_IMAGES})"
+        )
+    
+    costs = settings.RATE_LIMIT_ROUTE_COSTS
+    extra = costs["/api/analyze-health"] * len(request.images) - costs["/api/analyze-health/batch"]
+    rejected = await charge_extra(http_request, extra)
+    if rejected is not None:
+        return rejected
+    
+    semaphore = asyncio.Semaphore(max(1, settings.BATCH_MAX_CONCURRENCY))
+    language = request.language.value
+    
+    async def analyze_one(index: int, image_base64: str):
+        async with semaphore:
+            if "," in image_base64:
+                image_base64 = image_base64.split(",")[1]
+            try:
+                result = await _run_health_analysis(
+                    plant_type=request.plant_type,
+                    language=language,
+                    image_base64=image_base64
+                )
+                return index, result, None
+            except HTTPException as e:
+                return index, None, e.detail
+            except Exception as e:
+                return index, None, str(e)
+    
+    async def result_stream():
+        tasks = [
+            asyncio.ensure_future(analyze_one(index, image.image_base64))
+            for index, image in enumerate(request.images)
+        ]
+        status_counts = Counter()
+        disease_counts = Counter()
+        disease_images = {}
+        failed = 0
+        
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, result, error = await next_done
+                image_id = request.images[index].id
+                
+                if error is not None:
+                    failed += 1
+                    line = {"type": "result", "index": index, "id": image_id, "status": "error", "error": error}
+                else:
+                    status_counts[result.health_status] += 1
+                    # Count each disease once per image
+                    for name in {d.name.strip().lower() for d in result.diseases if d.name}:
+                        disease_counts[name] += 1
+                        disease_images.setdefault(name, []).append(image_id if image_id is not None else index)
+                    line = {"type": "result", "index": index, "id": image_id, "status": "ok", "result": result.model_dump()}
+                
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+            
+            analyzed = len(tasks) - failed
+            summary = {
+                "type": "summary",
+                "total": len(tasks),
+                "analyzed": analyzed,
+                "failed": failed,
+                "health_status_counts": dict(status_counts),
+                "diseases": [
+                    {
+                        "name": name,
+                        "count": count,
+                        "share": round(count / analyzed, 4) if analyzed else 0.0,
+                        "images": disease_images[name]
+                    }
+                    for name, count in disease_counts.most_common()
+                ]
+            }
+            yield json.dumps(summary, ensure_ascii=False) + "\n"
+            
+        finally:
+            # Client went away or the stream ended early - stop outstanding work
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+
 @router.get("/health-check")
 async def health_check():
-    """Simple health check endpoint"""
-    return {"status": "healthy", "service": "CropMagix API"}
+    """Simple health check endpoint with cache and circuit breaker statistics"""
+    return {
+        "status": "healthy",
+        "service": "CropMagix API",
+        "caches": {
+            "weather": weather_service.cache_stats(),
+            "health_analysis": gemini_service.health_cache.stats() if gemini_service.health_cache else None
+        },
+        "image_pipeline": image_pipeline.stats(),
+        "circuit_breakers": breaker_stats(),
+        "llm_router": llm_router.stats(),
+        "translations": translator.stats(),
+        "jobs": job_queue.stats(),
+        "image_store": image_store.stats(),
+        "chat_sessions": chat_sessions.stats(),
+        "chat_context": chat_context.stats(),
+        "chat_answer_cache": answer_cache.stats(),
+        "future_description_cache": gemini_service.future_cache_stats()
+    }
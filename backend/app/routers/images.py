@@ -0,0 +1,42 @@
+"""
+Images Router
+Serves stored images by content ID with HTTP caching headers
+"""
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from ..config import settings
+from ..services.blob_store import image_store
+
+router = APIRouter(prefix="/api", tags=["Images"])
+
+@router.get("/images/{image_id}")
+async def get_image(image_id: str, request: Request):
+    """
+    Download a stored image
+    
+    - image_id is the content hash, so a matching If-None-Match ETag gets 304 without a lookup
+    - Images expire IMAGE_STORE_TTL seconds after they were last stored
+    """
+    
+    headers = {
+        "ETag": f'"{image_id}"',
+        "Cache-Control": f"private, max-age={settings.IMAGE_CACHE_MAX_AGE}, immutable",
+        # Stored types are sniffed images; never let a browser reinterpret or run them
+        "X-Content-Type-Options": "nosniff",
+        "Content-Security-Policy": "default-src 'none'",
+        "Content-Disposition": "inline"
+    }
+    
+    if_none_match = request.headers.get("if-none-match", "").strip()
+    if headers["ETag"] in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    
+    blob = image_store.get(image_id)
+    if blob is None:
+        raise HTTPException(status_code=404, detail="Image not found or expired")
+    
+    # "*" only matches a representation that exists (RFC 9110)
+    if if_none_match == "*":
+        return Response(status_code=304, headers=headers)
+    
+    return Response(content=blob.data, media_type=blob.content_type, headers=headers)
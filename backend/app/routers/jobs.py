@@ -0,0 +1,43 @@
+"""
+Jobs Router
+Status polling and Server-Sent Events for background jobs
+"""
+
+from fastapi import APIRouter, HTTPException
+from ..models.schemas import JobStatusResponse
+from ..services.jobs import job_queue
+from .streaming import sse_event, sse_response
+
+router = APIRouter(prefix="/api", tags=["Jobs"])
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str):
+    """
+    Current status of a background job
+    
+    - status is queued, running, succeeded or failed
+    - result is set once the job succeeded; finished jobs expire after JOB_RESULT_TTL
+    """
+    
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return JobStatusResponse(**job.to_dict())
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """
+    Server-Sent Events stream of a job's status
+    
+    - One event named after the status is sent now and on every change
+    - The stream ends after the "succeeded" or "failed" event
+    """
+    
+    if job_queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    
+    async def event_stream():
+        async for state in job_queue.events(job_id):
+            yield sse_event(state["status"], state)
+    
+    return sse_response(event_stream())
@@ -0,0 +1,46 @@
+"""
+Metrics Router
+Prometheus scrape endpoint
+"""
+
+from typing import Dict, Tuple
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse, Response
+
+from ..services.metrics import registry
+from ..services.answer_cache import answer_cache
+from ..services.gemini_service import gemini_service
+from ..services.weather_service import weather_service
+from ..services.resilience import policies, OPEN
+
+router = APIRouter(tags=["Monitoring"])
+
+
+def _cache_stats() -> Dict[str, dict]:
+    caches = {"weather": weather_service.cache_stats(), "chat_answers": answer_cache.stats()}
+    if gemini_service.health_cache is not None:
+        caches["health_analysis"] = gemini_service.health_cache.stats()
+    caches["future_description"] = gemini_service.future_cache_stats()
+    return caches
+
+
+def _cache_field(field: str):
+    def read() -> Dict[Tuple[str, ...], float]:
+        return {(name,): stats[field] for name, stats in _cache_stats().items()}
+    return read
+
+
+registry.callback_gauge("cropmagix_cache_hits", "Cache hits since startup", ("cache",), _cache_field("hits"))
+registry.callback_gauge("cropmagix_cache_misses", "Cache misses since startup", ("cache",), _cache_field("misses"))
+registry.callback_gauge("cropmagix_cache_hit_ratio", "Cache hits / lookups since startup", ("cache",), _cache_field("hit_ratio"))
+registry.callback_gauge("cropmagix_cache_entries", "Entries currently cached", ("cache",), _cache_field("size"))
+
+registry.callback_gauge(
+    "cropmagix_circuit_breaker_open", "1 while an upstream's circuit breaker is open", ("upstream",),
+    lambda: {(name,): int(policy.breaker.state == OPEN) for name, policy in policies.items()}
+)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text format metrics"""
+    return Response(registry.render(), media_type="text/plain; version=0.0.4")
@@ -3,44 +3,93 @@ Soil & Weather Router
 Endpoint for soil analysis and weather-based recommendations
 """
 
-from fastapi import APIRouter, HTTPException
-from typing import Optional
+import asyncio
+from fastapi import APIRouter, HTTPException, File, Form, UploadFile
+from typing import Optional, Any, Awaitable, Callable, Dict, List
+from ..config import settings
 from ..models.schemas import (
     SoilWeatherRequest, 
     SoilWeatherResponse, 
     SoilAnalysis, 
-    WeatherData
+    WeatherData,
+    BulkWeatherRequest,
+    BulkWeatherResponse,
+    PlotWeather,
+    Language
 )
 from ..services.gemini_service import gemini_service
 from ..services.weather_service import weather_service
+from .uploads import read_upload
 
 router = APIRouter(prefix="/api", tags=["Soil & Weather"])
 
-@router.post("/soil-weather", response_model=SoilWeatherResponse)
-async def analyze_soil_and_weather(request: SoilWeatherRequest):
+async def _with_deadline(
+    awaitable: Awaitable[Any],
+    timeout: float,
+    fallback: Callable[[str], Any]
+) -> Any:
     """
-    Analyze soil from image and combine with weather data
-    
-    - Uses Gemini Vision for soil texture/type analysis
-    - Fetches real-time weather from OpenWeatherMap
-    - Provides hyper-local farming recommendations
-    - Supports multiple languages (en, hi, te)
+    Await one fan-out branch with its own deadline
+    On timeout or error, return fallback(reason) instead of failing the request
     """
     
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        return fallback(f"timed out after {timeout:g}s")
+    except Exception as e:
+        return fallback(str(e))
+
+async def _fetch_weather(latitude: float, longitude: float, days: int = 5):
+    """Fetch current weather and forecast concurrently, each with its own deadline"""
+    
+    return await asyncio.gather(
+        _with_deadline(
+            weather_service.get_current_weather(latitude, longitude),
+            settings.WEATHER_DEADLINE,
+            lambda reason: weather_service._get_mock_weather(latitude, longitude, error=reason)
+        ),
+        _with_deadline(
+            weather_service.get_forecast(latitude, longitude, days=days),
+            settings.WEATHER_DEADLINE,
+            lambda reason: weather_service._get_mock_forecast()
+        )
+    )
+
+async def _run_soil_weather(
+    latitude: float,
+    longitude: float,
+    language: str,
+    image_base64: Optional[str] = None,
+    image_bytes: Optional[bytes] = None
+) -> SoilWeatherResponse:
+    """Shared by the JSON and multipart endpoints"""
+    
     try:
         soil_analysis = None
         
-        # Analyze soil if image provided
-        if request.image_base64:
-            image_data = request.image_base64
-            if "," in image_data:
-                image_data = image_data.split(",")[1]
+        # Soil analysis, current weather and forecast are independent,
+        # so run them together: latency is the slowest branch, not the sum
+        async def analyze_soil():
+            if not image_base64 and not image_bytes:
+                return None
             
-            soil_result = await gemini_service.analyze_soil(
-                image_base64=image_data,
-                language=request.language.value
+            return await _with_deadline(
+                gemini_service.analyze_soil(
+                    image_base64=image_base64,
+                    language=language,
+                    image_bytes=image_bytes
+                ),
+                settings.SOIL_ANALYSIS_DEADLINE,
+                lambda reason: None  # A slow soil analysis still returns weather
             )
-            
+        
+        soil_result, (current_weather, forecast) = await asyncio.gather(
+            analyze_soil(),
+            _fetch_weather(latitude, longitude, days=5)
+        )
+        
+        if soil_result:
             soil_analysis = SoilAnalysis(
                 soil_type=soil_result.get("soil_type", "unknown"),
                 texture=soil_result.get("texture", "unknown"),
@@ -50,19 +99,6 @@ async def analyze_soil_and_weather(request: SoilWeatherRequest):
                 recommendations=soil_result.get("recommendations", [])
             )
         
-        # Get current weather
-        current_weather = await weather_service.get_current_weather(
-            latitude=request.latitude,
-            longitude=request.longitude
-        )
-        
-        # Get forecast
-        forecast = await weather_service.get_forecast(
-            latitude=request.latitude,
-            longitude=request.longitude,
-            days=5
-        )
-        
         # Calculate rain probability from forecast
         rain_probability = 0
         if forecast:
@@ -81,8 +117,8 @@ async def analyze_soil_and_weather(request: SoilWeatherRequest):
         # Get farming advice
         advice_result = weather_service.get_farming_advice(
             weather=current_weather,
-            soil_data=soil_result if request.image_base64 else None,
-            language=request.language.value
+            soil_data=soil_result,
+            language=language
         )
         
         return SoilWeatherResponse(
@@ -98,6 +134,50 @@ async def analyze_soil_and_weather(request: SoilWeatherRequest):
             detail=f"Soil/Weather analysis failed: {str(e)}"
         )
 
+@router.post("/soil-weather", response_model=SoilWeatherResponse)
+async def analyze_soil_and_weather(request: SoilWeatherRequest):
+    """
+    Analyze soil from image and combine with weather data
+    
+    - Uses Gemini Vision for soil texture/type analysis
+    - Fetches real-time weather from OpenWeatherMap
+    - Provides hyper-local farming recommendations
+    - Supports multiple languages (en, hi, te)
+    """
+    
+    image_data = request.image_base64
+    if image_data and "," in image_data:
+        image_data = image_data.split(",")[1]
+    
+    return await _run_soil_weather(
+        latitude=request.latitude,
+        longitude=request.longitude,
+        language=request.language.value,
+        image_base64=image_data
+    )
+
+@router.post("/soil-weather/upload", response_model=SoilWeatherResponse)
+async def analyze_soil_and_weather_upload(
+    latitude: float = Form(..., ge=-90, le=90),
+    longitude: float = Form(..., ge=-180, le=180),
+    language: Language = Form(Language.ENGLISH, description="Response language"),
+    image: Optional[UploadFile] = File(None, description="Soil photo")
+):
+    """
+    Multipart variant of /soil-weather
+    
+    - Sends the soil photo as binary form data instead of base64 JSON
+    - The photo is optional; without it only weather is returned
+    """
+    
+    image_bytes = await read_upload(image) if image is not None else None
+    return await _run_soil_weather(
+        latitude=latitude,
+        longitude=longitude,
+        language=language.value,
+        image_bytes=image_bytes
+    )
+
 @router.get("/weather")
 async def get_weather_only(lat: float, lon: float, language: str = "en"):
     """
@@ -106,16 +186,17 @@ async def get_weather_only(lat: float, lon: float, language: str = "en"):
     """
     
     try:
-        current = await weather_service.get_current_weather(lat, lon)
-        forecast = await weather_service.get_forecast(lat, lon, days=5)
+        current, forecast = await _fetch_weather(lat, lon, days=5)
         advice = weather_service.get_farming_advice(current, language=language)
+        daily = weather_service.get_daily_advice([forecast], language=language)[0]
         
         return {
             "current": current,
             "forecast": forecast,
             "advice": advice.get("advice", []),
             "alerts": advice.get("alerts", []),
-            "farming_score": advice.get("farming_score", 50)
+            "farming_score": advice.get("farming_score", 50),
+            "daily": daily
         }
         
     except Exception as e:
@@ -123,3 +204,74 @@ async def get_weather_only(lat: float, lon: float, language: str = "en"):
             status_code=500,
             detail=f"Weather fetch failed: {str(e)}"
         )
+
+@router.post("/weather/bulk", response_model=BulkWeatherResponse)
+async def get_weather_bulk(request: BulkWeatherRequest):
+    """
+    Weather, advice and farming score for many plots at once
+    
+    - Plots are grouped into weather grid cells; each cell is fetched once
+    - Cells are fetched concurrently, up to BULK_WEATHER_MAX_CONCURRENCY at a time
+    - Advice and scores for all cells and forecast days are evaluated in one batch
+    - Results come back in the same order as the submitted plots
+    """
+    
+    if len(request.plots) > settings.BULK_WEATHER_MAX_PLOTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many plots: {len(request.plots)} (max {settings.BULK_WEATHER_MAX_PLOTS})"
+        )
+    
+    # Neighbouring plots usually share a cell, so this is often far fewer fetches
+    cells: Dict[str, tuple] = {}
+    plot_cells: List[str] = []
+    for plot in request.plots:
+        cell, lat, lon = weather_service.grid_cell(plot.latitude, plot.longitude)
+        cells.setdefault(cell, (lat, lon))
+        plot_cells.append(cell)
+    
+    semaphore = asyncio.Semaphore(max(1, settings.BULK_WEATHER_MAX_CONCURRENCY))
+    language = request.language.value
+    
+    async def fetch_cell(lat: float, lon: float):
+        async with semaphore:
+            return await _fetch_weather(lat, lon, days=request.days)
+    
+    try:
+        fetched = await asyncio.gather(*(fetch_cell(lat, lon) for lat, lon in cells.values()))
+        
+        # One rule evaluation for every cell, and one for every cell's forecast days
+        currents = [current for current, _ in fetched]
+        forecasts = [forecast for _, forecast in fetched]
+        advice = weather_service.get_farming_advice_batch(currents, language=language)
+        daily = weather_service.get_daily_advice(forecasts, language=language)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Bulk weather fetch failed: {str(e)}"
+        )
+    
+    by_cell = {
+        cell: {
+            "current": current,
+            "forecast": forecast,
+            "daily": cell_daily,
+            **cell_advice
+        }
+        for cell, current, forecast, cell_advice, cell_daily
+        in zip(cells.keys(), currents, forecasts, advice, daily)
+    }
+    
+    return BulkWeatherResponse(
+        plots=[
+            PlotWeather(
+                id=plot.id,
+                latitude=plot.latitude,
+                longitude=plot.longitude,
+                cell=cell,
+                **by_cell[cell]
+            )
+            for plot, cell in zip(request.plots, plot_cells)
+        ],
+        cells=len(cells)
+    )
@@ -0,0 +1,25 @@
+"""
+Streaming Helpers
+Server-Sent Events formatting shared by streaming endpoints
+"""
+
+import json
+from typing import AsyncIterator
+from fastapi.responses import StreamingResponse
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    """Wrap formatted events in an unbuffered text/event-stream response"""
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Stop proxies from buffering the stream
+        }
+    )
@@ -0,0 +1,35 @@
+"""
+Upload helpers shared by the multipart endpoints
+"""
+
+from typing import Optional
+from fastapi import HTTPException, UploadFile
+from ..config import settings
+
+CHUNK_SIZE = 64 * 1024
+
+async def read_upload(file: UploadFile, max_bytes: Optional[int] = None) -> bytes:
+    """
+    Read an uploaded file from its spooled buffer in chunks
+    Raises 413 past the size cap and 400 for empty files
+    """
+    
+    max_bytes = max_bytes or settings.MAX_UPLOAD_BYTES
+    chunks = []
+    size = 0
+    
+    while True:
+        chunk = await file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Upload too large (max {max_bytes} bytes)")
+        chunks.append(chunk)
+    
+    await file.close()
+    
+    if size == 0:
+        raise HTTPException(status_code=400, detail="Uploaded file is empty")
+    
+    return b"".join(chunks)
@@ -1,5 +1,25 @@
 """Services package"""
-from .gemini_service import GeminiService
-from .cerebras_service import CerebrasService
-from .weather_service import WeatherService
-from .plant_persona import PlantPersona
+import importlib
+
+# Attributes are imported on first access so that importing one service
+# does not pull in every other service and its SDK
+_LAZY_ATTRIBUTES = {
+    "GeminiService": ".gemini_service",
+    "gemini_service": ".gemini_service",
+    "CerebrasService": ".cerebras_service",
+    "cerebras_service": ".cerebras_service",
+    "WeatherService": ".weather_service",
+    "weather_service": ".weather_service",
+    "PlantPersona": ".plant_persona",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,250 @@
+"""
+Answer Cache - reuse plant chat answers for repeated questions
+Matches normalized questions exactly or by MinHash similarity, per persona
+"""
+
+import re
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+import numpy as np
+from ..config import settings
+from .metrics import registry
+
+answer_cache_lookups = registry.counter(
+    "cropmagix_chat_answer_cache_lookups_total",
+    "Plant chat answer cache lookups",
+    ("result",)
+)
+answer_cache_saved = registry.counter(
+    "cropmagix_chat_answer_cache_saved_seconds_total",
+    "LLM latency avoided by serving cached plant chat answers"
+)
+
+# Vowel signs and viramas are not \w, so Devanagari and Telugu letters are kept
+# explicitly (the danda । and ॥ are still punctuation)
+_PUNCTUATION = re.compile(r"[^\w\s\u0900-\u0963\u0966-\u0D7F]+")
+_WHITESPACE = re.compile(r"\s+")
+_NUMBER = re.compile(r"^\d+$")
+
+# Words that flip a question's meaning but barely move its n-grams. "don't"
+# normalizes to "don t", so a lone "t" is a negation too.
+_NEGATIONS = frozenset({
+    "no", "not", "never", "none", "nothing", "nor", "neither", "without", "cannot", "t",
+    "dont", "doesnt", "didnt", "cant", "wont", "isnt", "arent", "wasnt", "shouldnt", "wouldnt", "couldnt",
+    "नहीं", "नही", "न", "ना", "मत", "बिना",
+    "కాదు", "లేదు", "లేవు", "వద్దు", "కూడదు", "లేకుండా"
+})
+# Telugu negates by suffix (వేయవద్దు, "don't spray")
+_NEGATION_SUFFIXES = ("కాదు", "లేదు", "లేవు", "వద్దు", "కూడదు")
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace ("How are you?" == "how are you")"""
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", text.lower())).strip()
+
+
+def meaning_terms(normalized: str) -> Tuple[str, ...]:
+    """Negations and numbers in a normalized question; similar questions must agree on them"""
+    return tuple(sorted(
+        word for word in normalized.split()
+        if word in _NEGATIONS or _NUMBER.match(word) or word.endswith(_NEGATION_SUFFIXES)
+    ))
+
+
+class MinHasher:
+    """MinHash signatures over character n-grams, which works for every script"""
+    
+    def __init__(self, num_perm: int, ngram: int, seed: int = 1):
+        self.ngram = ngram
+        # Seeded multiply-shift hashes, so signatures are stable across restarts
+        rng = np.random.default_rng(seed)
+        self._a = (rng.integers(1, 1 << 63, size=(num_perm, 1), dtype=np.uint64) | np.uint64(1))
+        self._b = rng.integers(0, 1 << 63, size=(num_perm, 1), dtype=np.uint64)
+    
+    def signature(self, text: str) -> Tuple[int, ...]:
+        padded = f" {text} "
+        n = self.ngram
+        shingles = np.fromiter(
+            {zlib.crc32(padded[i:i + n].encode("utf-8")) for i in range(max(1, len(padded) - n + 1))},
+            dtype=np.uint64
+        )
+        # uint64 arithmetic wraps, which is the multiply-shift hash's modulus
+        hashes = (self._a * shingles + self._b) >> np.uint64(32)
+        return tuple(hashes.min(axis=1).tolist())
+
+
+def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+class _Entry:
+    __slots__ = ("answer", "signature", "terms", "latency", "expires_at")
+    
+    def __init__(
+        self,
+        answer: Dict[str, Any],
+        signature: Tuple[int, ...],
+        terms: Tuple[str, ...],
+        latency: float,
+        expires_at: float
+    ):
+        self.answer = answer
+        self.signature = signature
+        self.terms = terms
+        self.latency = latency
+        self.expires_at = expires_at
+
+
+class AnswerCache:
+    """
+    LRU cache with TTL of plant chat answers, scoped by persona
+    
+    A scope is whatever identifies the persona (plant, health status,
+    diseases, language); answers never cross scopes. Within a scope a
+    question hits on its normalized text, or on a MinHash neighbour found
+    through LSH bands whose estimated similarity reaches `threshold` and
+    whose negations and numbers are the same ("should I not spray" is not
+    "should I spray", and 2 litres is not 20).
+    """
+    
+    def __init__(self, maxsize: int, ttl: float, threshold: float, num_perm: int = 32, bands: int = 8, ngram: int = 3):
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = max(1, num_perm // bands)
+        self.hasher = MinHasher(self.rows * bands, ngram)
+        self._entries: "OrderedDict[Tuple[Hashable, str], _Entry]" = OrderedDict()
+        # (scope, band, band values) -> keys of entries in that bucket
+        self._buckets: Dict[Tuple[Hashable, int, Tuple[int, ...]], Set[Tuple[Hashable, str]]] = {}
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+    
+    def _band_keys(self, scope: Hashable, signature: Tuple[int, ...]) -> List[Tuple[Hashable, int, Tuple[int, ...]]]:
+        rows = self.rows
+        return [(scope, band, signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+    
+    def get(self, scope: Hashable, question: str) -> Optional[Dict[str, Any]]:
+        """Cached answer for a question in this scope, or None"""
+        
+        normalized = normalize_question(question)
+        now = time.monotonic()
+        
+        entry = self._live((scope, normalized), now)
+        result = "exact"
+        if entry is None:
+            entry = self._similar(scope, normalized, now)
+            result = "similar"
+        if entry is None:
+            self.misses += 1
+            answer_cache_lookups.inc("miss")
+            return None
+        
+        if result == "exact":
+            self.hits += 1
+        else:
+            self.similar_hits += 1
+        self.saved_seconds += entry.latency
+        answer_cache_lookups.inc(result)
+        answer_cache_saved.inc(amount=entry.latency)
+        return dict(entry.answer)
+    
+    def _live(self, key: Tuple[Hashable, str], now: float) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+    
+    def _similar(self, scope: Hashable, normalized: str, now: float) -> Optional[_Entry]:
+        """Best LSH candidate at or above the similarity threshold"""
+        
+        signature = self.hasher.signature(normalized)
+        terms = meaning_terms(normalized)
+        candidates: Set[Tuple[Hashable, str]] = set()
+        for band_key in self._band_keys(scope, signature):
+            candidates.update(self._buckets.get(band_key, ()))
+        
+        best_key, best_score = None, self.threshold
+        for key in candidates:
+            entry = self._entries[key]
+            if entry.terms != terms:
+                continue
+            score = similarity(signature, entry.signature)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return self._live(best_key, now) if best_key is not None else None
+    
+    def set(self, scope: Hashable, question: str, answer: Dict[str, Any], latency: float):
+        """Store an answer and how long it took to generate"""
+        
+        normalized = normalize_question(question)
+        key = (scope, normalized)
+        if key in self._entries:
+            self._remove(key)
+        
+        signature = self.hasher.signature(normalized)
+        self._entries[key] = _Entry(
+            dict(answer), signature, meaning_terms(normalized), latency, time.monotonic() + self.ttl
+        )
+        for band_key in self._band_keys(scope, signature):
+            self._buckets.setdefault(band_key, set()).add(key)
+        
+        while len(self._entries) > self.maxsize:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+    
+    def _remove(self, key: Tuple[Hashable, str]):
+        entry = self._entries.pop(key)
+        for band_key in self._band_keys(key[0], entry.signature):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        
+        hits = self.hits + self.similar_hits
+        lookups = hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "saved_seconds": round(self.saved_seconds, 3)
+        }
+
+
+def persona_scope(plant_type: str, health_status: str, diseases: List[str], language: str) -> Tuple[str, ...]:
+    """Answer cache scope for a plant persona"""
+    return (
+        plant_type.strip().lower(),
+        health_status.strip().lower(),
+        "|".join(sorted(d.strip().lower() for d in diseases)),
+        language
+    )
+
+
+# Singleton instance
+answer_cache = AnswerCache(
+    settings.CHAT_ANSWER_CACHE_SIZE,
+    settings.CHAT_ANSWER_CACHE_TTL,
+    settings.CHAT_ANSWER_CACHE_SIMILARITY
+)
@@ -0,0 +1,131 @@
+"""
+Blob Store - content-addressed image storage with a TTL
+Responses reference images by ID instead of echoing megabytes of base64
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from ..config import settings
+
+
+class Blob:
+    """Stored bytes and their content type"""
+    
+    __slots__ = ("id", "data", "content_type", "expires_at")
+    
+    def __init__(self, blob_id: str, data: bytes, content_type: str, expires_at: float):
+        self.id = blob_id
+        self.data = data
+        self.content_type = content_type
+        self.expires_at = expires_at
+
+
+def blob_id(data: bytes) -> str:
+    """
+    Content address of a blob: the first 32 hex digits of its SHA-256
+    Clients can compute it locally to know they already hold an image
+    """
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+class BlobStore:
+    """
+    LRU store bounded by total bytes, with a TTL per blob
+    Storing the same bytes twice keeps one copy and refreshes its TTL
+    """
+    
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max(1, max_bytes)
+        self.ttl = ttl
+        self._blobs: "OrderedDict[str, Blob]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.dedups = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def put(self, data: bytes, content_type: str = "application/octet-stream") -> str:
+        """Store bytes and return their ID"""
+        
+        key = blob_id(data)
+        expires_at = time.monotonic() + self.ttl
+        
+        existing = self._blobs.get(key)
+        if existing is not None:
+            existing.expires_at = expires_at
+            self._blobs.move_to_end(key)
+            self.dedups += 1
+            return key
+        
+        self._blobs[key] = Blob(key, data, content_type, expires_at)
+        self.bytes += len(data)
+        
+        # Always keep the newest blob, even if it alone exceeds the budget
+        while self.bytes > self.max_bytes and len(self._blobs) > 1:
+            _, evicted = self._blobs.popitem(last=False)
+            self.bytes -= len(evicted.data)
+            self.evictions += 1
+        
+        return key
+    
+    def get(self, key: str) -> Optional[Blob]:
+        """Return a live blob and mark it most recently used"""
+        
+        blob = self._blobs.get(key)
+        if blob is None:
+            self.misses += 1
+            return None
+        
+        if blob.expires_at <= time.monotonic():
+            del self._blobs[key]
+            self.bytes -= len(blob.data)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        
+        self._blobs.move_to_end(key)
+        self.hits += 1
+        return blob
+    
+    def __len__(self) -> int:
+        return len(self._blobs)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._blobs),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "dedups": self.dedups,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+def sniff_image_type(data: bytes) -> Optional[str]:
+    """
+    Content type from the image's magic bytes, or None if it is not JPEG, PNG, WebP or GIF
+    Never trust a client-supplied type: blobs are served from the API origin
+    """
+    
+    if data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    return None
+
+
+# Singleton instance
+image_store = BlobStore(settings.IMAGE_STORE_MAX_BYTES, settings.IMAGE_STORE_TTL)
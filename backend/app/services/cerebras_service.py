@@ -5,16 +5,40 @@ Uses Cerebras API for instant text generation
 
 import httpx
 import json
-from typing import List, Dict, Any, Optional
+import time
+from typing import List, Dict, Any, Optional, AsyncIterator, Set, Tuple
 from ..config import settings
+from .answer_cache import answer_cache, persona_scope
+from .chat_context import chat_context, with_summary
+from .http_client import create_http_client
+from .metrics import track_upstream
+from .resilience import get_policy
 
 class CerebrasService:
     """Service for Cerebras ultra-fast inference"""
     
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
         self.api_key = settings.CEREBRAS_API_KEY
         self.base_url = "https://api.cerebras.ai/v1"
         self.model = settings.CEREBRAS_MODEL
+        # Pooled client, normally injected by the app lifespan hook.
+        # Its base_url decides where requests go, so tests can point it at a stub.
+        self.client = client
+        # Fail fast while Cerebras is degraded rather than waiting out CEREBRAS_TIMEOUT
+        self.resilience = get_policy("cerebras", settings.CEREBRAS_TIMEOUT, settings.CEREBRAS_SLOW_CALL_SECONDS)
+    
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Return the pooled client, creating one on first use if none was injected"""
+        if self.client is None or self.client.is_closed:
+            self.client = create_http_client(self.base_url, settings.CEREBRAS_TIMEOUT)
+        return self.client
+    
+    async def aclose(self):
+        """Close the pooled client"""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
     
     async def chat(
         self,
@@ -28,6 +52,38 @@ class CerebrasService:
         Returns generated response
         """
         
+        headers, payload = self._build_request(messages, system_prompt, temperature, max_tokens, stream=False)
+        
+        async def request():
+            async with track_upstream("cerebras_chat"):
+                response = await self.http.post(
+                    "/chat/completions",
+                    headers=headers,
+                    json=payload
+                )
+                response.raise_for_status()
+                return response
+        
+        try:
+            response = await self.resilience.call(request, operation="chat")
+            data = response.json()
+            return data["choices"][0]["message"]["content"]
+            
+        except httpx.HTTPStatusError as e:
+            raise Exception(f"Cerebras API error: {e.response.status_code} - {e.response.text}")
+        except Exception as e:
+            raise Exception(f"Cerebras request failed: {str(e)}")
+    
+    def _build_request(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: str,
+        temperature: float,
+        max_tokens: int,
+        stream: bool
+    ):
+        """Build headers and payload for a chat completion"""
+        
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
@@ -43,25 +99,92 @@ class CerebrasService:
             "messages": full_messages,
             "temperature": temperature,
             "max_tokens": max_tokens,
-            "stream": False
+            "stream": stream
         }
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            try:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
-                    headers=headers,
-                    json=payload
-                )
+        return headers, payload
+    
+    async def chat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 500
+    ) -> AsyncIterator[str]:
+        """
+        Stream a chat completion from Cerebras
+        Yields text deltas as they arrive (OpenAI-compatible SSE)
+        """
+        
+        headers, payload = self._build_request(messages, system_prompt, temperature, max_tokens, stream=True)
+        
+        try:
+            async with self.resilience.guard(), track_upstream("cerebras_chat_stream"), self.http.stream(
+                "POST",
+                "/chat/completions",
+                headers=headers,
+                json=payload
+            ) as response:
+                if response.is_error:
+                    await response.aread()
                 response.raise_for_status()
                 
-                data = response.json()
-                return data["choices"][0]["message"]["content"]
-                
-            except httpx.HTTPStatusError as e:
-                raise Exception(f"Cerebras API error: {e.response.status_code} - {e.response.text}")
-            except Exception as e:
-                raise Exception(f"Cerebras request failed: {str(e)}")
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    
+                    chunk = json.loads(data)
+                    choices = chunk.get("choices") or [{}]
+                    delta = choices[0].get("delta", {}).get("content")
+                    if delta:
+                        yield delta
+                        
+        except httpx.HTTPStatusError as e:
+            raise Exception(f"Cerebras API error: {e.response.status_code} - {e.response.text}")
+        except Exception as e:
+            raise Exception(f"Cerebras request failed: {str(e)}")
+    
+    def _build_plant_messages(
+        self,
+        user_message: str,
+        plant_type: str,
+        health_status: str,
+        diseases: List[str],
+        conversation_history: List[Dict[str, str]],
+        language: str,
+        system_prompt: Optional[str] = None,
+        conversation: Optional[str] = None,
+        offset: int = 0
+    ):
+        """Return (system prompt, messages) for a plant chat turn"""
+        
+        # Chat sessions pass the persona they compiled when they started
+        if system_prompt is None:
+            from .plant_persona import PlantPersona
+            
+            # Get the appropriate system prompt
+            system_prompt = PlantPersona.get_persona(
+                plant_type=plant_type,
+                health_status=health_status,
+                diseases=diseases,
+                language=language
+            )
+        
+        # Recent turns within CHAT_CONTEXT_TOKENS, plus the current user message;
+        # older turns come back as a cached summary
+        messages, summary = chat_context.build(
+            conversation_history,
+            user_message,
+            conversation=conversation,
+            offset=offset,
+            language=language,
+            scope=f"{plant_type}:{language}"
+        )
+        
+        return with_summary(system_prompt, summary), messages
     
     async def generate_plant_response(
         self,
@@ -70,39 +193,34 @@ class CerebrasService:
         health_status: str,
         diseases: List[str],
         conversation_history: List[Dict[str, str]],
-        language: str = "en"
+        language: str = "en",
+        system_prompt: Optional[str] = None,
+        conversation: Optional[str] = None,
+        offset: int = 0
     ) -> Dict[str, Any]:
         """
         Generate a response as if the plant is speaking
         Returns response with emotion and optional tip
         """
         
-        from .plant_persona import PlantPersona
+        # First-turn questions repeat a lot; their answers depend only on the persona
+        scope = self._answer_scope(plant_type, health_status, diseases, conversation_history, language, offset)
+        if scope is not None:
+            cached = answer_cache.get(scope, user_message)
+            if cached is not None:
+                return cached
         
-        # Get the appropriate system prompt
-        system_prompt = PlantPersona.get_persona(
-            plant_type=plant_type,
-            health_status=health_status,
-            diseases=diseases,
-            language=language
+        system_prompt, messages = self._build_plant_messages(
+            user_message, plant_type, health_status, diseases, conversation_history, language,
+            system_prompt, conversation, offset
         )
         
-        # Format conversation history
-        messages = []
-        for msg in conversation_history[-6:]:  # Keep last 6 messages for context
-            messages.append({
-                "role": msg.get("role", "user"),
-                "content": msg.get("content", "")
-            })
-        
-        # Add current user message
-        messages.append({
-            "role": "user",
-            "content": user_message
-        })
+        from .llm_router import llm_router
         
+        started = time.perf_counter()
         try:
-            response_text = await self.chat(
+            # Fastest healthy provider (Cerebras or Gemini), hedged when it lags
+            response_text, _ = await llm_router.chat(
                 messages=messages,
                 system_prompt=system_prompt,
                 temperature=0.8,
@@ -115,69 +233,225 @@ class CerebrasService:
             # Extract any farming tip if present
             tip = self._extract_tip(response_text)
             
-            return {
+            result = {
                 "response": response_text,
                 "emotion": emotion,
                 "tip": tip
             }
+            if scope is not None:
+                answer_cache.set(scope, user_message, result, time.perf_counter() - started)
+            return result
             
         except Exception as e:
             # Fallback response
-            fallback_responses = {
-                "en": "I'm having trouble speaking right now. Please try again!",
-                "hi": "मुझे अभी बोलने में परेशानी हो रही है। कृपया फिर से प्रयास करें!",
-                "te": "నాకు ఇప్పుడు మాట్లాడటంలో సమస్య ఉంది. దయచేసి మళ్ళీ ప్రయత్నించండి!"
-            }
             return {
-                "response": fallback_responses.get(language, fallback_responses["en"]),
+                "response": FALLBACK_RESPONSES.get(language, FALLBACK_RESPONSES["en"]),
                 "emotion": "worried",
                 "tip": None,
                 "error": str(e)
             }
     
-    def _detect_emotion(self, health_status: str, response: str) -> str:
-        """Detect emotion based on health and response content"""
+    async def generate_plant_response_stream(
+        self,
+        user_message: str,
+        plant_type: str,
+        health_status: str,
+        diseases: List[str],
+        conversation_history: List[Dict[str, str]],
+        language: str = "en",
+        system_prompt: Optional[str] = None,
+        conversation: Optional[str] = None,
+        offset: int = 0
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Stream a plant response as (event, data) pairs
+        Yields "delta" events with text, then one "done" event with emotion and tip
+        """
         
-        # Check response for emotional indicators
-        response_lower = response.lower()
+        scope = self._answer_scope(plant_type, health_status, diseases, conversation_history, language, offset)
+        if scope is not None:
+            cached = answer_cache.get(scope, user_message)
+            if cached is not None:
+                yield "delta", {"text": cached["response"]}
+                yield "done", cached
+                return
         
-        if health_status == "healthy":
-            if any(word in response_lower for word in ["thank", "happy", "great", "wonderful"]):
-                return "happy"
-            return "happy"
+        system_prompt, messages = self._build_plant_messages(
+            user_message, plant_type, health_status, diseases, conversation_history, language,
+            system_prompt, conversation, offset
+        )
         
-        elif health_status == "severe":
-            if any(word in response_lower for word in ["help", "pain", "sick", "bad"]):
-                return "sad"
-            return "worried"
+        analyzer = StreamingResponseAnalyzer(health_status)
+        started = time.perf_counter()
+        try:
+            async for delta in self.chat_stream(
+                messages=messages,
+                system_prompt=system_prompt,
+                temperature=0.8,
+                max_tokens=300
+            ):
+                analyzer.feed(delta)
+                yield "delta", {"text": delta}
+            
+            result = {
+                "response": analyzer.text,
+                "emotion": analyzer.emotion(),
+                "tip": analyzer.tip()
+            }
+            if scope is not None and analyzer.text:
+                answer_cache.set(scope, user_message, result, time.perf_counter() - started)
+            yield "done", result
+            
+        except Exception as e:
+            # Keep whatever already streamed; only fall back if nothing arrived
+            if analyzer.text:
+                yield "done", {
+                    "response": analyzer.text,
+                    "emotion": analyzer.emotion(),
+                    "tip": analyzer.tip(),
+                    "error": str(e)
+                }
+                return
+            
+            fallback = FALLBACK_RESPONSES.get(language, FALLBACK_RESPONSES["en"])
+            yield "delta", {"text": fallback}
+            yield "done", {
+                "response": fallback,
+                "emotion": "worried",
+                "tip": None,
+                "error": str(e)
+            }
+    
+    def _answer_scope(
+        self,
+        plant_type: str,
+        health_status: str,
+        diseases: List[str],
+        conversation_history: List[Dict[str, str]],
+        language: str,
+        offset: int
+    ) -> Optional[Tuple[str, ...]]:
+        """Answer cache scope for a context-free (first) turn, None when the answer depends on history"""
         
-        elif health_status in ["mild", "moderate"]:
-            if any(word in response_lower for word in ["better", "hope", "healing"]):
-                return "grateful"
-            if any(word in response_lower for word in ["itch", "annoy", "bother"]):
-                return "grumpy"
-            return "worried"
+        if not settings.CHAT_ANSWER_CACHE_ENABLED or conversation_history or offset:
+            return None
+        return persona_scope(plant_type, health_status, diseases, language)
+    
+    def _detect_emotion(self, health_status: str, response: str) -> str:
+        """Detect emotion based on health and response content"""
         
-        return "neutral"
+        # Check response for emotional indicators
+        response_lower = response.lower()
+        matched = {
+            group for group, words in EMOTION_KEYWORDS.items()
+            if any(word in response_lower for word in words)
+        }
+        return _emotion_from_matches(health_status, matched)
     
     def _extract_tip(self, response: str) -> Optional[str]:
         """Extract farming tip from response if present"""
         
-        tip_indicators = ["tip:", "advice:", "remember:", "pro tip:", "सुझाव:", "చిట్కా:"]
-        
         response_lower = response.lower()
-        for indicator in tip_indicators:
+        for indicator in TIP_INDICATORS:
             if indicator in response_lower:
                 # Find the tip after the indicator
                 idx = response_lower.find(indicator)
-                tip_text = response[idx + len(indicator):].strip()
-                # Take first sentence
-                if "." in tip_text:
-                    return tip_text[:tip_text.index(".") + 1]
-                return tip_text[:150] if len(tip_text) > 150 else tip_text
+                return _tip_after(response, idx + len(indicator))
         
         return None
 
 
+# Emotional indicator words, grouped by the emotion they point to
+EMOTION_KEYWORDS = {
+    "happy": ["thank", "happy", "great", "wonderful"],
+    "sad": ["help", "pain", "sick", "bad"],
+    "grateful": ["better", "hope", "healing"],
+    "grumpy": ["itch", "annoy", "bother"]
+}
+
+TIP_INDICATORS = ["tip:", "advice:", "remember:", "pro tip:", "सुझाव:", "చిట్కా:"]
+
+FALLBACK_RESPONSES = {
+    "en": "I'm having trouble speaking right now. Please try again!",
+    "hi": "मुझे अभी बोलने में परेशानी हो रही है। कृपया फिर से प्रयास करें!",
+    "te": "నాకు ఇప్పుడు మాట్లాడటంలో సమస్య ఉంది. దయచేసి మళ్ళీ ప్రయత్నించండి!"
+}
+
+def _emotion_from_matches(health_status: str, matched: Set[str]) -> str:
+    """Map health status and matched keyword groups to an emotion"""
+    
+    if health_status == "healthy":
+        return "happy"
+    
+    elif health_status == "severe":
+        if "sad" in matched:
+            return "sad"
+        return "worried"
+    
+    elif health_status in ["mild", "moderate"]:
+        if "grateful" in matched:
+            return "grateful"
+        if "grumpy" in matched:
+            return "grumpy"
+        return "worried"
+    
+    return "neutral"
+
+def _tip_after(response: str, start: int) -> str:
+    """Take the first sentence (or 150 chars) after a tip indicator"""
+    
+    tip_text = response[start:].strip()
+    if "." in tip_text:
+        return tip_text[:tip_text.index(".") + 1]
+    return tip_text[:150] if len(tip_text) > 150 else tip_text
+
+
+class StreamingResponseAnalyzer:
+    """
+    Track emotion keywords and tip indicators while a response streams in
+    
+    Each delta is scanned once, together with a short overlap from the
+    previous text so words split across deltas still match. The results
+    equal _detect_emotion / _extract_tip on the full text.
+    """
+    
+    _overlap = max(len(word) for words in EMOTION_KEYWORDS.values() for word in words + TIP_INDICATORS)
+    
+    def __init__(self, health_status: str):
+        self.health_status = health_status
+        self.text = ""
+        self._lower = ""
+        self._matched: Set[str] = set()
+        self._tip_positions: Dict[str, int] = {}
+    
+    def feed(self, delta: str):
+        """Add a delta and scan only the new tail"""
+        
+        scan_from = max(0, len(self._lower) - self._overlap)
+        self.text += delta
+        self._lower += delta.lower()
+        window = self._lower[scan_from:]
+        
+        for group, words in EMOTION_KEYWORDS.items():
+            if group not in self._matched and any(word in window for word in words):
+                self._matched.add(group)
+        
+        for indicator in TIP_INDICATORS:
+            if indicator not in self._tip_positions:
+                idx = window.find(indicator)
+                if idx != -1:
+                    self._tip_positions[indicator] = scan_from + idx
+    
+    def emotion(self) -> str:
+        return _emotion_from_matches(self.health_status, self._matched)
+    
+    def tip(self) -> Optional[str]:
+        # Indicators are checked in list order, matching _extract_tip
+        for indicator in TIP_INDICATORS:
+            if indicator in self._tip_positions:
+                return _tip_after(self.text, self._tip_positions[indicator] + len(indicator))
+        return None
+
+
 # Singleton instance
 cerebras_service = CerebrasService()
@@ -0,0 +1,267 @@
+"""
+Chat Context - fit plant chat history to a token budget
+Turns that no longer fit are folded into a rolling summary, cached per conversation
+"""
+
+import asyncio
+import hashlib
+from typing import Dict, Hashable, List, Optional, Tuple
+from ..config import settings
+from .cache import TTLCache
+
+# Llama-style tokenizers average ~4 characters per token for English, but
+# Devanagari and Telugu split far finer; count non-ASCII characters heavier
+_ASCII_CHARS_PER_TOKEN = 4.0
+_OTHER_CHARS_PER_TOKEN = 1.5
+# Role markers and separators added around every chat message
+_MESSAGE_OVERHEAD = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count without loading a tokenizer"""
+    
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    other_chars = len(text) - ascii_chars
+    return int(ascii_chars / _ASCII_CHARS_PER_TOKEN + other_chars / _OTHER_CHARS_PER_TOKEN + 0.999)
+
+
+def message_tokens(content: str) -> int:
+    return estimate_tokens(content) + _MESSAGE_OVERHEAD
+
+
+def prefix_hashes(scope: str, history: List[Dict[str, str]], upto: int) -> List[str]:
+    """
+    Hashes of history[:k] for k = 0..upto, chained so each is one update
+    A client-held summary is only reused for the exact turns it was made from
+    """
+    
+    digest = hashlib.sha256(scope.encode("utf-8"))
+    hashes = [digest.hexdigest()]
+    for msg in history[:upto]:
+        digest.update(b"\x1e" + msg.get("role", "user").encode("utf-8") + b"\x1f" + msg.get("content", "").encode("utf-8"))
+        hashes.append(digest.hexdigest())
+    return hashes
+
+
+class ChatContextBuilder:
+    """
+    Pick the most recent turns that fit the token budget
+    
+    Older turns are summarized through the LLM router in the background. A fold
+    covers enough turns to bring the rest under half the budget, so the next few
+    turns reuse the cached summary and only a later overflow folds the newly
+    dropped turns into it. Until a summary is ready the turns are simply
+    dropped, so building context never waits on the LLM.
+    
+    Server-side sessions cache their summary under the session ID. Client-held
+    history is untrusted and shared openings are common, so its summaries are
+    keyed by a hash of the exact turns they cover and only reused for a
+    matching prefix.
+    """
+    
+    def __init__(self, max_tokens: int, summary_tokens: int, cache_size: int, ttl: float, max_pending: int):
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.max_pending = max(1, max_pending)
+        # session id -> (summary, turns it covers)
+        # (scope, prefix hash) -> (summary, turns it covers)
+        self.summaries = TTLCache(cache_size, ttl)
+        # cache key -> (summary so far, turns to fold, turns covered after the fold, language)
+        self._pending: Dict[Hashable, Tuple[str, List[Dict[str, str]], int, str]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.generated = 0
+        self.failures = 0
+        self.dropped = 0
+    
+    def build(
+        self,
+        history: List[Dict[str, str]],
+        user_message: str,
+        conversation: Optional[str] = None,
+        offset: int = 0,
+        language: str = "en",
+        scope: Optional[str] = None
+    ) -> Tuple[List[Dict[str, str]], Optional[str]]:
+        """
+        Return (messages ending with the user message, summary of dropped turns or None)
+        
+        conversation is a server-side session ID, offset the number of its turns
+        that came before history[0]. Without one, scope (e.g. plant and language)
+        namespaces summaries of client-held history.
+        """
+        
+        budget = self.max_tokens - message_tokens(user_message)
+        used = 0
+        # history[cut:] fits the budget, history[fold_cut:] fits half of it
+        cut = fold_cut = len(history)
+        for i in range(len(history) - 1, -1, -1):
+            used += message_tokens(history[i].get("content", ""))
+            if used > budget:
+                break
+            cut = i
+            if used <= budget // 2:
+                fold_cut = i
+        
+        summary = None
+        if cut > 0:
+            if conversation is not None:
+                summary, covered = self._session_summary(conversation, history, cut, fold_cut, offset, language)
+            elif scope is not None:
+                summary, covered = self._history_summary(scope, history, cut, fold_cut, language)
+            else:
+                covered = 0
+            # Turns already in the summary are not repeated
+            cut = max(cut, covered)
+        
+        messages = [
+            {"role": msg.get("role", "user"), "content": msg.get("content", "")}
+            for msg in history[cut:]
+        ]
+        messages.append({"role": "user", "content": user_message})
+        return messages, summary
+    
+    def _session_summary(
+        self,
+        conversation: str,
+        history: List[Dict[str, str]],
+        cut: int,
+        fold_cut: int,
+        offset: int,
+        language: str
+    ) -> Tuple[Optional[str], int]:
+        """
+        Cached (summary, turns of history it covers) for a server-side session
+        Queues a fold up to fold_cut if the summary does not reach cut
+        """
+        
+        cached = self.summaries.get(conversation)
+        summary, covered = cached if cached is not None else ("", 0)
+        # A fold must move past what the summary already covers
+        if covered < offset + cut and offset + fold_cut > covered:
+            # Turns that left a session's ring buffer before being folded are lost
+            start = max(covered - offset, 0)
+            self._queue(conversation, summary, history[start:fold_cut], offset + fold_cut, language)
+        return summary or None, max(covered - offset, 0)
+    
+    def _history_summary(
+        self,
+        scope: str,
+        history: List[Dict[str, str]],
+        cut: int,
+        fold_cut: int,
+        language: str
+    ) -> Tuple[Optional[str], int]:
+        """
+        Longest cached summary of an exact prefix of client-held history
+        Queues a fold up to fold_cut if it does not reach cut
+        """
+        
+        hashes = prefix_hashes(scope, history, fold_cut)
+        summary, covered = "", 0
+        for k in range(fold_cut, 0, -1):
+            key = (scope, hashes[k])
+            if key in self.summaries:
+                summary, _ = self.summaries.get(key)
+                covered = k
+                break
+        
+        if covered < cut:
+            self._queue((scope, hashes[fold_cut]), summary, history[covered:fold_cut], fold_cut, language)
+        return summary or None, covered
+    
+    def _queue(self, key: Hashable, summary: str, turns: List[Dict[str, str]], target: int, language: str):
+        pending = self._pending.get(key)
+        if pending is not None and pending[2] >= target:
+            return
+        if pending is None and len(self._pending) >= self.max_pending:
+            # Summaries are an optimization; shed them rather than pile up LLM calls
+            self.dropped += 1
+            return
+        
+        self._pending[key] = (summary, list(turns), target, language)
+        if self._task is None or self._task.done():
+            try:
+                self._task = asyncio.get_running_loop().create_task(self._drain())
+            except RuntimeError:
+                # No running loop (e.g. a script); summarized on the next async call
+                pass
+    
+    async def _drain(self):
+        """Fold queued turns into their summaries one at a time"""
+        
+        while self._pending:
+            key, (summary, turns, target, language) = next(iter(self._pending.items()))
+            del self._pending[key]
+            if self._covered(key) >= target:
+                continue
+            
+            try:
+                folded = await self._summarize(summary, turns, language)
+            except Exception as e:
+                print(f"Warning: chat summary failed: {e}")
+                self.failures += 1
+                continue
+            
+            # Never replace a summary that got further while this one was generated
+            if self._covered(key) >= target:
+                continue
+            self.summaries.set(key, (folded, target))
+            self.generated += 1
+    
+    def _covered(self, key: Hashable) -> int:
+        cached = self.summaries.get(key)
+        return cached[1] if cached is not None else 0
+    
+    async def _summarize(self, summary: str, turns: List[Dict[str, str]], language: str) -> str:
+        """Fold turns into an existing summary in one LLM call"""
+        
+        from .llm_router import llm_router
+        from .translation import LANGUAGE_NAMES
+        
+        lines = []
+        if summary:
+            lines.append(f"Summary so far: {summary}")
+        for msg in turns:
+            speaker = "Plant" if msg.get("role") == "assistant" else "Farmer"
+            lines.append(f"{speaker}: {msg.get('content', '')}")
+        
+        system_prompt = (
+            "You summarize a conversation between a farmer and their plant. "
+            f"Write the summary in {LANGUAGE_NAMES.get(language, 'English')}, in at most "
+            f"{max(20, self.summary_tokens * 3 // 4)} words. Keep facts about the plant's condition, "
+            "treatments tried or suggested and the farmer's open questions. Return only the summary."
+        )
+        text, _ = await llm_router.chat(
+            messages=[{"role": "user", "content": "\n".join(lines)}],
+            system_prompt=system_prompt,
+            temperature=0.2,
+            max_tokens=self.summary_tokens
+        )
+        return text.strip()
+    
+    def stats(self) -> Dict[str, object]:
+        return {
+            "max_tokens": self.max_tokens,
+            "summaries": len(self.summaries),
+            "pending": len(self._pending),
+            "generated": self.generated,
+            "failures": self.failures,
+            "dropped": self.dropped
+        }
+
+
+def with_summary(system_prompt: str, summary: Optional[str]) -> str:
+    """Append the summary of earlier turns to a system prompt"""
+    if not summary:
+        return system_prompt
+    return f"{system_prompt}\n\nEarlier in this conversation: {summary}"
+
+
+# Singleton instance
+chat_context = ChatContextBuilder(
+    settings.CHAT_CONTEXT_TOKENS,
+    settings.CHAT_SUMMARY_TOKENS,
+    settings.CHAT_SUMMARY_CACHE_SIZE,
+    settings.CHAT_SUMMARY_TTL,
+    settings.CHAT_SUMMARY_MAX_PENDING
+)
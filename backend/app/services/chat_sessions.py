@@ -0,0 +1,186 @@
+"""
+Chat Sessions - server-side plant chat state
+Clients send a session ID and the new message instead of the whole conversation
+"""
+
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Tuple
+from ..config import settings
+
+# Rough per-object overhead so tiny turns still count against the memory cap
+_TURN_OVERHEAD = 64
+_SESSION_OVERHEAD = 512
+
+
+class ChatSession:
+    """Persona context and a ring buffer of recent turns"""
+    
+    def __init__(
+        self,
+        plant_type: str,
+        health_status: str,
+        diseases: List[str],
+        language: str,
+        system_prompt: str,
+        max_turns: int
+    ):
+        self.id = uuid.uuid4().hex
+        self.plant_type = plant_type
+        self.health_status = health_status
+        self.diseases = diseases
+        self.language = language
+        # Compiled once; every turn reuses it
+        self.system_prompt = system_prompt
+        # (role, content) tuples; the oldest turn drops off when full
+        self.turns: "deque[Tuple[str, str]]" = deque(maxlen=max_turns)
+        # Turns that have fallen off the ring buffer
+        self.dropped = 0
+        self.last_used = time.monotonic()
+        self.size = _SESSION_OVERHEAD + len(system_prompt.encode("utf-8"))
+    
+    def history(self) -> List[Dict[str, str]]:
+        """Turns in the conversation_history format the chat services take"""
+        return [{"role": role, "content": content} for role, content in self.turns]
+    
+    def add_turn(self, role: str, content: str) -> int:
+        """Append a turn and return the change in size"""
+        
+        before = self.size
+        if len(self.turns) == self.turns.maxlen:
+            _, dropped = self.turns[0]
+            self.size -= _TURN_OVERHEAD + len(dropped.encode("utf-8"))
+            self.dropped += 1
+        self.turns.append((role, content))
+        self.size += _TURN_OVERHEAD + len(content.encode("utf-8"))
+        return self.size - before
+
+
+class ChatSessionStore:
+    """
+    LRU of chat sessions bounded by count and approximate bytes
+    Sessions idle for longer than idle_ttl seconds are evicted
+    """
+    
+    def __init__(self, max_sessions: int, max_bytes: int, idle_ttl: float, max_turns: int):
+        self.max_sessions = max(1, max_sessions)
+        self.max_bytes = max(1, max_bytes)
+        self.idle_ttl = idle_ttl
+        self.max_turns = max(2, max_turns)
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self.bytes = 0
+        self.created = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def create(
+        self,
+        plant_type: str,
+        health_status: str,
+        diseases: List[str],
+        language: str,
+        history: Optional[List[Dict[str, str]]] = None
+    ) -> ChatSession:
+        """Start a session, compiling the plant persona once"""
+        
+        from .plant_persona import PlantPersona
+        
+        system_prompt = PlantPersona.get_persona(
+            plant_type=plant_type,
+            health_status=health_status,
+            diseases=diseases,
+            language=language
+        )
+        session = ChatSession(plant_type, health_status, diseases, language, system_prompt, self.max_turns)
+        for msg in history or []:
+            session.add_turn(msg.get("role", "user"), msg.get("content", ""))
+        
+        self._expire()
+        self._sessions[session.id] = session
+        self.bytes += session.size
+        self.created += 1
+        self._evict()
+        return session
+    
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        """Return a live session and mark it used"""
+        
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        
+        now = time.monotonic()
+        if now - session.last_used > self.idle_ttl:
+            self._remove(session_id)
+            self.expirations += 1
+            return None
+        
+        session.last_used = now
+        self._sessions.move_to_end(session_id)
+        return session
+    
+    def add_turns(self, session: ChatSession, turns: List[Tuple[str, str]]):
+        """Record completed turns and enforce the memory cap"""
+        
+        for role, content in turns:
+            delta = session.add_turn(role, content)
+            if session.id in self._sessions:
+                self.bytes += delta
+        self._evict()
+    
+    def delete(self, session_id: str) -> bool:
+        return self._remove(session_id) is not None
+    
+    def _remove(self, session_id: str) -> Optional[ChatSession]:
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self.bytes -= session.size
+        return session
+    
+    def _expire(self):
+        """Drop idle sessions from the LRU end"""
+        
+        cutoff = time.monotonic() - self.idle_ttl
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.last_used > cutoff:
+                break
+            self._remove(session_id)
+            self.expirations += 1
+    
+    def _evict(self):
+        """Drop least recently used sessions until within both caps; keep the newest"""
+        
+        while len(self._sessions) > 1 and (
+            len(self._sessions) > self.max_sessions or self.bytes > self.max_bytes
+        ):
+            session_id = next(iter(self._sessions))
+            self._remove(session_id)
+            self.evictions += 1
+    
+    def __len__(self) -> int:
+        return len(self._sessions)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        
+        self._expire()
+        return {
+            "size": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "created": self.created,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+
+# Singleton instance
+chat_sessions = ChatSessionStore(
+    settings.CHAT_SESSION_MAX_SESSIONS,
+    settings.CHAT_SESSION_MAX_BYTES,
+    settings.CHAT_SESSION_IDLE_TTL,
+    settings.CHAT_SESSION_MAX_TURNS
+)
@@ -0,0 +1,266 @@
+"""
+Farming Rules - Declarative advice and score rules
+Compiled once and evaluated with NumPy over many plots and forecast days
+"""
+
+import operator
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+# Inputs every rule can test, with the value used when a reading is missing
+FEATURE_DEFAULTS = {
+    "temperature": 25.0,
+    "humidity": 50.0,
+    "rain": 0.0,
+    "wind": 0.0,
+    "soil_moisture": ""
+}
+
+# Message keys used by the rules; text is English and translated at the edge
+MESSAGES = {
+    "heat_alert": "🌡️ Extreme heat warning! Protect your crops.",
+    "water_early_late": "Water plants early morning or evening, not midday.",
+    "mulch": "Use mulch to keep soil cool and retain moisture.",
+    "hot_watering": "Hot weather - ensure adequate watering.",
+    "cold_alert": "❄️ Cold weather alert! Protect sensitive crops.",
+    "cover_young": "Cover young plants to protect from cold.",
+    "humidity_alert": "💧 High humidity - watch for fungal diseases.",
+    "air_circulation": "Improve air circulation around plants.",
+    "no_overhead_watering": "Avoid overhead watering to prevent disease.",
+    "low_humidity": "Low humidity - plants may need extra water.",
+    "heavy_rain_alert": "🌧️ Heavy rain expected - check drainage.",
+    "delay_pesticide": "Delay pesticide application until rain stops.",
+    "light_rain": "Light rain expected - good for crops.",
+    "no_rain": "No rain expected - water as needed.",
+    "wind_alert": "💨 Strong winds - stake tall plants.",
+    "delay_spraying": "Delay spraying operations.",
+    "irrigation_urgent": "🏜️ Dry soil + no rain - irrigation urgent!",
+    "waterlogged": "⚠️ Soil waterlogged - improve drainage.",
+    "good_conditions": "✅ Good conditions for farming today!"
+}
+
+# Advice: within a group the first matching rule wins (if / elif / else).
+# "all" conditions must all hold; an empty list always matches.
+ADVICE_RULES = [
+    ("temperature", [
+        {"all": [("temperature", ">", 35)], "alerts": ["heat_alert"], "advice": ["water_early_late", "mulch"]},
+        {"all": [("temperature", ">", 30)], "advice": ["hot_watering"]},
+        {"all": [("temperature", "<", 10)], "alerts": ["cold_alert"], "advice": ["cover_young"]},
+    ]),
+    ("humidity", [
+        {"all": [("humidity", ">", 80)], "alerts": ["humidity_alert"], "advice": ["air_circulation", "no_overhead_watering"]},
+        {"all": [("humidity", "<", 30)], "advice": ["low_humidity"]},
+    ]),
+    ("rain", [
+        {"all": [("rain", ">", 10)], "alerts": ["heavy_rain_alert"], "advice": ["delay_pesticide"]},
+        {"all": [("rain", ">", 0)], "advice": ["light_rain"]},
+        {"all": [], "advice": ["no_rain"]},
+    ]),
+    ("wind", [
+        {"all": [("wind", ">", 10)], "alerts": ["wind_alert"], "advice": ["delay_spraying"]},
+    ]),
+    ("soil", [
+        {"all": [("soil_moisture", "==", "dry"), ("rain", "==", 0)], "alerts": ["irrigation_urgent"]},
+        {"all": [("soil_moisture", "==", "waterlogged")], "alerts": ["waterlogged"]},
+    ]),
+]
+
+# Added when no rule raised an alert
+NO_ALERT_ADVICE = ["good_conditions"]
+
+# Score: start at BASE_SCORE, each group subtracts the penalty of its first
+# matching rule; "any" means one of the conditions is enough. Clamped to 0-100.
+BASE_SCORE = 100
+SCORE_RULES = [
+    ("temperature", [
+        {"any": [("temperature", "<", 10), ("temperature", ">", 35)], "penalty": 30},
+        {"any": [("temperature", "<", 15), ("temperature", ">", 30)], "penalty": 15},
+    ]),
+    ("humidity", [
+        {"any": [("humidity", ">", 85), ("humidity", "<", 25)], "penalty": 20},
+        {"any": [("humidity", ">", 75), ("humidity", "<", 35)], "penalty": 10},
+    ]),
+    ("rain", [
+        {"any": [("rain", ">", 20)], "penalty": 25},
+        {"any": [("rain", ">", 10)], "penalty": 15},
+    ]),
+    ("wind", [
+        {"any": [("wind", ">", 15)], "penalty": 20},
+        {"any": [("wind", ">", 10)], "penalty": 10},
+    ]),
+]
+
+_OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne
+}
+
+
+def _compile_condition(condition: Tuple[str, str, Any]):
+    feature, op, value = condition
+    if feature not in FEATURE_DEFAULTS:
+        raise ValueError(f"Unknown rule feature: {feature}")
+    if op not in _OPERATORS:
+        raise ValueError(f"Unknown rule operator: {op}")
+    return feature, _OPERATORS[op], value
+
+
+class RuleResults:
+    """
+    Outcome of one evaluation
+    
+    `choices[g, i]` is the index of the advice rule that fired in group g for
+    element i (-1 for none) and `scores[i]` the farming score. Message keys
+    are decoded per element on demand, cached per distinct rule combination.
+    """
+    
+    def __init__(self, rules: "CompiledRules", choices: np.ndarray, scores: np.ndarray):
+        self.rules = rules
+        self.choices = choices
+        self.scores = scores
+    
+    def __len__(self) -> int:
+        return len(self.scores)
+    
+    def messages(self, index: int) -> Tuple[List[str], List[str]]:
+        """(advice keys, alert keys) for one element"""
+        return self.rules.decode(tuple(self.choices[:, index].tolist()))
+    
+    def score(self, index: int) -> int:
+        return int(self.scores[index])
+
+
+class CompiledRules:
+    """Advice and score tables turned into vectorized masks"""
+    
+    def __init__(self, advice_rules=ADVICE_RULES, score_rules=SCORE_RULES, base_score: int = BASE_SCORE):
+        self.base_score = base_score
+        self.advice_groups = [
+            [
+                (
+                    [_compile_condition(c) for c in rule["all"]],
+                    tuple(rule.get("alerts", ())),
+                    tuple(rule.get("advice", ()))
+                )
+                for rule in rules
+            ]
+            for _, rules in advice_rules
+        ]
+        self.score_groups = [
+            [([_compile_condition(c) for c in rule["any"]], rule["penalty"]) for rule in rules]
+            for _, rules in score_rules
+        ]
+        self._decoded: Dict[Tuple[int, ...], Tuple[List[str], List[str]]] = {}
+        
+        for keys in [k for group in self.advice_groups for _, alerts, advice in group for k in alerts + advice] + NO_ALERT_ADVICE:
+            if keys not in MESSAGES:
+                raise ValueError(f"Rule references unknown message: {keys}")
+    
+    def evaluate(self, features: Dict[str, Sequence[Any]]) -> RuleResults:
+        """
+        Evaluate every rule over equally sized feature arrays
+        Missing features take their FEATURE_DEFAULTS value
+        """
+        
+        size = len(next(iter(features.values())))
+        arrays = {}
+        for name, default in FEATURE_DEFAULTS.items():
+            if name not in features:
+                # A scalar broadcasts against the other columns for free
+                arrays[name] = default
+            elif isinstance(default, str):
+                arrays[name] = np.asarray(features[name], dtype=object)
+            else:
+                arrays[name] = np.asarray(features[name], dtype=np.float64)
+        
+        choices = np.full((len(self.advice_groups), size), -1, dtype=np.int16)
+        for g, group in enumerate(self.advice_groups):
+            # Walk rules last to first so the earliest match overwrites later ones
+            for index in range(len(group) - 1, -1, -1):
+                conditions = group[index][0]
+                mask = np.ones(size, dtype=bool)
+                for feature, op, value in conditions:
+                    mask &= op(arrays[feature], value)
+                choices[g][mask] = index
+        
+        scores = np.full(size, self.base_score, dtype=np.int64)
+        for group in self.score_groups:
+            penalty = np.zeros(size, dtype=np.int64)
+            for conditions, amount in reversed(group):
+                mask = np.zeros(size, dtype=bool)
+                for feature, op, value in conditions:
+                    mask |= op(arrays[feature], value)
+                penalty[mask] = amount
+            scores -= penalty
+        np.clip(scores, 0, 100, out=scores)
+        
+        return RuleResults(self, choices, scores)
+    
+    def decode(self, choice: Tuple[int, ...]) -> Tuple[List[str], List[str]]:
+        """Message keys for one combination of fired rules"""
+        
+        decoded = self._decoded.get(choice)
+        if decoded is None:
+            advice: List[str] = []
+            alerts: List[str] = []
+            for group, index in zip(self.advice_groups, choice):
+                if index >= 0:
+                    _, rule_alerts, rule_advice = group[index]
+                    alerts.extend(rule_alerts)
+                    advice.extend(rule_advice)
+            if not alerts:
+                advice.extend(NO_ALERT_ADVICE)
+            decoded = (advice, alerts)
+            self._decoded[choice] = decoded
+        return decoded
+
+
+def _value(reading: Dict[str, Any], key: str, default: Any) -> Any:
+    value = reading.get(key, default)
+    return default if value is None else value
+
+
+def _column(readings: Sequence[Dict[str, Any]], key: str, default: float) -> np.ndarray:
+    return np.fromiter((_value(r, key, default) for r in readings), dtype=np.float64, count=len(readings))
+
+
+def current_features(
+    weathers: Sequence[Dict[str, Any]],
+    soils: Optional[Sequence[Optional[Dict[str, Any]]]] = None
+) -> Dict[str, Any]:
+    """Feature columns from current-weather dicts (and optional soil results)"""
+    
+    features = {
+        "temperature": _column(weathers, "temperature", 25),
+        "humidity": _column(weathers, "humidity", 50),
+        "rain": _column(weathers, "rain_1h", 0),
+        "wind": _column(weathers, "wind_speed", 0)
+    }
+    if soils is not None:
+        features["soil_moisture"] = [
+            (soil.get("moisture_level") or "").lower() if soil else ""
+            for soil in soils
+        ]
+    return features
+
+
+def forecast_features(days: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Feature columns from daily forecast summaries
+    Uses the day's average temperature and humidity, total rain and peak wind
+    """
+    
+    return {
+        "temperature": _column(days, "temp_avg", 25),
+        "humidity": _column(days, "humidity_avg", 50),
+        "rain": _column(days, "rain_total", 0),
+        "wind": _column(days, "wind_max", 0)
+    }
+
+
+# Compiled once at import
+farming_rules = CompiledRules()
@@ -3,33 +3,194 @@ Gemini Service - Multimodal AI for image analysis
 Uses Google Gemini 2.0 Flash for vision tasks
 """
 
-import google.generativeai as genai
-from google.generativeai.types import HarmCategory, HarmBlockThreshold
+import asyncio
 import base64
+import hashlib
 import json
 import re
-from typing import Optional, Dict, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List
 from ..config import settings
+from .image_pipeline import image_pipeline
+from .metrics import track_upstream
+from .resilience import get_policy
+from .cache import TTLCache
+from .result_cache import ResultCache, create_result_cache
+from .single_flight import SingleFlight
 
 class GeminiService:
     """Service for Gemini AI image analysis"""
     
     def __init__(self):
-        if settings.GOOGLE_AI_API_KEY:
-            genai.configure(api_key=settings.GOOGLE_AI_API_KEY)
-            self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
-        else:
-            self.model = None
+        # google.generativeai takes most of a second to import, so the SDK is
+        # loaded on first use (or by the lifespan warm-up), not at import time
+        self._model = None
+        self._configured = False
+        self._configure_lock = threading.Lock()
+        self._safety_settings: Optional[Dict[Any, Any]] = None
+        if not settings.GOOGLE_AI_API_KEY:
             print("Warning: GOOGLE_AI_API_KEY not configured")
+        
+        # The google-generativeai SDK blocks, so every call runs on a small
+        # dedicated pool and the semaphore caps how many are in flight.
+        # Waiters queue on the event loop where they stay cancellable.
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore = asyncio.Semaphore(max(1, settings.GEMINI_MAX_CONCURRENCY))
+        self._flight = SingleFlight()
+        self.resilience = get_policy("gemini", settings.GEMINI_TIMEOUT, settings.GEMINI_SLOW_CALL_SECONDS)
+        
+        self.health_cache: Optional[ResultCache] = None
+        if settings.HEALTH_CACHE_ENABLED:
+            self.health_cache = create_result_cache(
+                backend=settings.HEALTH_CACHE_BACKEND,
+                maxsize=settings.HEALTH_CACHE_SIZE,
+                ttl=settings.HEALTH_CACHE_TTL,
+                directory=settings.HEALTH_CACHE_DIR,
+                perceptual=settings.HEALTH_CACHE_PERCEPTUAL
+            )
+        
+        # (disease, scenario, bucketed days, language) -> (description, generated at)
+        self.future_cache = TTLCache(settings.FUTURE_CACHE_SIZE, settings.FUTURE_CACHE_TTL)
+        self._future_refreshes: Dict[tuple, asyncio.Task] = {}
+        self.future_stale_hits = 0
+        self.future_refreshed = 0
+    
+    @property
+    def model(self):
+        """The GenerativeModel, configuring the SDK on first access (blocking)"""
+        if not self._configured:
+            self._configure()
+        return self._model
+    
+    @model.setter
+    def model(self, value):
+        self._model = value
+        self._configured = True
+    
+    @property
+    def available(self) -> bool:
+        """Whether Gemini can be called, without loading the SDK"""
+        if self._configured:
+            return self._model is not None
+        return bool(settings.GOOGLE_AI_API_KEY)
+    
+    def _configure(self):
+        """Import and configure the SDK once"""
+        
+        with self._configure_lock:
+            if self._configured:
+                return
+            if settings.GOOGLE_AI_API_KEY:
+                import google.generativeai as genai
+                from google.generativeai.types import HarmCategory, HarmBlockThreshold
+                
+                genai.configure(api_key=settings.GOOGLE_AI_API_KEY)
+                self._model = genai.GenerativeModel(settings.GEMINI_MODEL)
+                self._safety_settings = {
+                    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+                    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+                    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
+                    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+                }
+            self._configured = True
+    
+    async def warm_up(self):
+        """Load the SDK off the event loop"""
+        if not self._configured:
+            await asyncio.to_thread(self._configure)
+    
+    async def _generate_content(self, *args, upstream: str = "gemini", **kwargs):
+        """
+        Run model.generate_content off the event loop
+        Bounded by GEMINI_MAX_CONCURRENCY; timed under the given upstream label
+        and guarded by the Gemini breaker, retry budget and adaptive timeout
+        """
+        
+        await self.warm_up()
+        model = self.model
+        if not model:
+            raise Exception("Gemini API not configured")
+        
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.GEMINI_EXECUTOR_WORKERS),
+                thread_name_prefix="gemini"
+            )
+        
+        async def request(timeout: float):
+            # Held per attempt, so retry backoff does not occupy a slot
+            async with self._semaphore, track_upstream(upstream):
+                loop = asyncio.get_running_loop()
+                # The SDK enforces the same deadline, so a timed-out call ends its
+                # thread instead of being abandoned in the executor
+                future = loop.run_in_executor(
+                    self._executor,
+                    lambda: model.generate_content(*args, request_options={"timeout": timeout}, **kwargs)
+                )
+                try:
+                    return await asyncio.shield(future)
+                except asyncio.CancelledError:
+                    # Keep the slot until the thread is free; a retry never overlaps it
+                    await asyncio.wait([future])
+                    if not future.cancelled():
+                        future.exception()  # Retrieved; the timeout is what gets reported
+                    raise
+        
+        return await self.resilience.call(request, operation=upstream, pass_timeout=True)
+    
+    async def _prepare_image(self, image_data: bytes) -> Dict[str, Any]:
+        """Normalize an uploaded photo into a compact JPEG part for Gemini"""
+        jpeg = await image_pipeline.normalize(image_data)
+        return {"mime_type": "image/jpeg", "data": jpeg}
+    
+    async def _generate_text(self, prompt: str) -> str:
+        """Generate plain text from a prompt"""
+        response = await self._generate_content(prompt, upstream="gemini_text")
+        return response.text.strip()
+    
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 500
+    ) -> str:
+        """
+        Chat completion with the same signature as CerebrasService.chat
+        Lets the LLM router use Gemini as a second plant-chat provider
+        """
+        
+        transcript = "\n".join(
+            f"{'Farmer' if msg['role'] == 'user' else 'You'}: {msg['content']}"
+            for msg in messages
+        )
+        prompt = f"{system_prompt}\n\n{transcript}\nYou:"
+        
+        response = await self._generate_content(
+            prompt,
+            upstream="gemini_text",
+            generation_config={"temperature": temperature, "max_output_tokens": max_tokens}
+        )
+        return response.text.strip()
+    
+    def close(self):
+        """Release the executor threads (a new pool is created on next use)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
     
     async def analyze_plant_health(
         self, 
-        image_base64: str, 
+        image_base64: Optional[str] = None, 
         plant_type: Optional[str] = None,
-        language: str = "en"
+        language: str = "en",
+        image_bytes: Optional[bytes] = None
     ) -> Dict[str, Any]:
         """
         Analyze plant health from image
+        Accepts base64 (JSON endpoints) or raw bytes (multipart uploads)
         Returns disease detection, severity, and recommendations
         """
         
@@ -70,27 +231,54 @@ Be accurate but also practical - farmers need actionable advice. If the plant lo
 Return ONLY valid JSON, no markdown formatting."""
 
         try:
-            if not self.model:
+            if not self.available:
                 raise Exception("Gemini API not configured")
             
-            # Decode base64 image
-            image_data = base64.b64decode(image_base64)
+            # Decode base64 image unless raw bytes were uploaded
+            image_data = image_bytes if image_bytes is not None else base64.b64decode(image_base64)
             
-            # Create image part for Gemini using PIL
-            import io
-            from PIL import Image
+            if self.health_cache is None:
+                # Without a cache, concurrent identical scans still share one call
+                flight_key = ("health", hashlib.sha256(image_data).hexdigest(), plant_type, language)
+                return await self._flight.do(
+                    flight_key,
+                    lambda: self._run_health_analysis(prompt, image_data, plant_type)
+                )
             
-            image = Image.open(io.BytesIO(image_data))
+            # Resubmitted photos (flaky uploads, PWA retries) are served from cache
+            cache_key = await self.health_cache.image_key(image_data, plant_type, language)
+            cached = await self.health_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
+            async def analyze_and_cache():
+                result = await self._run_health_analysis(prompt, image_data, plant_type)
+                if "error" not in result:
+                    await self.health_cache.set(cache_key, result)
+                return result
+            
+            # Identical scans already in flight share one call
+            return await self._flight.do(("health", cache_key), analyze_and_cache)
+            
+        except Exception as e:
+            raise Exception(f"Gemini analysis failed: {str(e)}")
+    
+    async def _run_health_analysis(
+        self,
+        prompt: str,
+        image_data: bytes,
+        plant_type: Optional[str]
+    ) -> Dict[str, Any]:
+        """Send one health analysis to Gemini and parse the JSON reply"""
+        
+        try:
+            image = await self._prepare_image(image_data)
             
             # Generate content with image
-            response = self.model.generate_content(
+            response = await self._generate_content(
                 [prompt, image],
-                safety_settings={
-                    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-                    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-                }
+                upstream="gemini_health",
+                safety_settings=self._safety_settings
             )
             
             # Parse JSON response
@@ -113,16 +301,16 @@ Return ONLY valid JSON, no markdown formatting."""
                 "summary": "Could not analyze the image. Please try again with a clearer photo.",
                 "error": str(e)
             }
-        except Exception as e:
-            raise Exception(f"Gemini analysis failed: {str(e)}")
     
     async def analyze_soil(
         self, 
-        image_base64: str,
-        language: str = "en"
+        image_base64: Optional[str] = None,
+        language: str = "en",
+        image_bytes: Optional[bytes] = None
     ) -> Dict[str, Any]:
         """
         Analyze soil from image
+        Accepts base64 (JSON endpoints) or raw bytes (multipart uploads)
         Returns soil type, texture, moisture estimation
         """
         
@@ -154,23 +342,16 @@ Provide your analysis in this exact JSON format:
 Return ONLY valid JSON, no markdown formatting."""
 
         try:
-            if not self.model:
+            if not self.available:
                 raise Exception("Gemini API not configured")
                 
-            import io
-            from PIL import Image
-            
-            image_data = base64.b64decode(image_base64)
-            image = Image.open(io.BytesIO(image_data))
+            image_data = image_bytes if image_bytes is not None else base64.b64decode(image_base64)
+            image = await self._prepare_image(image_data)
             
-            response = self.model.generate_content(
+            response = await self._generate_content(
                 [prompt, image],
-                safety_settings={
-                    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-                    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-                }
+                upstream="gemini_soil",
+                safety_settings=self._safety_settings
             )
             
             response_text = response.text.strip()
@@ -201,31 +382,144 @@ Return ONLY valid JSON, no markdown formatting."""
         """
         Generate description of future plant state
         Used alongside image generation
+        
+        Descriptions depend only on (disease, scenario, days, language), with
+        days deliberately snapped to FUTURE_DAYS_BUCKETS, so they are cached: the
+        text describes bucket_days(days_ahead) days, which callers report back.
+        Entries older than FUTURE_CACHE_FRESH_SECONDS are still served while a
+        background call refreshes them.
         """
         
-        language_instructions = {
-            "en": "Respond in English.",
-            "hi": "Respond in Hindi.",
-            "te": "Respond in Telugu."
-        }
+        key = future_description_key(disease, scenario, days_ahead, language)
+        days = key[3]
+        
+        cached = self.future_cache.get(key)
+        if cached is not None:
+            text, created_at = cached
+            if time.monotonic() - created_at > settings.FUTURE_CACHE_FRESH_SECONDS:
+                self.future_stale_hits += 1
+                self._refresh_future_description(key, disease, scenario, days, language)
+            return text
+        
+        try:
+            # Many farmers ask about the same disease at once; share the call
+            return await self._flight.do(
+                key,
+                lambda: self._fetch_future_description(key, disease, scenario, days, language)
+            )
+        except Exception as e:
+            if scenario == "untreated":
+                return "Without treatment, the disease may spread and cause more damage to the plant."
+            return "With proper treatment, the plant should show signs of recovery and improved health."
+    
+    async def _fetch_future_description(
+        self,
+        key: tuple,
+        disease: str,
+        scenario: str,
+        days_ahead: int,
+        language: str
+    ) -> str:
+        """Generate a future description and cache it; raises on failure"""
         
+        instruction = FUTURE_LANGUAGE_INSTRUCTIONS.get(language, FUTURE_LANGUAGE_INSTRUCTIONS["en"])
         if scenario == "untreated":
             prompt = f"""Describe in 2-3 simple sentences what a plant with {disease} will look like 
             in {days_ahead} days if left UNTREATED. Be realistic but not overly alarming.
-            {language_instructions.get(language, language_instructions["en"])}"""
+            {instruction}"""
         else:
             prompt = f"""Describe in 2-3 simple sentences what a plant with {disease} will look like 
             in {days_ahead} days if properly TREATED. Be encouraging and positive.
-            {language_instructions.get(language, language_instructions["en"])}"""
+            {instruction}"""
         
-        try:
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
-        except Exception as e:
-            if scenario == "untreated":
-                return "Without treatment, the disease may spread and cause more damage to the plant."
-            return "With proper treatment, the plant should show signs of recovery and improved health."
+        text = await self._generate_text(prompt)
+        # Only real descriptions are cached; fallbacks are not
+        self.future_cache.set(key, (text, time.monotonic()))
+        return text
+    
+    def _refresh_future_description(self, key: tuple, disease: str, scenario: str, days_ahead: int, language: str):
+        """Regenerate a stale description in the background, once per key"""
+        
+        if key in self._future_refreshes:
+            return
+        
+        task = asyncio.get_running_loop().create_task(self._flight.do(
+            key,
+            lambda: self._fetch_future_description(key, disease, scenario, days_ahead, language)
+        ))
+        self._future_refreshes[key] = task
+        
+        def done(task: asyncio.Task):
+            self._future_refreshes.pop(key, None)
+            if task.cancelled():
+                return
+            if task.exception() is not None:
+                # The stale entry keeps being served until its TTL runs out
+                print(f"Warning: future description refresh failed: {task.exception()}")
+            else:
+                self.future_refreshed += 1
+        
+        task.add_done_callback(done)
+    
+    async def warm_up_future_descriptions(self):
+        """
+        Pre-generate descriptions for every known disease, scenario and language
+        at the FUTURE_WARM_UP_DAYS buckets; entries already cached are skipped
+        """
+        
+        if not self.available:
+            return
+        
+        from .plant_persona import PlantPersona
+        
+        semaphore = asyncio.Semaphore(max(1, settings.FUTURE_WARM_UP_CONCURRENCY))
+        
+        async def generate(disease: str, scenario: str, days_ahead: int, language: str):
+            # Same key as generate_future_description, so warmed entries are hit
+            key = future_description_key(disease, scenario, days_ahead, language)
+            if key in self.future_cache:
+                return
+            async with semaphore:
+                try:
+                    await self._flight.do(
+                        key,
+                        lambda: self._fetch_future_description(key, disease, scenario, key[3], language)
+                    )
+                except Exception as e:
+                    print(f"Warning: future description warm-up failed for {key}: {e}")
+        
+        await asyncio.gather(*(
+            generate(disease, scenario, days_ahead, language)
+            for disease in PlantPersona.DISEASE_TRAITS
+            for scenario in ("treated", "untreated")
+            for days_ahead in settings.FUTURE_WARM_UP_DAYS
+            for language in FUTURE_LANGUAGE_INSTRUCTIONS
+        ))
+    
+    def future_cache_stats(self) -> Dict[str, Any]:
+        """Future description cache counters, including stale-while-revalidate refreshes"""
+        return {
+            **self.future_cache.stats(),
+            "stale_hits": self.future_stale_hits,
+            "refreshing": len(self._future_refreshes),
+            "refreshed": self.future_refreshed
+        }
+
+
+FUTURE_LANGUAGE_INSTRUCTIONS = {
+    "en": "Respond in English.",
+    "hi": "Respond in Hindi.",
+    "te": "Respond in Telugu."
+}
+
+def bucket_days(days_ahead: int) -> int:
+    """Snap days_ahead to the nearest FUTURE_DAYS_BUCKETS value (ties go to the later one)"""
+    buckets = settings.FUTURE_DAYS_BUCKETS
+    return min(buckets, key=lambda bucket: (abs(bucket - days_ahead), -bucket))
 
+def future_description_key(disease: str, scenario: str, days_ahead: int, language: str) -> tuple:
+    """Future description cache key: normalized disease, scenario, bucketed days, language"""
+    return ("future", disease.strip().lower(), scenario, bucket_days(days_ahead), language)
 
 # Singleton instance
 gemini_service = GeminiService()
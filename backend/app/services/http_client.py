@@ -0,0 +1,39 @@
+"""
+HTTP Client Factory - pooled httpx clients for upstream APIs
+One long-lived client per upstream keeps TCP/TLS connections warm
+"""
+
+import httpx
+from ..config import settings
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional h2 package (pip install httpx[http2])"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def create_http_client(base_url: str, timeout: float) -> httpx.AsyncClient:
+    """
+    Build a pooled AsyncClient for one upstream
+    Limits, keep-alive and HTTP/2 come from Settings
+    """
+    
+    http2 = settings.HTTP2_ENABLED
+    if http2 and not _http2_available():
+        print("Warning: HTTP2_ENABLED is set but h2 is not installed, using HTTP/1.1")
+        http2 = False
+    
+    return httpx.AsyncClient(
+        base_url=base_url,
+        timeout=httpx.Timeout(timeout, connect=min(timeout, settings.HTTP_CONNECT_TIMEOUT)),
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+        ),
+        http2=http2
+    )
@@ -0,0 +1,127 @@
+"""
+Image Generation - Future plant images for the job queue
+A local stub for development and tests, Hugging Face Instruct-Pix2Pix in production
+"""
+
+import asyncio
+import base64
+import io
+from typing import Optional
+import httpx
+from ..config import settings
+from .http_client import create_http_client
+from .metrics import track_upstream
+
+
+def _prompt(scenario: str, disease: str) -> str:
+    if scenario == "untreated":
+        return f"make the leaves look diseased, brown spots, wilting, {disease} progression"
+    return "make the plant look healthy, vibrant green leaves, recovered"
+
+
+def simulate_future(image_data: bytes, scenario: str, days_ahead: int, max_edge: int) -> bytes:
+    """
+    Cheap stand-in for a diffusion model
+    Browns and desaturates untreated plants, greens treated ones, scaled by days_ahead
+    """
+    
+    from PIL import Image, ImageEnhance, ImageOps
+    
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(image_data))).convert("RGB")
+    image.thumbnail((max_edge, max_edge))
+    strength = min(1.0, max(0, days_ahead) / 30)
+    
+    if scenario == "untreated":
+        image = Image.blend(image, Image.new("RGB", image.size, (139, 105, 20)), 0.35 * strength)
+        image = ImageEnhance.Color(image).enhance(1 - 0.4 * strength)
+    else:
+        image = Image.blend(image, Image.new("RGB", image.size, (34, 139, 34)), 0.1 * strength)
+        image = ImageEnhance.Color(image).enhance(1 + 0.4 * strength)
+    
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=85)
+    return output.getvalue()
+
+
+class StubImageGenerator:
+    """Local generator - no GPU or network; `delay` mimics model latency"""
+    
+    name = "stub"
+    
+    def __init__(self, delay: float = 0.0, max_edge: int = 1024):
+        self.delay = delay
+        self.max_edge = max_edge
+    
+    async def generate(self, image_data: bytes, scenario: str, disease: str, days_ahead: int) -> bytes:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return await asyncio.to_thread(simulate_future, image_data, scenario, days_ahead, self.max_edge)
+    
+    async def aclose(self):
+        pass
+
+
+class HuggingFaceImageGenerator:
+    """Instruct-Pix2Pix (or similar) through the Hugging Face Inference API"""
+    
+    name = "huggingface"
+    
+    def __init__(self, api_key: str, model: str, timeout: float):
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+        self.base_url = "https://api-inference.huggingface.co"
+        self.client: Optional[httpx.AsyncClient] = None
+    
+    @property
+    def http(self) -> httpx.AsyncClient:
+        if self.client is None or self.client.is_closed:
+            self.client = create_http_client(self.base_url, self.timeout)
+        return self.client
+    
+    async def generate(self, image_data: bytes, scenario: str, disease: str, days_ahead: int) -> bytes:
+        try:
+            async with track_upstream("huggingface_image"):
+                response = await self.http.post(
+                    f"/models/{self.model}",
+                    headers={"Authorization": f"Bearer {self.api_key}"},
+                    json={
+                        "inputs": {
+                            "image": base64.b64encode(image_data).decode(),
+                            "prompt": _prompt(scenario, disease)
+                        }
+                    }
+                )
+                response.raise_for_status()
+            return response.content
+            
+        except httpx.HTTPStatusError as e:
+            raise Exception(f"Hugging Face API error: {e.response.status_code} - {e.response.text}")
+        except Exception as e:
+            raise Exception(f"Hugging Face request failed: {str(e)}")
+    
+    async def aclose(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+
+def create_image_generator(name: str):
+    """
+    Build the configured generator
+    "auto" uses Hugging Face when HUGGINGFACE_API_KEY is set, else the stub
+    """
+    
+    if name == "auto":
+        name = "huggingface" if settings.HUGGINGFACE_API_KEY else "stub"
+    if name == "huggingface":
+        return HuggingFaceImageGenerator(
+            settings.HUGGINGFACE_API_KEY,
+            settings.HUGGINGFACE_IMAGE_MODEL,
+            settings.HUGGINGFACE_TIMEOUT
+        )
+    return StubImageGenerator(delay=settings.FUTURE_IMAGE_STUB_DELAY, max_edge=settings.IMAGE_MAX_EDGE)
+
+
+# Singleton instance
+image_generator = create_image_generator(settings.FUTURE_IMAGE_GENERATOR)
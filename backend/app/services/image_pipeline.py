@@ -0,0 +1,145 @@
+"""
+Image Pipeline - normalize uploaded photos before vision calls
+Applies EXIF orientation, downsizes, strips metadata and re-encodes as JPEG
+"""
+
+import asyncio
+import io
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Tuple
+from ..config import settings
+
+STAGES = ("decode", "orient", "resize", "encode")
+
+
+def normalize_image(image_data: bytes, max_edge: int, quality: int) -> Tuple[bytes, Dict[str, float]]:
+    """
+    Normalize one image; runs inside a worker process
+    Returns (JPEG bytes, seconds spent per stage)
+    """
+    
+    from PIL import Image, ImageOps
+    
+    timings = {}
+    
+    start = time.perf_counter()
+    image = Image.open(io.BytesIO(image_data))
+    # JPEG can decode straight to a reduced scale, skipping most of the work
+    image.draft("RGB", (max_edge, max_edge))
+    image.load()
+    timings["decode"] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    image = ImageOps.exif_transpose(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    timings["orient"] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    if max(image.size) > max_edge:
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+    timings["resize"] = time.perf_counter() - start
+    
+    # Saving a fresh RGB image without exif/icc arguments drops all metadata
+    start = time.perf_counter()
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=quality, optimize=True)
+    timings["encode"] = time.perf_counter() - start
+    
+    return output.getvalue(), timings
+
+
+def _load_pillow() -> bool:
+    """Import Pillow in whichever process runs this"""
+    from PIL import Image, ImageOps
+    return True
+
+
+class ImagePipeline:
+    """
+    Runs normalize_image in a process pool so large decodes never hold
+    the GIL on the event-loop process. Keeps cumulative size and timing stats.
+    """
+    
+    def __init__(self, workers: int, max_edge: int, quality: int):
+        self.workers = workers
+        self.max_edge = max_edge
+        self.quality = quality
+        self._pool: Optional[ProcessPoolExecutor] = None
+        
+        self.images = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.stage_seconds = {stage: 0.0 for stage in STAGES}
+    
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers <= 0:
+            return None
+        if self._pool is None:
+            # spawn keeps workers clear of the parent's threads and SDK state
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+    
+    async def normalize(self, image_data: bytes) -> bytes:
+        """Return a downsized, metadata-free JPEG of the image"""
+        
+        args = (image_data, self.max_edge, self.quality)
+        pool = self._get_pool()
+        
+        if pool is None:
+            output, timings = await asyncio.to_thread(normalize_image, *args)
+        else:
+            loop = asyncio.get_running_loop()
+            try:
+                output, timings = await loop.run_in_executor(pool, normalize_image, *args)
+            except BrokenProcessPool:
+                # A crashed worker breaks the pool; rebuild it next time
+                self._pool = None
+                output, timings = await asyncio.to_thread(normalize_image, *args)
+        
+        self.images += 1
+        self.bytes_in += len(image_data)
+        self.bytes_out += len(output)
+        for stage, seconds in timings.items():
+            self.stage_seconds[stage] += seconds
+        
+        return output
+    
+    async def warm_up(self):
+        """Import Pillow and start the worker processes before the first photo arrives"""
+        
+        await asyncio.to_thread(_load_pillow)
+        pool = self._get_pool()
+        if pool is not None:
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(loop.run_in_executor(pool, _load_pillow) for _ in range(self.workers)))
+    
+    def close(self):
+        """Shut down worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Bytes saved and time spent per stage"""
+        return {
+            "images": self.images,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": self.bytes_in - self.bytes_out,
+            "stage_seconds": {stage: round(seconds, 4) for stage, seconds in self.stage_seconds.items()}
+        }
+
+
+# Singleton instance
+image_pipeline = ImagePipeline(
+    workers=settings.IMAGE_PROCESS_WORKERS,
+    max_edge=settings.IMAGE_MAX_EDGE,
+    quality=settings.IMAGE_JPEG_QUALITY
+)
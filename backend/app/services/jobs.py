@@ -0,0 +1,226 @@
+"""
+Job Queue - Background jobs with bounded concurrency
+Submissions return a job ID at once; results live in a TTL store
+"""
+
+import asyncio
+import time
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from ..config import settings
+from .cache import TTLCache
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class QueueFullError(Exception):
+    """Raised when no more jobs can be queued"""
+
+
+class Job:
+    """One unit of work and its outcome"""
+    
+    def __init__(self, kind: str, payload: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.payload = payload
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Public view of the job; the payload (e.g. the upload) is not echoed"""
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error
+        }
+
+
+class InProcessJobBackend:
+    """
+    Queue, job store and change notifications inside this process
+    Jobs are kept for `ttl` seconds (LRU-bounded) and lost on restart
+    """
+    
+    def __init__(self, queue_size: int, store_size: int, ttl: float):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._jobs = TTLCache(store_size, ttl)
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+    
+    def enqueue(self, job: Job):
+        try:
+            self._queue.put_nowait(job.id)
+        except asyncio.QueueFull:
+            raise QueueFullError("Job queue is full, try again later")
+        self._jobs.set(job.id, job)
+    
+    async def dequeue(self) -> Optional[Job]:
+        """Next queued job; None if it expired from the store while waiting"""
+        job_id = await self._queue.get()
+        return self._jobs.get(job_id)
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+    
+    def save(self, job: Job):
+        """Store the job's new state and notify subscribers"""
+        self._jobs.set(job.id, job)
+        for queue in self._subscribers.get(job.id, []):
+            queue.put_nowait(job.to_dict())
+    
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, []).append(queue)
+        return queue
+    
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        queues = self._subscribers.get(job_id, [])
+        if queue in queues:
+            queues.remove(queue)
+        if not queues:
+            self._subscribers.pop(job_id, None)
+    
+    def pending(self) -> int:
+        return self._queue.qsize()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"queued": self.pending(), **self._jobs.stats()}
+
+
+class JobQueue:
+    """
+    Runs registered job handlers on a fixed number of worker tasks
+    
+    Workers start with the app lifespan (or on the first submission) and
+    each runs one job at a time, so at most `workers` jobs run at once.
+    A job that exceeds `timeout` seconds fails.
+    """
+    
+    def __init__(self, backend: InProcessJobBackend, workers: int, timeout: float):
+        self.backend = backend
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self._handlers: Dict[str, JobHandler] = {}
+        self._tasks: List[asyncio.Task] = []
+        self.running = 0
+        self.succeeded = 0
+        self.failed = 0
+    
+    def register(self, kind: str, handler: JobHandler):
+        """Handle jobs of this kind with handler(payload) -> result dict"""
+        self._handlers[kind] = handler
+    
+    def start(self):
+        """Start the workers on the running event loop"""
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+    
+    async def stop(self):
+        """Cancel the workers; queued jobs are dropped"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+    
+    def submit(self, kind: str, payload: Dict[str, Any]) -> Job:
+        """Queue a job and return it immediately"""
+        
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        
+        self.start()
+        job = Job(kind, payload)
+        self.backend.enqueue(job)
+        return job
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.backend.get(job_id)
+    
+    async def events(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the job's state now and after every change until it finishes"""
+        
+        job = self.backend.get(job_id)
+        if job is None:
+            return
+        
+        queue = self.backend.subscribe(job_id)
+        try:
+            state = job.to_dict()
+            yield state
+            while state["status"] not in FINISHED:
+                state = await queue.get()
+                yield state
+        finally:
+            self.backend.unsubscribe(job_id, queue)
+    
+    async def _worker(self):
+        while True:
+            job = await self.backend.dequeue()
+            if job is not None:
+                await self._run(job)
+    
+    async def _run(self, job: Job):
+        job.status = RUNNING
+        job.started_at = time.time()
+        payload = job.payload
+        job.payload = None  # Don't keep uploads in the store once running
+        self.backend.save(job)
+        
+        self.running += 1
+        try:
+            job.result = await asyncio.wait_for(self._handlers[job.kind](payload), self.timeout)
+            job.status = SUCCEEDED
+            self.succeeded += 1
+        except asyncio.TimeoutError:
+            job.error = f"Job timed out after {self.timeout:g}s"
+            job.status = FAILED
+            self.failed += 1
+        except asyncio.CancelledError:
+            job.error = "Server shut down before the job finished"
+            job.status = FAILED
+            self.failed += 1
+            raise
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+            self.failed += 1
+        finally:
+            self.running -= 1
+            job.finished_at = time.time()
+            self.backend.save(job)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            **self.backend.stats()
+        }
+
+
+# Singleton instance
+job_queue = JobQueue(
+    InProcessJobBackend(
+        queue_size=settings.JOB_QUEUE_SIZE,
+        store_size=settings.JOB_STORE_SIZE,
+        ttl=settings.JOB_RESULT_TTL
+    ),
+    workers=settings.JOB_WORKERS,
+    timeout=settings.JOB_TIMEOUT
+)
@@ -0,0 +1,264 @@
+"""
+LLM Router - Latency-aware provider selection for plant chat
+Routes each chat to the fastest healthy provider and hedges slow calls
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from ..config import settings
+from .cerebras_service import cerebras_service
+from .gemini_service import gemini_service
+from .resilience import LatencyWindow, OPEN
+
+ChatFn = Callable[..., Awaitable[str]]
+
+
+class ProviderState:
+    """Moving averages of latency and errors for one provider"""
+    
+    def __init__(
+        self,
+        name: str,
+        chat: ChatFn,
+        available: Callable[[], bool],
+        breaker_state: Callable[[], str],
+        alpha: float,
+        hedgeable: bool = True
+    ):
+        self.name = name
+        self.chat = chat
+        self.available = available
+        self.breaker_state = breaker_state
+        self.alpha = alpha
+        self.hedgeable = hedgeable
+        self.latency_ewma: Optional[float] = None
+        self.error_ewma = 0.0
+        self.latency = LatencyWindow()
+        self.calls = 0
+        self.wins = 0
+        self.errors = 0
+    
+    def record_success(self, seconds: float):
+        self.calls += 1
+        self.latency.observe(seconds)
+        if self.latency_ewma is None:
+            self.latency_ewma = seconds
+        else:
+            self.latency_ewma += self.alpha * (seconds - self.latency_ewma)
+        self.error_ewma *= 1 - self.alpha
+    
+    def record_error(self):
+        self.calls += 1
+        self.errors += 1
+        self.error_ewma += self.alpha * (1 - self.error_ewma)
+    
+    def healthy(self, max_error_rate: float) -> bool:
+        return self.error_ewma < max_error_rate and self.breaker_state() != OPEN
+    
+    def stats(self) -> Dict[str, Any]:
+        p95 = self.latency.percentile(0.95)
+        return {
+            "calls": self.calls,
+            "wins": self.wins,
+            "errors": self.errors,
+            "latency_ewma": round(self.latency_ewma, 4) if self.latency_ewma is not None else None,
+            "latency_p95": round(p95, 4) if p95 is not None else None,
+            "error_ewma": round(self.error_ewma, 4)
+        }
+
+
+class LLMRouter:
+    """
+    Pick the healthy provider with the lowest latency EWMA and hedge
+    
+    The first provider is called right away. If it hasn't answered within
+    its own p95 latency (clamped to LLM_HEDGE_MIN_DELAY..LLM_HEDGE_MAX_DELAY)
+    or it fails, the next provider is started too. The first successful
+    answer wins and the other call is cancelled. Providers whose calls cannot
+    really be cancelled (hedgeable=False) are never hedged onto, only failed
+    over to, so a lost race cannot leave their work running.
+    """
+    
+    def __init__(
+        self,
+        alpha: float = 0.2,
+        max_error_rate: float = 0.5,
+        hedge: bool = True,
+        hedge_min_delay: float = 0.2,
+        hedge_max_delay: float = 5.0,
+        hedge_default_delay: float = 2.0,
+        hedge_min_samples: int = 20
+    ):
+        self.alpha = alpha
+        self.max_error_rate = max_error_rate
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_delay = hedge_max_delay
+        self.hedge_default_delay = hedge_default_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.providers: List[ProviderState] = []
+        self.hedged = 0
+        self.hedge_wins = 0
+    
+    def add_provider(
+        self,
+        name: str,
+        chat: ChatFn,
+        available: Callable[[], bool] = lambda: True,
+        breaker_state: Callable[[], str] = lambda: "closed",
+        hedgeable: bool = True
+    ):
+        """Register a provider; registration order breaks ties before any latency is known"""
+        self.providers.append(ProviderState(name, chat, available, breaker_state, self.alpha, hedgeable))
+    
+    def ranked(self) -> List[ProviderState]:
+        """Available providers, healthy and fastest first"""
+        
+        candidates = [(index, p) for index, p in enumerate(self.providers) if p.available()]
+        candidates.sort(key=lambda item: (
+            not item[1].healthy(self.max_error_rate),
+            item[1].latency_ewma is None,
+            item[1].latency_ewma or 0.0,
+            item[0]
+        ))
+        return [p for _, p in candidates]
+    
+    def hedge_delay(self, provider: ProviderState) -> float:
+        if len(provider.latency) < self.hedge_min_samples:
+            return self.hedge_default_delay
+        p95 = provider.latency.percentile(0.95)
+        return max(self.hedge_min_delay, min(self.hedge_max_delay, p95))
+    
+    async def _timed(self, provider: ProviderState, **kwargs) -> Tuple[ProviderState, str]:
+        start = time.perf_counter()
+        try:
+            text = await provider.chat(**kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            provider.record_error()
+            raise
+        provider.record_success(time.perf_counter() - start)
+        return provider, text
+    
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 500
+    ) -> Tuple[str, str]:
+        """
+        Generate a reply from the best provider
+        Returns (text, provider name); raises the last error if every provider fails
+        """
+        
+        ranked = self.ranked()
+        if not ranked:
+            raise Exception("No LLM provider configured")
+        
+        kwargs = {
+            "messages": messages,
+            "system_prompt": system_prompt,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        
+        pending = set()
+        waiting = list(ranked)
+        last_error: Optional[BaseException] = None
+        
+        def start(provider: ProviderState) -> ProviderState:
+            waiting.remove(provider)
+            pending.add(asyncio.create_task(self._timed(provider, **kwargs)))
+            return provider
+        
+        def hedge_target() -> Optional[ProviderState]:
+            return next((p for p in waiting if p.hedgeable), None)
+        
+        try:
+            primary = start(waiting[0])
+            delay = self.hedge_delay(primary) if self.hedge else None
+            
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=delay if hedge_target() is not None else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                
+                if not done:
+                    # Primary is slower than its usual p95 - hedge with the next provider
+                    self.hedged += 1
+                    start(hedge_target())
+                    delay = None
+                    continue
+                
+                for task in done:
+                    pending.discard(task)
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        continue
+                    
+                    provider, text = task.result()
+                    provider.wins += 1
+                    if provider is not primary:
+                        self.hedge_wins += 1
+                    return text, provider.name
+                
+                # Everything in flight failed; fail over to the next provider
+                if not pending and waiting:
+                    start(waiting[0])
+            
+            raise last_error
+            
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "providers": {p.name: p.stats() for p in self.providers}
+        }
+
+
+def create_llm_router() -> LLMRouter:
+    """Router over Cerebras and Gemini text, in LLM_PROVIDERS order"""
+    
+    router = LLMRouter(
+        alpha=settings.LLM_EWMA_ALPHA,
+        max_error_rate=settings.LLM_MAX_ERROR_RATE,
+        hedge=settings.LLM_HEDGE_ENABLED,
+        hedge_min_delay=settings.LLM_HEDGE_MIN_DELAY,
+        hedge_max_delay=settings.LLM_HEDGE_MAX_DELAY,
+        hedge_default_delay=settings.LLM_HEDGE_DEFAULT_DELAY
+    )
+    
+    # Look the chat methods up per call so swapped-in stubs are honoured
+    providers = {
+        "cerebras": (
+            lambda **kwargs: cerebras_service.chat(**kwargs),
+            lambda: bool(cerebras_service.api_key),
+            lambda: cerebras_service.resilience.breaker.state,
+            True
+        ),
+        "gemini": (
+            lambda **kwargs: gemini_service.chat(**kwargs),
+            lambda: gemini_service.available,
+            lambda: gemini_service.resilience.breaker.state,
+            # A cancelled Gemini call keeps its executor thread until the SDK returns
+            False
+        )
+    }
+    for name in settings.LLM_PROVIDERS:
+        if name in providers:
+            router.add_provider(name, *providers[name])
+    return router
+
+
+
+# Singleton instance
+llm_router = create_llm_router()
@@ -0,0 +1,247 @@
+"""
+Metrics - In-process Prometheus registry
+Counters, gauges and histograms rendered in the Prometheus text format
+"""
+
+import asyncio
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Request and upstream latencies span ~5ms cache hits to ~30s vision calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonically increasing value per label set"""
+    
+    kind = "counter"
+    
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+    
+    def inc(self, *label_values: str, amount: float = 1):
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+    
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+
+class Gauge(Counter):
+    """Value that goes up and down per label set"""
+    
+    kind = "gauge"
+    
+    def dec(self, *label_values: str, amount: float = 1):
+        self._values[label_values] = self._values.get(label_values, 0) - amount
+    
+    def set(self, *label_values: str, value: float):
+        self._values[label_values] = value
+
+
+class CallbackGauge:
+    """Gauge whose values are read from a callback at scrape time"""
+    
+    kind = "gauge"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Tuple[str, ...],
+        callback: Callable[[], Dict[Tuple[str, ...], float]]
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.callback = callback
+    
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+            for key, value in self.callback().items()
+        ]
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram per label set
+    An observation is one bisect over the bucket bounds plus two additions
+    """
+    
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+    
+    def observe(self, value: float, *label_values: str):
+        series = self._series.get(label_values)
+        if series is None:
+            series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            self._series[label_values] = series
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+    
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric and renders the exposition text"""
+    
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+    
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+    
+    def gauge(self, name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labels))
+    
+    def callback_gauge(
+        self,
+        name: str,
+        documentation: str,
+        labels: Tuple[str, ...],
+        callback: Callable[[], Dict[Tuple[str, ...], float]]
+    ) -> CallbackGauge:
+        return self._register(CallbackGauge(name, documentation, labels, callback))
+    
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+    
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+# Singleton registry and the app's metrics
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    "cropmagix_http_requests_total",
+    "HTTP requests by route template, method and status",
+    ("route", "method", "status")
+)
+http_request_duration = registry.histogram(
+    "cropmagix_http_request_duration_seconds",
+    "Time to response headers by route template, method and status",
+    ("route", "method", "status")
+)
+http_in_flight = registry.gauge(
+    "cropmagix_http_requests_in_flight",
+    "HTTP requests currently being handled"
+)
+
+upstream_calls = registry.counter(
+    "cropmagix_upstream_calls_total",
+    "Upstream API calls by upstream and outcome",
+    ("upstream", "outcome")
+)
+upstream_duration = registry.histogram(
+    "cropmagix_upstream_duration_seconds",
+    "Upstream API call latency by upstream and outcome",
+    ("upstream", "outcome")
+)
+upstream_in_flight = registry.gauge(
+    "cropmagix_upstream_in_flight",
+    "Upstream API calls currently awaiting a reply",
+    ("upstream",)
+)
+
+
+class track_upstream:
+    """
+    Time one upstream call and count it as ok or error
+    
+    async with track_upstream("gemini_health"):
+        response = await ...
+    """
+    
+    __slots__ = ("upstream", "_start")
+    
+    def __init__(self, upstream: str):
+        self.upstream = upstream
+        self._start = 0.0
+    
+    async def __aenter__(self):
+        upstream_in_flight.inc(self.upstream)
+        self._start = time.perf_counter()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._start
+        if exc_type is None:
+            outcome = "ok"
+        elif issubclass(exc_type, asyncio.CancelledError):
+            outcome = "cancelled"
+        else:
+            outcome = "error"
+        upstream_in_flight.dec(self.upstream)
+        upstream_calls.inc(self.upstream, outcome)
+        upstream_duration.observe(elapsed, self.upstream, outcome)
+        return False
@@ -3,7 +3,73 @@ Plant Persona - System prompts for plant personalities
 Makes the AI respond as if it's the plant speaking
 """
 
-from typing import List, Dict
+from collections import deque
+from functools import lru_cache
+from typing import List, Dict, Iterable, Optional, Tuple
+from ..config import settings
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over a fixed keyword list
+    
+    Finds every keyword occurring in a text in one pass, so matching cost
+    depends on the text length, not on how many keywords there are.
+    """
+    
+    def __init__(self, keywords: Iterable[str]):
+        self.source = keywords
+        # Earlier keywords have priority when several match
+        self.priority = {keyword: rank for rank, keyword in enumerate(keywords)}
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._best: List[Optional[str]] = [None]
+        
+        for keyword in self.priority:
+            node = 0
+            for char in keyword:
+                if char not in self._goto[node]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(None)
+                    self._goto[node][char] = len(self._goto) - 1
+                node = self._goto[node][char]
+            self._best[node] = self._pick(self._best[node], keyword)
+        
+        # Breadth-first pass sets failure links and folds in suffix matches
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._best[child] = self._pick(self._best[child], self._best[self._fail[child]])
+    
+    def _pick(self, a: Optional[str], b: Optional[str]) -> Optional[str]:
+        if a is None:
+            return b
+        if b is None:
+            return a
+        return a if self.priority[a] <= self.priority[b] else b
+    
+    def first_match(self, text: str) -> Optional[str]:
+        """Return the highest-priority keyword contained in text, or None"""
+        
+        node = 0
+        best = None
+        for char in text:
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            if self._best[node] is not None:
+                best = self._pick(best, self._best[node])
+                if self.priority[best] == 0:
+                    break
+        return best
+
 
 class PlantPersona:
     """Generate personality-based system prompts for plants"""
@@ -66,6 +132,9 @@ class PlantPersona:
         }
     }
     
+    # Compiled DISEASE_TRAITS matcher, built on first use
+    _matcher: Optional["KeywordMatcher"] = None
+    
     # Plant type specific greetings
     PLANT_GREETINGS = {
         "tomato": {
@@ -110,8 +179,21 @@ class PlantPersona:
     ) -> str:
         """
         Generate a complete system prompt for the plant persona
+        Memoized per (plant, health status, sorted diseases, language)
         """
         
+        return _cached_persona(plant_type, health_status, tuple(sorted(diseases)), language)
+    
+    @classmethod
+    def _build_persona(
+        cls,
+        plant_type: str,
+        health_status: str,
+        diseases: Tuple[str, ...],
+        language: str
+    ) -> str:
+        """Render the persona prompt; called once per cache key"""
+        
         # Get base greeting
         plant_key = plant_type.lower() if plant_type.lower() in cls.PLANT_GREETINGS else "default"
         greeting = cls.PLANT_GREETINGS[plant_key].get(language, cls.PLANT_GREETINGS[plant_key]["en"])
@@ -123,49 +205,38 @@ class PlantPersona:
         # Get disease-specific traits
         disease_descriptions = []
         for disease in diseases:
-            disease_lower = disease.lower()
-            for key in cls.DISEASE_TRAITS:
-                if key in disease_lower:
-                    trait = cls.DISEASE_TRAITS[key].get(language, cls.DISEASE_TRAITS[key]["en"])
-                    disease_descriptions.append(trait)
-                    break
+            key = cls.match_disease_trait(disease)
+            if key:
+                disease_descriptions.append(cls.DISEASE_TRAITS[key].get(language, cls.DISEASE_TRAITS[key]["en"]))
         
         disease_text = " ".join(disease_descriptions) if disease_descriptions else ""
         
-        # Build complete system prompt
-        language_instructions = {
-            "en": "You must respond ONLY in English. Keep responses short (2-4 sentences). Use simple words a farmer can understand.",
-            "hi": "आपको केवल हिंदी में जवाब देना है। जवाब छोटे रखें (2-4 वाक्य)। सरल शब्दों का उपयोग करें जो किसान समझ सके।",
-            "te": "మీరు తెలుగులో మాత్రమే సమాధానం ఇవ్వాలి. సమాధానాలు చిన్నవిగా ఉంచండి (2-4 వాక్యాలు). రైతు అర్థం చేసుకునే సాధారణ పదాలు ఉపయోగించండి."
-        }
-        
-        system_prompt = f"""{greeting}
-
-I am a {plant_type} plant and I can talk! I will respond as if I am the plant speaking to the farmer who takes care of me.
-
-My current health status: {health_status}
-{f"My current problems: {', '.join(diseases)}" if diseases else "I am feeling healthy!"}
-
-My personality right now:
-{personality}
-
-{disease_text}
-
-{language_instructions.get(language, language_instructions["en"])}
-
-Important rules:
-1. Always speak in first person as the plant (I, me, my)
-2. Show emotion through your words
-3. Be helpful - give practical advice when asked
-4. If healthy, be happy and give care tips
-5. If sick, express discomfort but also hope
-6. Use simple farming terms
-7. End with encouragement or a simple tip when appropriate
-8. Use relevant emojis sparingly (1-2 per response)
-
-Remember: You ARE the plant. Feel what the plant feels. Speak with personality!"""
+        return _PERSONA_TEMPLATE.format(
+            greeting=greeting,
+            plant_type=plant_type,
+            health_status=health_status,
+            problems=f"My current problems: {', '.join(diseases)}" if diseases else "I am feeling healthy!",
+            personality=personality,
+            disease_text=disease_text,
+            language_instruction=_LANGUAGE_INSTRUCTIONS.get(language, _LANGUAGE_INSTRUCTIONS["en"])
+        )
+    
+    @classmethod
+    def match_disease_trait(cls, disease: str) -> Optional[str]:
+        """
+        Return the DISEASE_TRAITS key found in a disease name
+        When several keys match, the one listed first in DISEASE_TRAITS wins
+        """
         
-        return system_prompt
+        if cls._matcher is None or cls._matcher.source is not cls.DISEASE_TRAITS:
+            cls._matcher = KeywordMatcher(cls.DISEASE_TRAITS)
+        return cls._matcher.first_match(disease.lower())
+    
+    @classmethod
+    def clear_cache(cls):
+        """Drop memoized prompts and the compiled matcher after editing the tables"""
+        _cached_persona.cache_clear()
+        cls._matcher = None
     
     @classmethod
     def get_available_plants(cls) -> Dict[str, Dict[str, str]]:
@@ -195,3 +266,40 @@ Remember: You ARE the plant. Feel what the plant feels. Speak with personality!"
         }
         
         return samples.get(language, samples["en"])
+
+
+_LANGUAGE_INSTRUCTIONS = {
+    "en": "You must respond ONLY in English. Keep responses short (2-4 sentences). Use simple words a farmer can understand.",
+    "hi": "आपको केवल हिंदी में जवाब देना है। जवाब छोटे रखें (2-4 वाक्य)। सरल शब्दों का उपयोग करें जो किसान समझ सके।",
+    "te": "మీరు తెలుగులో మాత్రమే సమాధానం ఇవ్వాలి. సమాధానాలు చిన్నవిగా ఉంచండి (2-4 వాక్యాలు). రైతు అర్థం చేసుకునే సాధారణ పదాలు ఉపయోగించండి."
+}
+
+_PERSONA_TEMPLATE = """{greeting}
+
+I am a {plant_type} plant and I can talk! I will respond as if I am the plant speaking to the farmer who takes care of me.
+
+My current health status: {health_status}
+{problems}
+
+My personality right now:
+{personality}
+
+{disease_text}
+
+{language_instruction}
+
+Important rules:
+1. Always speak in first person as the plant (I, me, my)
+2. Show emotion through your words
+3. Be helpful - give practical advice when asked
+4. If healthy, be happy and give care tips
+5. If sick, express discomfort but also hope
+6. Use simple farming terms
+7. End with encouragement or a simple tip when appropriate
+8. Use relevant emojis sparingly (1-2 per response)
+
+Remember: You ARE the plant. Feel what the plant feels. Speak with personality!"""
+
+@lru_cache(maxsize=settings.PERSONA_CACHE_SIZE)
+def _cached_persona(plant_type: str, health_status: str, diseases: Tuple[str, ...], language: str) -> str:
+    return PlantPersona._build_persona(plant_type, health_status, diseases, language)
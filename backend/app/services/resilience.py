@@ -0,0 +1,432 @@
+"""
+Resilience - Circuit breakers, retry budgets and adaptive timeouts
+Shared by the Gemini, Cerebras and OpenWeather services
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+import httpx
+from ..config import settings
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open"""
+    
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"{name} circuit open, retry in {retry_after:.0f}s")
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Errors worth retrying: timeouts, connection failures, 429 and 5xx"""
+    
+    if isinstance(exc, (asyncio.TimeoutError, httpx.TransportError)):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    # google.api_core errors, matched by name so the SDK isn't imported here
+    return type(exc).__name__ in {
+        "ServiceUnavailable", "DeadlineExceeded", "InternalServerError",
+        "ResourceExhausted", "TooManyRequests"
+    }
+
+
+class LatencyWindow:
+    """
+    Recent call latencies with cached percentiles
+    Percentiles are recomputed at most every `refresh` observations
+    """
+    
+    def __init__(self, size: int = 200, refresh: int = 10):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._refresh = refresh
+        self._since_sort = 0
+        self._sorted: list = []
+    
+    def observe(self, seconds: float):
+        self._samples.append(seconds)
+        self._since_sort += 1
+    
+    def clear(self):
+        self._samples.clear()
+        self._sorted = []
+        self._since_sort = 0
+    
+    def __len__(self) -> int:
+        return len(self._samples)
+    
+    def percentile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        if self._since_sort >= self._refresh or not self._sorted:
+            self._sorted = sorted(self._samples)
+            self._since_sort = 0
+        index = min(len(self._sorted) - 1, int(q * len(self._sorted)))
+        return self._sorted[index]
+
+
+class AdaptiveTimeout:
+    """
+    Timeout of p99 * multiplier, clamped to [floor, ceiling]
+    Uses the ceiling (the configured timeout) until enough samples exist
+    
+    Timed-out attempts are observed at the timeout they hit (a censored
+    sample), so a lasting slowdown pushes p99 and the timeout back up
+    instead of every call timing out at a stale low limit.
+    """
+    
+    def __init__(self, ceiling: float, floor: float, multiplier: float, min_samples: int):
+        self.ceiling = ceiling
+        self.floor = floor
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self.latency = LatencyWindow()
+    
+    def current(self) -> float:
+        if len(self.latency) < self.min_samples:
+            return self.ceiling
+        p99 = self.latency.percentile(0.99)
+        return max(self.floor, min(self.ceiling, p99 * self.multiplier))
+
+
+class CircuitBreaker:
+    """
+    Closed -> open when, over the last `window` calls (at least `min_calls`),
+    the failure rate or the slow-call rate crosses its threshold.
+    Open -> half-open after `open_seconds`; half-open lets `half_open_calls`
+    trial calls through and closes if they all succeed.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float,
+        slow_call_seconds: float,
+        slow_call_rate: float,
+        window: int,
+        min_calls: int,
+        open_seconds: float,
+        half_open_calls: int
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        
+        self.state = CLOSED
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=window)  # (failed, slow)
+        self._failures = 0
+        self._slow = 0
+        self._opened_at = 0.0
+        self._trials = 0
+        self._trial_successes = 0
+        self.times_opened = 0
+        self.rejected = 0
+    
+    def allow(self) -> bool:
+        """Whether a call may go through now"""
+        
+        if self.state == CLOSED:
+            return True
+        
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                self.rejected += 1
+                return False
+            self.state = HALF_OPEN
+            self._trials = 0
+            self._trial_successes = 0
+        
+        if self._trials < self.half_open_calls:
+            self._trials += 1
+            return True
+        self.rejected += 1
+        return False
+    
+    def retry_after(self) -> float:
+        return max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+    
+    def release_trial(self, opened: int):
+        """
+        Give back a half-open trial slot whose call ended without an outcome (e.g. cancelled)
+        opened is times_opened when the slot was taken, so a later half-open period is untouched
+        """
+        
+        if self.state == HALF_OPEN and self.times_opened == opened and self._trials > 0:
+            self._trials -= 1
+    
+    def record(self, failed: bool, seconds: Optional[float] = None):
+        """Record a call outcome; latency is optional (streams don't report one)"""
+        
+        slow = seconds is not None and seconds >= self.slow_call_seconds
+        
+        if self.state == HALF_OPEN:
+            if failed or slow:
+                self._open()
+                return
+            self._trial_successes += 1
+            if self._trial_successes >= self.half_open_calls:
+                self._reset()
+            return
+        
+        if self.state == OPEN:
+            return
+        
+        if len(self._outcomes) == self._outcomes.maxlen:
+            old_failed, old_slow = self._outcomes[0]
+            self._failures -= old_failed
+            self._slow -= old_slow
+        self._outcomes.append((failed, slow))
+        self._failures += failed
+        self._slow += slow
+        
+        calls = len(self._outcomes)
+        if calls >= self.min_calls and (
+            self._failures / calls >= self.failure_rate or self._slow / calls >= self.slow_call_rate
+        ):
+            self._open()
+    
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self.times_opened += 1
+    
+    def _reset(self):
+        self.state = CLOSED
+        self._outcomes.clear()
+        self._failures = 0
+        self._slow = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        calls = len(self._outcomes)
+        stats = {
+            "state": self.state,
+            "window_calls": calls,
+            "failure_rate": round(self._failures / calls, 4) if calls else 0.0,
+            "slow_call_rate": round(self._slow / calls, 4) if calls else 0.0,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected
+        }
+        if self.state == OPEN:
+            stats["retry_after"] = round(self.retry_after(), 1)
+        return stats
+
+
+class RetryBudget:
+    """
+    Every call deposits `ratio` tokens and every retry spends one,
+    so retries stay under ~ratio of traffic even during an outage
+    """
+    
+    def __init__(self, ratio: float, cap: float):
+        self.ratio = ratio
+        self.cap = cap
+        self.tokens = cap
+        self.exhausted = 0
+    
+    def deposit(self):
+        self.tokens = min(self.cap, self.tokens + self.ratio)
+    
+    def withdraw(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        self.exhausted += 1
+        return False
+
+
+class ResiliencePolicy:
+    """
+    Breaker, retry budget and per-operation adaptive timeouts for one upstream
+    
+    call() fails fast with CircuitOpenError while the breaker is open,
+    bounds each attempt by the operation's adaptive timeout, and retries
+    transient errors with full-jitter backoff while the budget allows.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        timeout: float,
+        slow_call_seconds: float
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.max_attempts = max(1, settings.RETRY_MAX_ATTEMPTS)
+        self.backoff_base = settings.RETRY_BACKOFF_BASE
+        self.backoff_max = settings.RETRY_BACKOFF_MAX
+        self._timeout_floor = settings.ADAPTIVE_TIMEOUT_FLOOR
+        self._timeout_multiplier = settings.ADAPTIVE_TIMEOUT_MULTIPLIER
+        self._timeout_min_samples = settings.ADAPTIVE_TIMEOUT_MIN_SAMPLES
+        
+        self.breaker = CircuitBreaker(
+            name,
+            failure_rate=settings.BREAKER_FAILURE_RATE,
+            slow_call_seconds=slow_call_seconds,
+            slow_call_rate=settings.BREAKER_SLOW_CALL_RATE,
+            window=settings.BREAKER_WINDOW,
+            min_calls=settings.BREAKER_MIN_CALLS,
+            open_seconds=settings.BREAKER_OPEN_SECONDS,
+            half_open_calls=settings.BREAKER_HALF_OPEN_CALLS
+        )
+        self.budget = RetryBudget(settings.RETRY_BUDGET_RATIO, settings.RETRY_BUDGET_CAP)
+        self.timeouts: Dict[str, AdaptiveTimeout] = {}
+        self.retries = 0
+    
+    def _timeout_for(self, operation: str) -> AdaptiveTimeout:
+        timeout = self.timeouts.get(operation)
+        if timeout is None:
+            timeout = AdaptiveTimeout(
+                self.timeout, self._timeout_floor, self._timeout_multiplier, self._timeout_min_samples
+            )
+            self.timeouts[operation] = timeout
+        return timeout
+    
+    def _admit(self) -> Tuple[bool, Optional[int]]:
+        """(allowed, breaker generation if the call took a half-open trial slot)"""
+        
+        if not self.breaker.allow():
+            return False, None
+        if self.breaker.state == HALF_OPEN:
+            return True, self.breaker.times_opened
+        return True, None
+    
+    def _check(self) -> Optional[int]:
+        allowed, trial = self._admit()
+        if not allowed:
+            raise CircuitOpenError(self.name, self.breaker.retry_after())
+        return trial
+    
+    def _record(self, failed: bool, seconds: Optional[float] = None):
+        """Record an outcome; a breaker that trips forgets the latencies that set its timeouts"""
+        
+        times_opened = self.breaker.times_opened
+        self.breaker.record(failed, seconds)
+        if self.breaker.times_opened != times_opened:
+            # Half-open trials start again from the configured ceiling
+            for timeout in self.timeouts.values():
+                timeout.latency.clear()
+    
+    async def call(
+        self,
+        fn: Callable[..., Awaitable[T]],
+        operation: str = "default",
+        retry_on: Callable[[BaseException], bool] = is_transient,
+        pass_timeout: bool = False
+    ) -> T:
+        """
+        Run fn() under the breaker, adaptive timeout and retry budget
+        With pass_timeout, fn(seconds) gets the attempt's timeout to enforce itself
+        (e.g. as an SDK deadline, so a blocking call is not left running)
+        """
+        
+        trial = self._check()
+        self.budget.deposit()
+        timeout = self._timeout_for(operation)
+        
+        attempt = 1
+        while True:
+            limit = timeout.current()
+            start = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(fn(limit) if pass_timeout else fn(), limit)
+            except asyncio.CancelledError:
+                # No outcome to record; a half-open trial must not keep its slot forever
+                if trial is not None:
+                    self.breaker.release_trial(trial)
+                raise
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    timeout.latency.observe(limit)
+                self._record(True, time.perf_counter() - start)
+                trial = None
+                if attempt >= self.max_attempts or not retry_on(e) or not self.budget.withdraw():
+                    raise
+                
+                # Full jitter: sleep uniformly in [0, base * 2^attempt]
+                await asyncio.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+                allowed, trial = self._admit()
+                if not allowed:
+                    raise
+                self.retries += 1
+                attempt += 1
+                continue
+            
+            elapsed = time.perf_counter() - start
+            self._record(False, elapsed)
+            timeout.latency.observe(elapsed)
+            return result
+    
+    def guard(self) -> "_Guard":
+        """
+        Breaker-only protection for calls that can't be retried or timed as a whole,
+        such as streamed responses:  async with policy.guard(): ...
+        """
+        return _Guard(self)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.breaker.stats(),
+            "retries": self.retries,
+            "retry_budget": round(self.budget.tokens, 2),
+            "retry_budget_exhausted": self.budget.exhausted,
+            "timeouts": {
+                operation: round(timeout.current(), 3)
+                for operation, timeout in self.timeouts.items()
+            }
+        }
+
+
+class _Guard:
+    __slots__ = ("policy", "trial")
+    
+    def __init__(self, policy: ResiliencePolicy):
+        self.policy = policy
+        self.trial: Optional[int] = None
+    
+    async def __aenter__(self):
+        self.trial = self.policy._check()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.policy._record(False)
+        elif not issubclass(exc_type, (asyncio.CancelledError, GeneratorExit)):
+            self.policy._record(True)
+        elif self.trial is not None:
+            # A client that went away says nothing about the upstream
+            self.policy.breaker.release_trial(self.trial)
+        return False
+
+
+# Registry of every policy, reported by /api/health-check
+policies: Dict[str, ResiliencePolicy] = {}
+
+
+def get_policy(name: str, timeout: float, slow_call_seconds: float) -> ResiliencePolicy:
+    """Return the shared policy for an upstream, creating it on first use"""
+    
+    policy = policies.get(name)
+    if policy is None:
+        policy = ResiliencePolicy(name, timeout, slow_call_seconds)
+        policies[name] = policy
+    return policy
+
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: policy.stats() for name, policy in policies.items()}
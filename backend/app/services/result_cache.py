@@ -0,0 +1,221 @@
+"""
+Result Cache - content-addressed cache for image analysis results
+Keys come from the image bytes (or a perceptual hash) plus request options
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+from .cache import TTLCache
+
+
+class MemoryBackend:
+    """In-process LRU backend"""
+    
+    blocking = False
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize, ttl)
+    
+    def get(self, key: str) -> Optional[Any]:
+        return self._cache.get(key)
+    
+    def set(self, key: str, value: Any):
+        self._cache.set(key, value)
+    
+    def clear(self):
+        self._cache.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        return {
+            "size": stats["size"],
+            "maxsize": stats["maxsize"],
+            "evictions": stats["evictions"],
+            "expirations": stats["expirations"]
+        }
+
+
+class DiskBackend:
+    """
+    One JSON file per entry under a directory
+    Survives restarts; bounded by entry count with oldest-first eviction
+    Calls arrive on worker threads, so the index is only touched under a lock
+    """
+    
+    blocking = True
+    
+    def __init__(self, directory: str, maxsize: int, ttl: float):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self.evictions = 0
+        self.expirations = 0
+        
+        # Index of existing entries, oldest first, so eviction needs no directory scan
+        entries = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        self._index: "OrderedDict[str, None]" = OrderedDict((p.stem, None) for p in entries)
+        self._lock = threading.Lock()
+    
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+    
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        # Wall-clock expiry, since entries outlive the process
+        if entry.get("stored_at", 0) + self.ttl <= time.time():
+            self._remove(key)
+            self.expirations += 1
+            return None
+        
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+        return entry.get("value")
+    
+    def set(self, key: str, value: Any):
+        path = self._path(key)
+        # Per-thread temp file, so concurrent writes of one key cannot collide
+        tmp = self.directory / f"{key}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"stored_at": time.time(), "value": value}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        
+        evicted = []
+        with self._lock:
+            self._index[key] = None
+            self._index.move_to_end(key)
+            while len(self._index) > self.maxsize:
+                oldest, _ = self._index.popitem(last=False)
+                evicted.append(oldest)
+                self.evictions += 1
+        for oldest in evicted:
+            self._unlink(oldest)
+    
+    def _remove(self, key: str):
+        with self._lock:
+            self._index.pop(key, None)
+        self._unlink(key)
+    
+    def _unlink(self, key: str):
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+    
+    def clear(self):
+        with self._lock:
+            keys = list(self._index)
+        for key in keys:
+            self._remove(key)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._index),
+            "maxsize": self.maxsize,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+
+def _difference_hash(image_data: bytes) -> str:
+    """
+    64-bit dHash of an image
+    Re-encodes and small resizes of the same photo hash identically
+    """
+    
+    from PIL import Image
+    
+    image = Image.open(io.BytesIO(image_data))
+    # Let the JPEG decoder downscale while decoding - far cheaper than a full decode
+    image.draft("L", (64, 64))
+    pixels = list(image.convert("L").resize((9, 8), Image.LANCZOS).getdata())
+    
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            bits = (bits << 1) | (1 if left > right else 0)
+    return f"{bits:016x}"
+
+
+class ResultCache:
+    """
+    Cache of analysis results keyed by image content
+    
+    mode "exact" keys on SHA-256 of the decoded bytes; mode "perceptual"
+    keys on a dHash so re-encoded uploads of the same photo also hit.
+    """
+    
+    def __init__(self, backend, perceptual: bool = False):
+        self.backend = backend
+        self.perceptual = perceptual
+        self.hits = 0
+        self.misses = 0
+    
+    async def _run(self, fn, *args):
+        """Run blocking backends off the event loop"""
+        if self.backend.blocking:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+    
+    async def image_key(self, image_data: bytes, *parts: Optional[str]) -> str:
+        """Build a cache key from the image and the options that change the result"""
+        
+        digest = None
+        if self.perceptual:
+            try:
+                digest = "p" + await asyncio.to_thread(_difference_hash, image_data)
+            except Exception:
+                digest = None  # Undecodable image - fall back to exact bytes
+        if digest is None:
+            digest = hashlib.sha256(image_data).hexdigest()
+        
+        suffix = hashlib.sha1("|".join(p or "" for p in parts).encode("utf-8")).hexdigest()[:12]
+        return f"{digest}-{suffix}"
+    
+    async def get(self, key: str) -> Optional[Any]:
+        value = await self._run(self.backend.get, key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+    
+    async def set(self, key: str, value: Any):
+        await self._run(self.backend.set, key, value)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit-rate counters merged with backend size and eviction counts"""
+        
+        lookups = self.hits + self.misses
+        return {
+            "mode": "perceptual" if self.perceptual else "exact",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            **self.backend.stats()
+        }
+
+
+def create_result_cache(backend: str, maxsize: int, ttl: float, directory: str, perceptual: bool = False) -> ResultCache:
+    """Build a ResultCache with the configured backend ("memory" or "disk")"""
+    
+    if backend == "disk":
+        return ResultCache(DiskBackend(directory, maxsize, ttl), perceptual=perceptual)
+    return ResultCache(MemoryBackend(maxsize, ttl), perceptual=perceptual)
@@ -0,0 +1,57 @@
+"""
+Single Flight - coalesce identical in-flight upstream requests
+Concurrent callers with the same key share one upstream call
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """
+    Deduplicate concurrent calls by key
+    
+    The first caller for a key starts the work; callers that arrive while it
+    is running await the same task. The entry is dropped as soon as the task
+    finishes, so results and errors are never cached here - every waiter of
+    a failed call sees the error, and the next call starts fresh.
+    """
+    
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.shared = 0
+    
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn() once for all concurrent callers with the same key"""
+        
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._forget(key, t))
+            self.calls += 1
+        else:
+            self.shared += 1
+        
+        # Shield so one cancelled waiter does not cancel the shared call
+        return await asyncio.shield(task)
+    
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+    
+    def __len__(self) -> int:
+        return len(self._inflight)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        return {
+            "in_flight": len(self._inflight),
+            "calls": self.calls,
+            "shared": self.shared
+        }
@@ -0,0 +1,205 @@
+"""
+Translation Service - Message catalogs with an LLM-backed translation memory
+Catalog lookups are dict hits; missing strings are filled in the background
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from ..config import settings
+from .farming_rules import MESSAGES
+
+LANGUAGE_NAMES = {
+    "en": "English",
+    "hi": "Hindi",
+    "te": "Telugu"
+}
+
+LOCALES_DIR = Path(__file__).parent.parent / "locales"
+
+
+def _load_json(path: Path) -> Dict[str, str]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"Warning: could not load {path}: {e}")
+        return {}
+
+
+class TranslationService:
+    """
+    Translate message keys into the request language
+    
+    English text comes from the source messages, other languages from the
+    precompiled catalogs in app/locales, then from the translation memory.
+    A key found in neither returns English right away and is queued; queued
+    keys are translated in batches through the LLM router and written to the
+    translation memory, so the next request gets the translated text.
+    """
+    
+    def __init__(
+        self,
+        source: Dict[str, str],
+        locales_dir: Path,
+        memory_path: Optional[str],
+        batch_size: int = 50,
+        retry_seconds: float = 300
+    ):
+        self.source = source
+        self.memory_path = memory_path
+        self.batch_size = batch_size
+        self.retry_seconds = retry_seconds
+        
+        # language -> key -> text; catalog entries win over translation memory
+        self.memory: Dict[str, Dict[str, str]] = {}
+        if memory_path:
+            self.memory = _load_json(Path(memory_path))
+        self.catalogs: Dict[str, Dict[str, str]] = {"en": dict(source)}
+        for language in LANGUAGE_NAMES:
+            if language != "en":
+                catalog = dict(self.memory.get(language, {}))
+                catalog.update(_load_json(locales_dir / f"{language}.json"))
+                self.catalogs[language] = catalog
+        
+        self._pending: Dict[str, Dict[str, str]] = {}
+        self._failed_at: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.misses = 0
+        self.translated = 0
+    
+    def translate(self, key: str, language: str) -> str:
+        """Text for a message key, falling back to English while a translation is pending"""
+        
+        text = self.catalogs.get(language, {}).get(key)
+        if text is not None:
+            return text
+        
+        english = self.source.get(key, key)
+        if language in LANGUAGE_NAMES and language != "en":
+            self.misses += 1
+            self._queue(language, {key: english})
+        return english
+    
+    def translate_many(self, keys: Iterable[str], language: str) -> List[str]:
+        return [self.translate(key, language) for key in keys]
+    
+    def missing(self, language: str) -> Dict[str, str]:
+        """Source messages with no catalog or memory entry for a language"""
+        catalog = self.catalogs.get(language, {})
+        return {key: text for key, text in self.source.items() if key not in catalog}
+    
+    def _queue(self, language: str, entries: Dict[str, str]):
+        failed_at = self._failed_at.get(language)
+        if failed_at is not None and time.monotonic() - failed_at < self.retry_seconds:
+            return
+        
+        self._pending.setdefault(language, {}).update(entries)
+        if self._task is None or self._task.done():
+            try:
+                self._task = asyncio.get_running_loop().create_task(self._drain())
+            except RuntimeError:
+                # No running loop (e.g. a script); stays queued until the next async call
+                pass
+    
+    async def warm_up(self):
+        """Queue every missing source message for every language and wait for them"""
+        
+        for language in LANGUAGE_NAMES:
+            if language != "en":
+                missing = self.missing(language)
+                if missing:
+                    self._queue(language, missing)
+        if self._task is not None:
+            await self._task
+    
+    async def _drain(self):
+        """Translate queued keys batch by batch until the queue is empty"""
+        
+        while self._pending:
+            language, entries = next(iter(self._pending.items()))
+            batch = dict(list(entries.items())[:self.batch_size])
+            for key in batch:
+                del entries[key]
+            if not entries:
+                del self._pending[language]
+            
+            try:
+                translations = await self._translate_batch(batch, language)
+            except Exception as e:
+                print(f"Warning: translation to {language} failed: {e}")
+                self._failed_at[language] = time.monotonic()
+                self._pending.pop(language, None)
+                continue
+            
+            self._failed_at.pop(language, None)
+            self.catalogs.setdefault(language, {}).update(translations)
+            self.memory.setdefault(language, {}).update(translations)
+            self.translated += len(translations)
+            await asyncio.to_thread(self._save_memory)
+    
+    async def _translate_batch(self, entries: Dict[str, str], language: str) -> Dict[str, str]:
+        """Translate a {key: English text} batch in one LLM call"""
+        
+        from .llm_router import llm_router
+        
+        system_prompt = (
+            f"You translate short farming advice for farmers into {LANGUAGE_NAMES[language]}. "
+            "You receive a JSON object. Translate every value, keep the keys and any emoji unchanged, "
+            "use simple everyday words, and return ONLY the JSON object, no markdown formatting."
+        )
+        text, _ = await llm_router.chat(
+            messages=[{"role": "user", "content": json.dumps(entries, ensure_ascii=False)}],
+            system_prompt=system_prompt,
+            temperature=0.2,
+            max_tokens=2000
+        )
+        
+        text = text.strip()
+        if text.startswith("```"):
+            text = re.sub(r'^```json?\n?', '', text)
+            text = re.sub(r'\n?```$', '', text)
+        translated = json.loads(text)
+        
+        return {
+            key: value.strip()
+            for key, value in translated.items()
+            if key in entries and isinstance(value, str) and value.strip()
+        }
+    
+    def _save_memory(self):
+        """Write the translation memory atomically"""
+        
+        if not self.memory_path:
+            return
+        
+        path = Path(self.memory_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.memory, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp, path)
+    
+    def stats(self) -> Dict[str, object]:
+        return {
+            "languages": {language: len(catalog) for language, catalog in self.catalogs.items()},
+            "pending": sum(len(entries) for entries in self._pending.values()),
+            "misses": self.misses,
+            "translated": self.translated
+        }
+
+
+# Singleton instance
+translator = TranslationService(
+    source=MESSAGES,
+    locales_dir=LOCALES_DIR,
+    memory_path=settings.TRANSLATION_MEMORY_PATH or None,
+    batch_size=settings.TRANSLATION_BATCH_SIZE,
+    retry_seconds=settings.TRANSLATION_RETRY_SECONDS
+)
@@ -4,16 +4,107 @@ Fetches weather data for farming recommendations
 """
 
 import httpx
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
 from ..config import settings
+from .cache import TTLCache
+from .farming_rules import RuleResults, current_features, farming_rules, forecast_features
+from .http_client import create_http_client
+from .metrics import track_upstream
+from .resilience import get_policy
+from .single_flight import SingleFlight
+from .translation import translator
+
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def _geohash_cell(latitude: float, longitude: float, precision: int) -> Tuple[str, float, float]:
+    """Encode coordinates as a geohash and return (hash, cell center lat, cell center lon)"""
+    
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    
+    while len(chars) < precision:
+        rng, value = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits = bits << 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    
+    return (
+        "".join(chars),
+        (lat_range[0] + lat_range[1]) / 2,
+        (lon_range[0] + lon_range[1]) / 2
+    )
 
 class WeatherService:
     """Service for weather data retrieval and analysis"""
     
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
         self.api_key = settings.OPENWEATHER_API_KEY
         self.base_url = "https://api.openweathermap.org/data/2.5"
+        # Pooled client, normally injected by the app lifespan hook
+        self.client = client
+        # Farmers cluster around villages, so nearby coordinates share a grid cell
+        self.cache = TTLCache(settings.WEATHER_CACHE_SIZE, settings.WEATHER_CURRENT_TTL)
+        # Identical in-flight requests (e.g. after a weather alert) share one call
+        self._flight = SingleFlight()
+        # A degraded OpenWeather fails fast to the mock data instead of tying up workers
+        self.resilience = get_policy("openweather", settings.OPENWEATHER_TIMEOUT, settings.OPENWEATHER_SLOW_CALL_SECONDS)
+    
+    async def _get(self, path: str, params: Dict[str, Any], upstream: str) -> httpx.Response:
+        """GET from OpenWeather under the shared breaker, retry budget and adaptive timeout"""
+        
+        async def request():
+            async with track_upstream(upstream):
+                response = await self.http.get(path, params=params)
+                response.raise_for_status()
+                return response
+        
+        return await self.resilience.call(request, operation=upstream)
+    
+    def grid_cell(self, latitude: float, longitude: float) -> Tuple[str, float, float]:
+        """
+        Snap coordinates to the configured weather grid
+        Returns (cell key, snapped latitude, snapped longitude)
+        """
+        
+        precision = settings.WEATHER_GRID_PRECISION
+        if settings.WEATHER_GRID_MODE == "geohash":
+            return _geohash_cell(latitude, longitude, precision)
+        
+        lat = round(latitude, precision)
+        lon = round(longitude, precision)
+        return f"{lat:.{precision}f},{lon:.{precision}f}", lat, lon
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Weather cache hit, miss and eviction counts"""
+        return self.cache.stats()
+    
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Return the pooled client, creating one on first use if none was injected"""
+        if self.client is None or self.client.is_closed:
+            self.client = create_http_client(self.base_url, settings.OPENWEATHER_TIMEOUT)
+        return self.client
+    
+    async def aclose(self):
+        """Close the pooled client"""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
     
     async def get_current_weather(
         self,
@@ -28,36 +119,60 @@ class WeatherService:
         if not self.api_key:
             return self._get_mock_weather(latitude, longitude)
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}/weather",
-                    params={
-                        "lat": latitude,
-                        "lon": longitude,
-                        "appid": self.api_key,
-                        "units": "metric"
-                    }
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                return {
-                    "temperature": data["main"]["temp"],
-                    "feels_like": data["main"]["feels_like"],
-                    "humidity": data["main"]["humidity"],
-                    "pressure": data["main"]["pressure"],
-                    "description": data["weather"][0]["description"],
-                    "icon": data["weather"][0]["icon"],
-                    "wind_speed": data["wind"]["speed"],
-                    "clouds": data["clouds"]["all"],
-                    "visibility": data.get("visibility", 10000) / 1000,  # km
-                    "rain_1h": data.get("rain", {}).get("1h", 0),
-                    "location": data.get("name", "Unknown")
-                }
-                
-            except Exception as e:
-                return self._get_mock_weather(latitude, longitude, error=str(e))
+        cell, lat, lon = self.grid_cell(latitude, longitude)
+        cache_key = ("current", cell)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+        
+        try:
+            # Concurrent requests for the same cell share one upstream call
+            weather = await self._flight.do(
+                cache_key,
+                lambda: self._fetch_current_weather(lat, lon, cache_key)
+            )
+            return dict(weather)
+        
+        except Exception as e:
+            return self._get_mock_weather(latitude, longitude, error=str(e))
+    
+    async def _fetch_current_weather(
+        self,
+        lat: float,
+        lon: float,
+        cache_key: tuple
+    ) -> Dict[str, Any]:
+        """Fetch current weather for a grid cell and cache it; raises on failure"""
+        
+        response = await self._get(
+            "/weather",
+            {
+                "lat": lat,
+                "lon": lon,
+                "appid": self.api_key,
+                "units": "metric"
+            },
+            upstream="openweather_current"
+        )
+        data = response.json()
+        
+        weather = {
+            "temperature": data["main"]["temp"],
+            "feels_like": data["main"]["feels_like"],
+            "humidity": data["main"]["humidity"],
+            "pressure": data["main"]["pressure"],
+            "description": data["weather"][0]["description"],
+            "icon": data["weather"][0]["icon"],
+            "wind_speed": data["wind"]["speed"],
+            "clouds": data["clouds"]["all"],
+            "visibility": data.get("visibility", 10000) / 1000,  # km
+            "rain_1h": data.get("rain", {}).get("1h", 0),
+            "location": data.get("name", "Unknown")
+        }
+        
+        # Only real observations are cached; mock fallbacks are not
+        self.cache.set(cache_key, weather, ttl=settings.WEATHER_CURRENT_TTL)
+        return weather
     
     async def get_forecast(
         self,
@@ -72,57 +187,81 @@ class WeatherService:
         if not self.api_key:
             return self._get_mock_forecast()
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}/forecast",
-                    params={
-                        "lat": latitude,
-                        "lon": longitude,
-                        "appid": self.api_key,
-                        "units": "metric",
-                        "cnt": days * 8  # 8 forecasts per day (3-hour intervals)
-                    }
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                # Process forecast into daily summaries
-                daily_forecasts = {}
-                for item in data["list"]:
-                    date = datetime.fromtimestamp(item["dt"]).strftime("%Y-%m-%d")
-                    
-                    if date not in daily_forecasts:
-                        daily_forecasts[date] = {
-                            "date": date,
-                            "temps": [],
-                            "humidity": [],
-                            "descriptions": [],
-                            "rain": 0
-                        }
-                    
-                    daily_forecasts[date]["temps"].append(item["main"]["temp"])
-                    daily_forecasts[date]["humidity"].append(item["main"]["humidity"])
-                    daily_forecasts[date]["descriptions"].append(item["weather"][0]["description"])
-                    daily_forecasts[date]["rain"] += item.get("rain", {}).get("3h", 0)
-                
-                # Calculate daily averages
-                result = []
-                for date, day_data in list(daily_forecasts.items())[:days]:
-                    result.append({
-                        "date": date,
-                        "temp_min": min(day_data["temps"]),
-                        "temp_max": max(day_data["temps"]),
-                        "temp_avg": sum(day_data["temps"]) / len(day_data["temps"]),
-                        "humidity_avg": sum(day_data["humidity"]) / len(day_data["humidity"]),
-                        "description": max(set(day_data["descriptions"]), key=day_data["descriptions"].count),
-                        "rain_total": day_data["rain"]
-                    })
-                
-                return result
-                
-            except Exception as e:
-                return self._get_mock_forecast()
+        cell, lat, lon = self.grid_cell(latitude, longitude)
+        cache_key = ("forecast", cell, days)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return [dict(day) for day in cached]
+        
+        try:
+            forecast = await self._flight.do(
+                cache_key,
+                lambda: self._fetch_forecast(lat, lon, days, cache_key)
+            )
+            return [dict(day) for day in forecast]
+            
+        except Exception as e:
+            return self._get_mock_forecast()
+    
+    async def _fetch_forecast(
+        self,
+        lat: float,
+        lon: float,
+        days: int,
+        cache_key: tuple
+    ) -> List[Dict[str, Any]]:
+        """Fetch and summarize the forecast for a grid cell and cache it; raises on failure"""
+        
+        response = await self._get(
+            "/forecast",
+            {
+                "lat": lat,
+                "lon": lon,
+                "appid": self.api_key,
+                "units": "metric",
+                "cnt": days * 8  # 8 forecasts per day (3-hour intervals)
+            },
+            upstream="openweather_forecast"
+        )
+        data = response.json()
+        
+        # Process forecast into daily summaries
+        daily_forecasts = {}
+        for item in data["list"]:
+            date = datetime.fromtimestamp(item["dt"]).strftime("%Y-%m-%d")
+            
+            if date not in daily_forecasts:
+                daily_forecasts[date] = {
+                    "date": date,
+                    "temps": [],
+                    "humidity": [],
+                    "descriptions": [],
+                    "rain": 0,
+                    "wind": []
+                }
+            
+            daily_forecasts[date]["temps"].append(item["main"]["temp"])
+            daily_forecasts[date]["humidity"].append(item["main"]["humidity"])
+            daily_forecasts[date]["descriptions"].append(item["weather"][0]["description"])
+            daily_forecasts[date]["rain"] += item.get("rain", {}).get("3h", 0)
+            daily_forecasts[date]["wind"].append(item.get("wind", {}).get("speed", 0))
+        
+        # Calculate daily averages
+        result = []
+        for date, day_data in list(daily_forecasts.items())[:days]:
+            result.append({
+                "date": date,
+                "temp_min": min(day_data["temps"]),
+                "temp_max": max(day_data["temps"]),
+                "temp_avg": sum(day_data["temps"]) / len(day_data["temps"]),
+                "humidity_avg": sum(day_data["humidity"]) / len(day_data["humidity"]),
+                "description": max(set(day_data["descriptions"]), key=day_data["descriptions"].count),
+                "rain_total": day_data["rain"],
+                "wind_max": max(day_data["wind"])
+            })
+        
+        self.cache.set(cache_key, result, ttl=settings.WEATHER_FORECAST_TTL)
+        return result
     
     def get_farming_advice(
         self,
@@ -134,102 +273,57 @@ class WeatherService:
         Generate farming advice based on weather and soil conditions
         """
         
-        advice = []
-        alerts = []
-        
-        temp = weather.get("temperature", 25)
-        humidity = weather.get("humidity", 50)
-        rain = weather.get("rain_1h", 0)
-        wind = weather.get("wind_speed", 0)
-        
-        # Temperature-based advice
-        if temp > 35:
-            alerts.append(self._translate("🌡️ Extreme heat warning! Protect your crops.", language))
-            advice.append(self._translate("Water plants early morning or evening, not midday.", language))
-            advice.append(self._translate("Use mulch to keep soil cool and retain moisture.", language))
-        elif temp > 30:
-            advice.append(self._translate("Hot weather - ensure adequate watering.", language))
-        elif temp < 10:
-            alerts.append(self._translate("❄️ Cold weather alert! Protect sensitive crops.", language))
-            advice.append(self._translate("Cover young plants to protect from cold.", language))
-        
-        # Humidity-based advice
-        if humidity > 80:
-            alerts.append(self._translate("💧 High humidity - watch for fungal diseases.", language))
-            advice.append(self._translate("Improve air circulation around plants.", language))
-            advice.append(self._translate("Avoid overhead watering to prevent disease.", language))
-        elif humidity < 30:
-            advice.append(self._translate("Low humidity - plants may need extra water.", language))
-        
-        # Rain-based advice
-        if rain > 10:
-            alerts.append(self._translate("🌧️ Heavy rain expected - check drainage.", language))
-            advice.append(self._translate("Delay pesticide application until rain stops.", language))
-        elif rain > 0:
-            advice.append(self._translate("Light rain expected - good for crops.", language))
-        else:
-            advice.append(self._translate("No rain expected - water as needed.", language))
-        
-        # Wind-based advice
-        if wind > 10:
-            alerts.append(self._translate("💨 Strong winds - stake tall plants.", language))
-            advice.append(self._translate("Delay spraying operations.", language))
-        
-        # Combine with soil data if available
-        if soil_data:
-            moisture = soil_data.get("moisture_level", "").lower()
-            if moisture == "dry" and rain == 0:
-                alerts.append(self._translate("🏜️ Dry soil + no rain - irrigation urgent!", language))
-            elif moisture == "waterlogged":
-                alerts.append(self._translate("⚠️ Soil waterlogged - improve drainage.", language))
-        
-        # Add general good practice
-        if not alerts:
-            advice.append(self._translate("✅ Good conditions for farming today!", language))
-        
-        return {
-            "advice": advice,
-            "alerts": alerts,
-            "farming_score": self._calculate_farming_score(weather)
-        }
+        return self.get_farming_advice_batch([weather], [soil_data], language)[0]
     
-    def _calculate_farming_score(self, weather: Dict[str, Any]) -> int:
-        """Calculate a simple 0-100 farming conditions score"""
-        
-        score = 100
-        
-        temp = weather.get("temperature", 25)
-        if temp < 10 or temp > 35:
-            score -= 30
-        elif temp < 15 or temp > 30:
-            score -= 15
+    def get_farming_advice_batch(
+        self,
+        weathers: List[Dict[str, Any]],
+        soils: Optional[List[Optional[Dict[str, Any]]]] = None,
+        language: str = "en"
+    ) -> List[Dict[str, Any]]:
+        """
+        Farming advice for many current-weather readings in one rule evaluation
+        soils, if given, lines up with weathers (None where there is no soil result)
+        """
         
-        humidity = weather.get("humidity", 50)
-        if humidity > 85 or humidity < 25:
-            score -= 20
-        elif humidity > 75 or humidity < 35:
-            score -= 10
+        results = farming_rules.evaluate(current_features(weathers, soils))
+        return [self._advice_from(results, i, language) for i in range(len(results))]
+    
+    def get_daily_advice(
+        self,
+        forecasts: List[List[Dict[str, Any]]],
+        language: str = "en"
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Per-day advice and score for the forecasts of many plots
+        All days of all plots are evaluated together
+        """
         
-        rain = weather.get("rain_1h", 0)
-        if rain > 20:
-            score -= 25
-        elif rain > 10:
-            score -= 15
+        days = [day for forecast in forecasts for day in forecast]
+        if not days:
+            return [[] for _ in forecasts]
         
-        wind = weather.get("wind_speed", 0)
-        if wind > 15:
-            score -= 20
-        elif wind > 10:
-            score -= 10
+        results = farming_rules.evaluate(forecast_features(days))
         
-        return max(0, min(100, score))
+        daily = []
+        index = 0
+        for forecast in forecasts:
+            plot_days = []
+            for day in forecast:
+                plot_days.append({"date": day.get("date"), **self._advice_from(results, index, language)})
+                index += 1
+            daily.append(plot_days)
+        return daily
     
-    def _translate(self, text: str, language: str) -> str:
-        """Simple translation helper - in production, use proper i18n"""
+    def _advice_from(self, results: RuleResults, index: int, language: str) -> Dict[str, Any]:
+        """Translate one evaluated element into the advice response shape"""
         
-        # For now, return as-is (translations handled in frontend)
-        # In production, integrate with translation service
-        return text
+        advice_keys, alert_keys = results.messages(index)
+        return {
+            "advice": translator.translate_many(advice_keys, language),
+            "alerts": translator.translate_many(alert_keys, language),
+            "farming_score": results.score(index)
+        }
     
     def _get_mock_weather(
         self, 
@@ -0,0 +1,114 @@
+"""
+Event Loop Latency Benchmark
+Checks that /api/chat-with-plant stays fast while slow Gemini scans run
+
+Usage (from backend/):
+    python -m benchmarks.event_loop_latency
+"""
+
+import asyncio
+import base64
+import io
+import statistics
+import time
+
+import httpx
+
+from app.main import app
+from app.services.cerebras_service import cerebras_service
+from app.services.gemini_service import gemini_service
+
+GEMINI_DELAY = 1.0
+CONCURRENT_SCANS = 4
+CHAT_SAMPLES = 10
+
+
+class SlowGeminiModel:
+    """Stub that blocks like the real SDK does"""
+    
+    def generate_content(self, *args, **kwargs):
+        time.sleep(GEMINI_DELAY)
+        
+        class _Response:
+            text = '{"plant_type": "tomato", "health_status": "healthy", "diseases": [], "recommendations": [], "confidence": 90, "summary": "ok"}'
+        
+        return _Response()
+
+
+async def fake_chat(messages, system_prompt, temperature=0.7, max_tokens=500):
+    return "I feel great, thank you!"
+
+
+def _tiny_png(shade: int = 0) -> str:
+    from PIL import Image
+    
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), (shade, 128, 0)).save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+async def _chat_latency(client: httpx.AsyncClient, start: float = None) -> float:
+    start = start or time.perf_counter()
+    response = await client.post("/api/chat-with-plant", json={
+        "message": "How are you?",
+        "plant_type": "tomato",
+        "health_status": "healthy"
+    })
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def measure():
+    """
+    (chat latencies while idle, chat latencies during CONCURRENT_SCANS scans)
+    Gemini and Cerebras must already be stubbed
+    """
+    
+    # Distinct images, so the scans are not merged into one call
+    images = [_tiny_png(shade) for shade in range(CONCURRENT_SCANS)]
+    
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        idle = [await _chat_latency(client) for _ in range(CHAT_SAMPLES)]
+        
+        async def chat_while_scanning():
+            # Spread the samples across the window where scans are in flight.
+            # Latency is measured from when each chat was due, so a stalled
+            # event loop shows up even if it delays sending the request.
+            samples = []
+            interval = GEMINI_DELAY / CHAT_SAMPLES
+            begin = time.perf_counter()
+            for i in range(1, CHAT_SAMPLES + 1):
+                due = begin + i * interval
+                await asyncio.sleep(max(0, due - time.perf_counter()))
+                samples.append(await _chat_latency(client, start=due))
+            return samples
+        
+        scans = [
+            client.post("/api/analyze-health", json={"image_base64": image})
+            for image in images
+        ]
+        *_, busy = await asyncio.gather(*scans, chat_while_scanning())
+    return idle, busy
+
+
+async def main():
+    gemini_service.model = SlowGeminiModel()
+    cerebras_service.api_key = "bench"
+    cerebras_service.chat = fake_chat
+    
+    idle, busy = await measure()
+    
+    idle_p50 = statistics.median(idle) * 1000
+    busy_p50 = statistics.median(busy) * 1000
+    print(f"chat p50 idle:             {idle_p50:8.2f} ms")
+    print(f"chat p50 during {CONCURRENT_SCANS} scans:   {busy_p50:8.2f} ms")
+    print(f"slowest chat during scans: {max(busy) * 1000:8.2f} ms (scan takes {GEMINI_DELAY * 1000:.0f} ms)")
+    
+    if max(busy) >= GEMINI_DELAY / 2:
+        raise SystemExit("FAIL: chat latency tracked Gemini latency - event loop is blocked")
+    print("OK: chat latency stays flat while Gemini scans run")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
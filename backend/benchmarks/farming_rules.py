@@ -0,0 +1,155 @@
+"""
+Farming Rules Benchmark
+Times the vectorized rule engine on 10k plots x 5 forecast days and checks
+it reproduces the original if/else advice chains exactly
+
+Usage (from backend/):
+    python -m benchmarks.farming_rules
+"""
+
+import random
+import time
+
+from app.services.farming_rules import MESSAGES, farming_rules, current_features, forecast_features
+
+PLOTS = 10_000
+DAYS = 5
+EQUIVALENCE_SAMPLES = 20_000
+
+
+def legacy_advice(weather, soil_data=None):
+    """The hand-written chains that the rule table replaced"""
+    
+    advice = []
+    alerts = []
+    
+    temp = weather.get("temperature", 25)
+    humidity = weather.get("humidity", 50)
+    rain = weather.get("rain_1h", 0)
+    wind = weather.get("wind_speed", 0)
+    
+    if temp > 35:
+        alerts.append("heat_alert")
+        advice += ["water_early_late", "mulch"]
+    elif temp > 30:
+        advice.append("hot_watering")
+    elif temp < 10:
+        alerts.append("cold_alert")
+        advice.append("cover_young")
+    
+    if humidity > 80:
+        alerts.append("humidity_alert")
+        advice += ["air_circulation", "no_overhead_watering"]
+    elif humidity < 30:
+        advice.append("low_humidity")
+    
+    if rain > 10:
+        alerts.append("heavy_rain_alert")
+        advice.append("delay_pesticide")
+    elif rain > 0:
+        advice.append("light_rain")
+    else:
+        advice.append("no_rain")
+    
+    if wind > 10:
+        alerts.append("wind_alert")
+        advice.append("delay_spraying")
+    
+    if soil_data:
+        moisture = soil_data.get("moisture_level", "").lower()
+        if moisture == "dry" and rain == 0:
+            alerts.append("irrigation_urgent")
+        elif moisture == "waterlogged":
+            alerts.append("waterlogged")
+    
+    if not alerts:
+        advice.append("good_conditions")
+    
+    score = 100
+    if temp < 10 or temp > 35:
+        score -= 30
+    elif temp < 15 or temp > 30:
+        score -= 15
+    if humidity > 85 or humidity < 25:
+        score -= 20
+    elif humidity > 75 or humidity < 35:
+        score -= 10
+    if rain > 20:
+        score -= 25
+    elif rain > 10:
+        score -= 15
+    if wind > 15:
+        score -= 20
+    elif wind > 10:
+        score -= 10
+    
+    return advice, alerts, max(0, min(100, score))
+
+
+def random_weather(rng):
+    # Integers near the thresholds plus fractional values, so boundaries get hit
+    pick = lambda low, high: rng.choice([rng.randint(low, high), round(rng.uniform(low, high), 2)])
+    weather = {
+        "temperature": pick(0, 45),
+        "humidity": pick(10, 100),
+        "rain_1h": rng.choice([0, 0, pick(0, 30)]),
+        "wind_speed": pick(0, 20)
+    }
+    for key in list(weather):
+        if rng.random() < 0.05:
+            del weather[key]
+    return weather
+
+
+def random_soil(rng):
+    return rng.choice([None, {}, {"moisture_level": "Dry"}, {"moisture_level": "dry"},
+                       {"moisture_level": "waterlogged"}, {"moisture_level": "moist"}])
+
+
+def check_equivalence(rng):
+    weathers = [random_weather(rng) for _ in range(EQUIVALENCE_SAMPLES)]
+    soils = [random_soil(rng) for _ in range(EQUIVALENCE_SAMPLES)]
+    results = farming_rules.evaluate(current_features(weathers, soils))
+    
+    for i, (weather, soil) in enumerate(zip(weathers, soils)):
+        expected = legacy_advice(weather, soil)
+        advice, alerts = results.messages(i)
+        actual = (advice, alerts, results.score(i))
+        if actual != expected:
+            raise SystemExit(f"FAIL: mismatch for {weather} {soil}: {actual} != {expected}")
+    
+    assert all(key in MESSAGES for key in legacy_advice({})[0])
+    print(f"equivalence: {EQUIVALENCE_SAMPLES} random readings match the original rules")
+
+
+def main():
+    rng = random.Random(3)
+    check_equivalence(rng)
+    
+    days = [
+        {"temp_avg": rng.uniform(0, 45), "humidity_avg": rng.uniform(10, 100),
+         "rain_total": rng.choice([0, rng.uniform(0, 40)]), "wind_max": rng.uniform(0, 20)}
+        for _ in range(PLOTS * DAYS)
+    ]
+    
+    start = time.perf_counter()
+    features = forecast_features(days)
+    extracted = time.perf_counter()
+    results = farming_rules.evaluate(features)
+    evaluated = time.perf_counter()
+    for i in range(len(results)):
+        results.messages(i)
+    decoded = time.perf_counter()
+    
+    print(f"{PLOTS} plots x {DAYS} days = {len(results)} evaluations")
+    print(f"feature extraction: {(extracted - start) * 1000:8.2f} ms")
+    print(f"rule evaluation:    {(evaluated - extracted) * 1000:8.2f} ms")
+    print(f"message decoding:   {(decoded - evaluated) * 1000:8.2f} ms")
+    
+    if evaluated - extracted > 0.1:
+        raise SystemExit("FAIL: vectorized evaluation took more than 100 ms")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
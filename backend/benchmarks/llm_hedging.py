@@ -0,0 +1,85 @@
+"""
+LLM Hedging Benchmark
+Compares plant-chat tail latency with and without hedged requests
+
+Two local stub providers stand in for Cerebras and Gemini text: the
+primary is fast but stalls now and then, the secondary is slower but steady.
+
+Usage (from backend/):
+    python -m benchmarks.llm_hedging
+"""
+
+import asyncio
+import random
+import statistics
+import time
+
+from app.services.llm_router import LLMRouter
+
+REQUESTS = 400
+CONCURRENCY = 20
+WARMUP = 40
+
+
+def stub_provider(median: float, stall_rate: float, stall: float, rng: random.Random):
+    """Chat stub with lognormal latency around `median` and occasional stalls"""
+    
+    async def chat(messages, system_prompt, temperature=0.7, max_tokens=500):
+        delay = stall if rng.random() < stall_rate else median * rng.lognormvariate(0, 0.25)
+        await asyncio.sleep(delay)
+        return "I feel great, thank you!"
+    
+    return chat
+
+
+def build_router(hedge: bool, seed: int) -> LLMRouter:
+    rng = random.Random(seed)
+    router = LLMRouter(hedge=hedge, hedge_min_delay=0.02, hedge_max_delay=2.0, hedge_default_delay=0.5)
+    router.add_provider("cerebras", stub_provider(0.020, 0.03, 1.5, rng))
+    router.add_provider("gemini", stub_provider(0.080, 0.01, 1.5, rng))
+    return router
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run(router: LLMRouter):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await router.chat([{"role": "user", "content": "How are you?"}], "You are a tomato plant.")
+            return time.perf_counter() - start
+    
+    # Let the router learn each provider's latency first
+    await asyncio.gather(*(one() for _ in range(WARMUP)))
+    return await asyncio.gather(*(one() for _ in range(REQUESTS)))
+
+
+async def main():
+    results = {}
+    for hedge in (False, True):
+        router = build_router(hedge, seed=7)
+        samples = await run(router)
+        results[hedge] = samples
+        label = "hedged" if hedge else "single"
+        print(
+            f"{label:7s} p50 {statistics.median(samples) * 1000:8.1f} ms   "
+            f"p95 {percentile(samples, 0.95) * 1000:8.1f} ms   "
+            f"p99 {percentile(samples, 0.99) * 1000:8.1f} ms   "
+            f"hedged {router.hedged:4d} (won {router.hedge_wins})"
+        )
+    
+    before = percentile(results[False], 0.99)
+    after = percentile(results[True], 0.99)
+    print(f"p99 improvement: {before / after:.1f}x")
+    if after >= before:
+        raise SystemExit("FAIL: hedging did not improve p99")
+    print("OK: hedging cuts the tail")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
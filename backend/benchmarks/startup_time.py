@@ -0,0 +1,98 @@
+"""
+Startup Time Benchmark
+Reports import time per module and how soon /health can answer on a cold start
+
+Each measurement runs in a fresh interpreter so nothing is already imported.
+
+Usage (from backend/):
+    python -m benchmarks.startup_time
+"""
+
+import subprocess
+import sys
+import time
+
+TOP_MODULES = 15
+HEAVY_MODULES = ("google.generativeai", "PIL")
+
+CHILD = """
+import asyncio, sys, time
+start = time.perf_counter()
+import httpx
+from app.main import app, warm_up
+imported = time.perf_counter()
+
+async def main():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.get("/health")
+        response.raise_for_status()
+    answered = time.perf_counter()
+    loaded = [name for name in %r if name in sys.modules]
+    await warm_up()
+    warmed = time.perf_counter()
+    print(imported - start, answered - start, warmed - answered, ",".join(loaded))
+
+asyncio.run(main())
+""" % (HEAVY_MODULES,)
+
+
+def import_times():
+    """Parse `python -X importtime` into {module: (self seconds, cumulative seconds)}"""
+    
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            own, cumulative, name = line[len("import time:"):].split("|")
+            times[name.strip()] = (int(own) / 1e6, int(cumulative) / 1e6)
+        except ValueError:
+            continue
+    return times
+
+
+def main():
+    times = import_times()
+    
+    print(f"{'module':45s} {'self':>9s} {'cumulative':>11s}")
+    app_modules = sorted(
+        (item for item in times.items() if item[0].startswith("app")),
+        key=lambda item: item[1][1], reverse=True
+    )
+    for name, (own, cumulative) in app_modules[:TOP_MODULES]:
+        print(f"{name:45s} {own * 1000:7.1f}ms {cumulative * 1000:9.1f}ms")
+    
+    print()
+    print("third-party packages (cumulative):")
+    packages = sorted(
+        (item for item in times.items() if "." not in item[0] and not item[0].startswith("app")),
+        key=lambda item: item[1][1], reverse=True
+    )
+    for name, (_, cumulative) in packages[:TOP_MODULES]:
+        print(f"  {name:43s} {cumulative * 1000:9.1f}ms")
+    
+    # Services may print warnings (e.g. a missing API key); the timings are the last line
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD], capture_output=True, text=True, check=True
+    ).stdout.strip().splitlines()[-1].split()
+    imported, answered, warmed = (float(value) for value in output[:3])
+    loaded = output[3] if len(output) > 3 else ""
+    
+    print()
+    print(f"import app.main:            {imported * 1000:8.1f} ms")
+    print(f"first /health answered at:  {answered * 1000:8.1f} ms")
+    print(f"background warm-up took:    {warmed * 1000:8.1f} ms")
+    print(f"heavy modules loaded before /health: {loaded or 'none'}")
+    
+    if loaded:
+        raise SystemExit(f"FAIL: {loaded} imported before the app could answer /health")
+    print("OK: /health answers before the SDKs are loaded")
+
+
+if __name__ == "__main__":
+    main()
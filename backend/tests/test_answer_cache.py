@@ -0,0 +1,38 @@
+"""
+Answer cache tests
+Similar questions may share an answer; questions that mean something else may not
+"""
+
+from app.services.answer_cache import AnswerCache, meaning_terms, normalize_question
+
+SCOPE = ("tomato", "mild", "early blight", "en")
+ANSWER = {"response": "Yes, spray in the evening.", "emotion": "happy"}
+
+
+def _cache() -> AnswerCache:
+    cache = AnswerCache(maxsize=100, ttl=3600, threshold=0.8)
+    cache.set(SCOPE, "Should I spray fungicide now?", ANSWER, latency=1.0)
+    return cache
+
+
+def test_similar_question_hits():
+    assert _cache().get(SCOPE, "should i spray fungicide now??") == ANSWER
+    assert _cache().get(SCOPE, "Should I spray the fungicide now?") == ANSWER
+
+
+def test_negated_question_misses():
+    cache = _cache()
+    assert cache.get(SCOPE, "Should I not spray fungicide now?") is None
+    assert cache.get(SCOPE, "Shouldn't I spray fungicide now?") is None
+
+
+def test_changed_number_misses():
+    cache = AnswerCache(maxsize=100, ttl=3600, threshold=0.8)
+    cache.set(SCOPE, "Can I water 2 litres a day?", ANSWER, latency=1.0)
+    assert cache.get(SCOPE, "Can I water 20 litres a day?") is None
+
+
+def test_meaning_terms():
+    assert meaning_terms(normalize_question("Don't spray 3 times")) == ("3", "t")
+    assert meaning_terms(normalize_question("अभी छिड़काव मत करो")) == ("मत",)
+    assert meaning_terms(normalize_question("ఇప్పుడు పిచికారీ చేయవద్దు")) == ("చేయవద్దు",)
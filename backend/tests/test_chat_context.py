@@ -0,0 +1,44 @@
+"""
+Chat context tests
+A session summary's coverage only ever moves forward
+"""
+
+import asyncio
+
+from app.services.chat_context import ChatContextBuilder
+
+
+def _builder() -> ChatContextBuilder:
+    builder = ChatContextBuilder(max_tokens=200, summary_tokens=50, cache_size=100, ttl=3600, max_pending=10)
+    
+    async def summarize(summary, turns, language):
+        return f"{len(turns)} turns"
+    
+    builder._summarize = summarize
+    return builder
+
+
+def test_shorter_history_does_not_fold_backwards():
+    builder = _builder()
+    builder.summaries.set("session", ("earlier turns", 30))
+    history = [{"role": "user", "content": "x" * 200} for _ in range(10)]
+    
+    async def scenario():
+        builder.build(history, "hi", conversation="session")
+        await asyncio.sleep(0)
+    
+    asyncio.run(scenario())
+    assert builder.stats()["pending"] == 0
+    assert builder.summaries.get("session") == ("earlier turns", 30)
+
+
+def test_queued_fold_never_lowers_coverage():
+    builder = _builder()
+    builder.summaries.set("session", ("earlier turns", 30))
+    
+    async def scenario():
+        builder._queue("session", "", [{"role": "user", "content": "hi"}], 5, "en")
+        await builder._task
+    
+    asyncio.run(scenario())
+    assert builder.summaries.get("session") == ("earlier turns", 30)
@@ -0,0 +1,26 @@
+"""
+Event loop latency test
+Plant chat must stay fast while slow Gemini health scans are in flight
+"""
+
+import asyncio
+
+from benchmarks import event_loop_latency as bench
+
+
+def test_chat_latency_stays_flat_during_scans(monkeypatch):
+    from app.services.cerebras_service import cerebras_service
+    from app.services.gemini_service import gemini_service
+    
+    # Same slow-model stub as the benchmark; the SDK blocks its thread for GEMINI_DELAY
+    monkeypatch.setattr(gemini_service, "_model", bench.SlowGeminiModel(), raising=False)
+    monkeypatch.setattr(gemini_service, "_configured", True)
+    monkeypatch.setattr(gemini_service, "health_cache", None)
+    monkeypatch.setattr(cerebras_service, "api_key", "test")
+    monkeypatch.setattr(cerebras_service, "chat", bench.fake_chat)
+    
+    idle, busy = asyncio.run(bench.measure())
+    
+    assert len(busy) == bench.CHAT_SAMPLES
+    # A blocked event loop would hold chats for most of a scan
+    assert max(busy) < bench.GEMINI_DELAY / 2
@@ -0,0 +1,48 @@
+"""
+Rate limit tests
+Routes that charge extra per item through charge_extra()
+"""
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.middleware import RateLimitMiddleware, charge_extra
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+    
+    @app.post("/batch/{items}")
+    async def batch(items: int, request: Request):
+        rejected = await charge_extra(request, 5 * items - 5)
+        if rejected is not None:
+            return rejected
+        return {"items": items}
+    
+    app.add_middleware(RateLimitMiddleware, capacity=100, period=3600, route_costs={"/batch/": 5})
+    return TestClient(app)
+
+
+def test_extra_charge_is_reported_in_remaining():
+    client = _client()
+    response = client.post("/batch/4")
+    assert response.status_code == 200
+    assert response.headers["x-ratelimit-remaining"] == "80"
+
+
+def test_batch_larger_than_the_bucket_is_rejected_outright():
+    client = _client()
+    response = client.post("/batch/21")
+    assert response.status_code == 413
+    assert "retry-after" not in response.headers
+    # The route's base cost was refunded
+    assert client.post("/batch/20").status_code == 200
+
+
+def test_rejected_extra_charge_refunds_the_base_cost():
+    client = _client()
+    assert client.post("/batch/15").status_code == 200
+    response = client.post("/batch/10")
+    assert response.status_code == 429
+    assert response.headers["x-ratelimit-remaining"] == "25"
+    assert client.post("/batch/5").status_code == 200
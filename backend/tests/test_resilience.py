@@ -0,0 +1,61 @@
+"""
+Resilience tests
+Breaker state must survive calls that end without an outcome
+"""
+
+import asyncio
+
+from app.services.resilience import CLOSED, HALF_OPEN, ResiliencePolicy
+
+
+def _half_open_policy() -> ResiliencePolicy:
+    policy = ResiliencePolicy("test", timeout=5.0, slow_call_seconds=5.0)
+    policy.breaker.open_seconds = 0
+    policy.breaker.half_open_calls = 1
+    policy.breaker._open()
+    return policy
+
+
+async def _ok():
+    return "ok"
+
+
+def test_cancelled_half_open_trial_releases_its_slot():
+    policy = _half_open_policy()
+    
+    async def scenario():
+        trial = asyncio.create_task(policy.call(lambda: asyncio.sleep(10)))
+        await asyncio.sleep(0.01)
+        assert policy.breaker.state == HALF_OPEN
+        trial.cancel()
+        try:
+            await trial
+        except asyncio.CancelledError:
+            pass
+        
+        # The next probe is admitted and closes the breaker
+        return await policy.call(_ok)
+    
+    assert asyncio.run(scenario()) == "ok"
+    assert policy.breaker.state == CLOSED
+
+
+def test_cancelled_guarded_stream_releases_its_slot():
+    policy = _half_open_policy()
+    
+    async def stream():
+        async with policy.guard():
+            await asyncio.sleep(10)
+    
+    async def scenario():
+        task = asyncio.create_task(stream())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return await policy.call(_ok)
+    
+    assert asyncio.run(scenario()) == "ok"
+    assert policy.breaker.state == CLOSED